@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+# bench_command_template.py
+#
+# Compare FreeFactoryCore.build_ffmpeg_command (compiled template) with the
+# full per-file build it replaces, and check both produce identical argv.
+#
+#   python3 bench/bench_command_template.py [--files 5000] [--factory /path/to/Factory]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bin"))
+
+from core import FreeFactoryCore  # noqa: E402
+from factorystore import FactoryStore  # noqa: E402
+
+SAMPLE_FACTORY = {
+    "FACTORYDESCRIPTION": "Benchmark: H.264/AAC MP4",
+    "OUTPUTDIRECTORY": "/tmp/FreeFactory-bench/",
+    "VIDEOCODECS": "libx264", "VIDEOWRAPPER": "mp4", "VIDEOBITRATE": "8M",
+    "VIDEOPRESET": "medium", "VIDEOPROFILE": "high", "VIDEOPROFILELEVEL": "4.1",
+    "VIDEOSIZE": "1920x1080", "VIDEOPIXFORMAT": "yuv420p", "GROUPPICSIZE": "60",
+    "BFRAMES": "2", "MATCHMINMAXBITRATE": "True", "BUFSIZE": "16M",
+    "AUDIOCODECS": "aac", "AUDIOBITRATE": "192k", "AUDIOSAMPLERATE": "48000",
+    "AUDIOCHANNELS": "2", "MOVFLAGS": "+faststart",
+    "MANUALOPTIONSOUTPUT": "-metadata title={stem}",
+}
+
+
+class _Config(dict):
+    def get(self, key, default=""):
+        return super().get(key, default)
+
+
+def _time(fn, inputs):
+    start = time.perf_counter()
+    for p in inputs:
+        fn(p)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark compiled ffmpeg command templates")
+    ap.add_argument("--files", type=int, default=5000, help="Number of input paths to build for")
+    ap.add_argument("--factory", help="Factory file to benchmark (default: built-in sample)")
+    args = ap.parse_args(argv)
+
+    if args.factory:
+        factory = FactoryStore.shared(Path(args.factory).parent).load(Path(args.factory).name)
+        if factory is None:
+            print(f"Factory not found: {args.factory}", file=sys.stderr)
+            return 2
+    else:
+        factory = dict(SAMPLE_FACTORY)
+
+    core = FreeFactoryCore(_Config(FactoryLocation="/tmp/FreeFactory-bench/Factories"))
+    if core._needs_loudnorm_pass(factory):
+        print("This factory runs a per-file loudnorm pass; it is never templated.")
+        return 0
+
+    inputs = [f"/video/dropbox/clip_{i:05d}.wav" for i in range(args.files)]
+
+    for p in inputs[:50]:
+        full = core._build_ffmpeg_command_full(p, factory)
+        templ = core.build_ffmpeg_command(p, factory)
+        if [str(x) for x in full] != templ:
+            print("MISMATCH for", p)
+            print(" full:    ", full)
+            print(" template:", templ)
+            return 1
+
+    full_t = _time(lambda p: core._build_ffmpeg_command_full(p, factory), inputs)
+    core.command_templates.clear()
+    tmpl_t = _time(lambda p: core.build_ffmpeg_command(p, factory), inputs)
+
+    print(f"files:            {args.files}")
+    print(f"full build:       {full_t * 1e6 / args.files:8.1f} us/file  ({args.files / full_t:,.0f} files/s)")
+    print(f"template render:  {tmpl_t * 1e6 / args.files:8.1f} us/file  ({args.files / tmpl_t:,.0f} files/s)")
+    print(f"speedup:          {full_t / tmpl_t:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
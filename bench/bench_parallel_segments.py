@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# bench_parallel_segments.py
+#
+# Wall-clock of one ffmpeg encode vs PARALLELSEGMENTS=N (ffsegments) for the
+# same factory and input. Without --input a synthetic 1080p source is made
+# with lavfi (testsrc2 + sine). Needs ffmpeg/ffprobe on PATH.
+#
+#   python3 bench/bench_parallel_segments.py [--segments 8] [--duration 600] [--input master.mov]
+#                                      [--factory /path/to/Factory]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bin"))
+
+from core import FreeFactoryCore  # noqa: E402
+from factorystore import FactoryStore  # noqa: E402
+from ffprogress import probe_duration  # noqa: E402
+from ffsegments import run_segmented  # noqa: E402
+
+SAMPLE_FACTORY = {
+    "FACTORYDESCRIPTION": "Benchmark: H.264 slow / AAC MP4",
+    "VIDEOCODECS": "libx264", "VIDEOWRAPPER": "mp4", "VIDEOBITRATE": "8M",
+    "VIDEOPRESET": "slow", "VIDEOPROFILE": "high", "GROUPPICSIZE": "60",
+    "VIDEOPIXFORMAT": "yuv420p", "AUDIOCODECS": "aac", "AUDIOBITRATE": "192k",
+    "MOVFLAGS": "+faststart",
+}
+
+
+class _Config(dict):
+    def get(self, key, default=""):
+        return super().get(key, default)
+
+
+def make_source(path: Path, duration: int) -> None:
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-v", "error", "-y",
+         "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30000/1001:duration={duration}",
+         "-f", "lavfi", "-i", f"sine=frequency=1000:sample_rate=48000:duration={duration}",
+         "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-c:a", "pcm_s16le", str(path)],
+        check=True,
+    )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark segment-parallel encoding")
+    ap.add_argument("--segments", type=int, default=os.cpu_count() // 4 or 2, help="PARALLELSEGMENTS value")
+    ap.add_argument("--duration", type=int, default=600, help="Seconds of synthetic source")
+    ap.add_argument("--input", help="Existing input to encode instead of a synthetic one")
+    ap.add_argument("--factory", help="Factory file to use (default: built-in libx264 slow sample)")
+    args = ap.parse_args(argv)
+
+    if args.factory:
+        factory = FactoryStore.shared(Path(args.factory).parent).load(Path(args.factory).name)
+        if factory is None:
+            print(f"Factory not found: {args.factory}", file=sys.stderr)
+            return 2
+    else:
+        factory = dict(SAMPLE_FACTORY)
+
+    core = FreeFactoryCore(_Config(FactoryLocation="/tmp/FreeFactory-bench/Factories"))
+    with tempfile.TemporaryDirectory(prefix="ffseg-bench-") as tmp:
+        tmp = Path(tmp)
+        src = Path(args.input) if args.input else tmp / "source.mov"
+        if not args.input:
+            print(f"making {args.duration}s synthetic source ...")
+            make_source(src, args.duration)
+
+        single = dict(factory, OUTPUTDIRECTORY=str(tmp / "single"))
+        (tmp / "single").mkdir()
+        cmd = [str(x) for x in core.build_ffmpeg_command(src, single)]
+        t0 = time.perf_counter()
+        rc = subprocess.run(cmd[:1] + ["-nostdin", "-v", "error"] + cmd[1:], stdin=subprocess.DEVNULL).returncode
+        single_t = time.perf_counter() - t0
+        if rc:
+            print(f"single-process encode failed (exit {rc})", file=sys.stderr)
+            return 1
+
+        segmented = dict(factory, OUTPUTDIRECTORY=str(tmp / "segmented"), PARALLELSEGMENTS=str(args.segments))
+        (tmp / "segmented").mkdir()
+        t0 = time.perf_counter()
+        with open(tmp / "segments.log", "w", encoding="utf-8") as log:
+            rc = run_segmented(core, src, segmented, log_fh=log)
+        seg_t = time.perf_counter() - t0
+        if rc is None:
+            print("factory/input not eligible for segmenting (see [SEGMENTS] line)")
+            return 1
+        if rc:
+            print(f"segmented encode failed (exit {rc}); log: {tmp / 'segments.log'}", file=sys.stderr)
+            return 1
+
+        out_single = next((tmp / "single").iterdir())
+        out_seg = next((tmp / "segmented").iterdir())
+        print(f"input:            {src.name}  ({probe_duration(src) or 0:.1f}s)")
+        print(f"single process:   {single_t:8.1f} s   -> {probe_duration(out_single) or 0:.2f}s output")
+        print(f"{args.segments:2d} segments:      {seg_t:8.1f} s   -> {probe_duration(out_seg) or 0:.2f}s output")
+        print(f"speedup:          {single_t / seg_t:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
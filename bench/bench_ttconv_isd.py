@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+# bench_ttconv_isd.py
+#
+# ISD generation time for the bundled ttconv on a large synthetic caption
+# document (one region, N timed two-line paragraphs with styled spans), for
+# each ISD.generate_isd_sequence execution mode, and for "scratch": one
+# ISD.from_model call per significant time, every ISD computed from the whole
+# document. The ISDs of every mode are checked against the first mode's.
+#
+#   python3 bench/bench_ttconv_isd.py [--cues 2000] [--workers 8] [--modes scratch,serial,thread,process]
+
+import argparse
+import os
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "third_party" / "ttconv"))
+
+from ttconv import model  # noqa: E402
+from ttconv import style_properties as styles  # noqa: E402
+from ttconv.isd import ISD  # noqa: E402
+
+
+def make_document(cues: int) -> model.ContentDocument:
+    """cues paragraphs, 2 s on / 0.5 s gap, each 'speaker: text<br/>second line'."""
+    doc = model.ContentDocument()
+    region = model.Region("r1", doc)
+    region.set_style(styles.StyleProperties.Origin, styles.CoordinateType(
+        styles.LengthType(10, styles.LengthType.Units.pct), styles.LengthType(70, styles.LengthType.Units.pct)))
+    region.set_style(styles.StyleProperties.Extent, styles.ExtentType(
+        styles.LengthType(20, styles.LengthType.Units.pct), styles.LengthType(80, styles.LengthType.Units.pct)))
+    doc.put_region(region)
+
+    body = model.Body(doc)
+    div = model.Div(doc)
+    body.push_child(div)
+    for i in range(cues):
+        p = model.P(doc)
+        p.set_region(region)
+        p.set_begin(Fraction(5 * i, 2))
+        p.set_end(Fraction(5 * i + 4, 2))
+
+        speaker = model.Span(doc)
+        speaker.set_style(styles.StyleProperties.Color, styles.NamedColors.yellow.value)
+        speaker.push_child(model.Text(doc, f"SPEAKER {i % 7}: "))
+        p.push_child(speaker)
+
+        line = model.Span(doc)
+        line.push_child(model.Text(doc, f"caption number {i} of the synthetic programme"))
+        p.push_child(line)
+        p.push_child(model.Br(doc))
+
+        second = model.Span(doc)
+        second.set_style(styles.StyleProperties.FontStyle, styles.FontStyleType.italic)
+        second.push_child(model.Text(doc, "with a second, italic line"))
+        p.push_child(second)
+        div.push_child(p)
+    doc.set_body(body)
+    return doc
+
+
+def fingerprint(isd) -> tuple:
+    """Text and computed styles of an ISD, comparable across processes."""
+    def walk(element):
+        text = element.get_text() if isinstance(element, model.Text) else None
+        style = tuple(sorted((prop.__name__, repr(element.get_style(prop))) for prop in element.iter_styles()))
+        return (type(element).__name__, text, style, tuple(walk(c) for c in element))
+    return tuple(walk(r) for r in isd.iter_regions())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark ttconv ISD generation modes")
+    ap.add_argument("--cues", type=int, default=2000, help="Paragraphs in the synthetic document")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Threads/processes for parallel modes")
+    ap.add_argument("--modes", default="scratch,serial,thread,process", help="Comma-separated execution modes")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    doc = make_document(args.cues)
+    print(f"document:  {args.cues} cues, built in {time.perf_counter() - t0:.2f} s")
+
+    reference = None
+    first_t = None
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        t0 = time.perf_counter()
+        if mode == "scratch":
+            sig_times = ISD.significant_times(doc)
+            isds = [(t, ISD.from_model(doc, t, sig_times)) for t in sig_times]
+        else:
+            isds = ISD.generate_isd_sequence(doc, execution=mode, workers=args.workers)
+        elapsed = time.perf_counter() - t0
+        prints = [(t, fingerprint(isd)) for t, isd in isds]
+        if reference is None:
+            reference = prints
+            first_t = elapsed
+        same = "same ISDs" if prints == reference else "ISDs DIFFER"
+        speedup = f"  {first_t / elapsed:5.2f}x"
+        print(f"{mode:9s}  {len(isds):6d} ISDs  {elapsed:8.2f} s{speedup}  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+# bench_ttconv_model.py
+#
+# Memory held by the bundled ttconv's data model: a large synthetic caption
+# document (bench_ttconv_isd.make_document) and the full ISD sequence computed
+# from it, in bytes per element (tracemalloc, allocations still live once the
+# objects are built).
+#
+#   python3 bench/bench_ttconv_model.py [--cues 5000]
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "third_party" / "ttconv"))
+
+from bench_ttconv_isd import make_document  # noqa: E402
+from ttconv import model  # noqa: E402
+from ttconv.isd import ISD  # noqa: E402
+
+
+def count_elements(roots) -> int:
+    return sum(1 for root in roots for _ in root.dfs_iterator())
+
+
+def traced(build):
+    """(result, live bytes allocated by build(), seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark ttconv model memory")
+    ap.add_argument("--cues", type=int, default=5000, help="Paragraphs in the synthetic document")
+    args = ap.parse_args(argv)
+
+    span = model.Span(model.ContentDocument())
+    layout = "__slots__" if not hasattr(span, "__dict__") else "__dict__"
+    print(f"element layout: {layout}, empty Span {sys.getsizeof(span)} B"
+          + (f" + __dict__ {sys.getsizeof(span.__dict__)} B" if layout == "__dict__" else ""))
+
+    doc, size, elapsed = traced(lambda: make_document(args.cues))
+    nodes = count_elements([doc.get_body(), *doc.iter_regions()])
+    print(f"document:  {nodes:8d} elements  {size / 2**20:8.1f} MiB  {size / nodes:6.0f} B/element  ({elapsed:.2f} s)")
+
+    isds, size, elapsed = traced(lambda: ISD.generate_isd_sequence(doc, is_multithreaded=False))
+    nodes = count_elements(region for _, isd in isds for region in isd.iter_regions())
+    print(f"ISDs:      {nodes:8d} elements  {size / 2**20:8.1f} MiB  {size / nodes:6.0f} B/element  ({elapsed:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# bench_ttconv_scc.py
+#
+# Throughput of the bundled ttconv SCC reader on a long synthetic SCC file
+# (pop-on captions with PACs, mid-row codes, special and extended characters),
+# read from one string ("str", the whole file in memory) and, where the reader
+# takes a file object, streamed from disk ("file"). Each mode is timed, then run
+# again under tracemalloc for its peak memory; the captions of every mode are
+# checked against the first mode's.
+#
+#   python3 bench/bench_ttconv_scc.py [--captions 20000] [--modes str,file]
+
+import argparse
+import inspect
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "third_party" / "ttconv"))
+
+from ttconv.scc import reader as scc_reader  # noqa: E402
+
+WORDS = [
+    "to", "the", "and", "of", "captions", "programme", "channel", "archive", "news",
+    "weather", "tonight", "report", "from", "studio", "live", "coverage",
+]
+
+
+def _odd_parity(byte: int) -> int:
+    return byte | 0x80 if bin(byte).count("1") % 2 == 0 else byte
+
+
+def _word(b1: int, b2: int) -> str:
+    return f"{_odd_parity(b1):02x}{_odd_parity(b2):02x}"
+
+
+def _text_words(text: str) -> list:
+    data = text.encode("ascii")
+    if len(data) % 2:
+        data += b"\0"
+    return [_word(data[i], data[i + 1]) for i in range(0, len(data), 2)]
+
+
+def _timecode(frames: int) -> str:
+    ff, s = frames % 30, frames // 30
+    return f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d};{ff:02d}"
+
+
+def make_scc(captions: int) -> str:
+    """captions pop-on captions, two rows each, 4 s apart."""
+    lines = ["Scenarist_SCC V1.0", ""]
+    code = lambda b1, b2: [_word(b1, b2)] * 2  # noqa: E731 - control codes are doubled
+    for i in range(captions):
+        first = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(4))
+        second = f"{WORDS[i % len(WORDS)]} number {i}"
+        words = code(0x14, 0x20) + code(0x14, 0x2E) + code(0x14, 0x52) + _text_words(first)
+        words += code(0x11, 0x2E) + _text_words(" it") + code(0x11, 0x20)      # italics mid-row
+        words += code(0x11, 0x37) + code(0x14, 0x72) + _text_words(second)     # music note, PAC row 15
+        words += _text_words("e") + code(0x12, 0x32)                           # extended char
+        words += code(0x14, 0x2F)
+        lines += [f"{_timecode(i * 120)}\t" + " ".join(words), ""]
+        lines += [f"{_timecode(i * 120 + 90)}\t" + " ".join(code(0x14, 0x2C)), ""]
+    return "\n".join(lines) + "\n"
+
+
+def fingerprint(doc) -> list:
+    out = []
+    for p in doc.get_body().first_child():
+        text = "".join(t.get_text() for t in p.dfs_iterator() if hasattr(t, "get_text"))
+        out.append((p.get_begin(), p.get_end(), text))
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the ttconv SCC reader")
+    ap.add_argument("--captions", type=int, default=20000, help="Captions in the synthetic file")
+    ap.add_argument("--modes", default="str,file", help="Comma-separated input modes (str, file)")
+    args = ap.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    text = make_scc(args.captions)
+    nb_lines = text.count("\n")
+    nb_words = sum(len(line.split("\t", 1)[1].split()) for line in text.splitlines() if "\t" in line)
+
+    with tempfile.TemporaryDirectory(prefix="bench-scc-") as tmp:
+        path = Path(tmp) / "bench.scc"
+        path.write_text(text, encoding="utf-8")
+        print(f"file:  {args.captions} captions, {nb_lines} lines, {nb_words} words, {path.stat().st_size / 2**20:.1f} MiB")
+        del text
+
+        def read(mode):
+            if mode == "str":
+                return scc_reader.to_model(path.read_text(encoding="utf-8"))
+            with open(path, "r", encoding="utf-8") as f:
+                return scc_reader.to_model(f)
+
+        reference = None
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            if mode == "file" and "Iterable" not in str(inspect.signature(scc_reader.to_model)):
+                print(f"{mode:5s}  not supported by this reader")
+                continue
+            t0 = time.perf_counter()
+            doc = read(mode)
+            elapsed = time.perf_counter() - t0
+            prints = fingerprint(doc)
+            del doc
+            if reference is None:
+                reference = prints
+            same = "same captions" if prints == reference else "captions DIFFER"
+
+            tracemalloc.start()
+            read(mode)
+            _size, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{mode:5s}  {elapsed:7.2f} s  {nb_lines / elapsed:9.0f} lines/s  {nb_words / elapsed:9.0f} words/s"
+                  f"  peak {peak / 2**20:7.1f} MiB  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,6 +16,7 @@ from PyQt6.uic import loadUi
 from PyQt6.QtCore import Qt
 
 from config_manager import ConfigManager
+from factorystore import FactoryStore
 from configparser import ConfigParser
 from version import get_version
 
@@ -564,18 +565,9 @@ class FactoryTools(QMainWindow):
         notify_map = {}
         duplicates = []
 
-        for file in factory_dir.glob("*"):
-            if file.is_file():
-                try:
-                    with file.open("r", encoding="utf-8") as f:
-                        for line in f:
-                            if line.startswith("NOTIFYDIRECTORY="):
-                                path = line.strip().split("=", 1)[-1]
-                                if path:
-                                    notify_map.setdefault(path, []).append(file.name)
-                                break
-                except Exception as e:
-                    duplicates.append(f"{file.name}: Error reading file - {str(e)}")
+        for rec in FactoryStore.shared(factory_dir).load_all():
+            if rec.notify_dir:
+                notify_map.setdefault(rec.notify_dir, []).append(rec.name)
 
         for path, files in notify_map.items():
             if len(files) > 1:
@@ -593,9 +585,8 @@ class FactoryTools(QMainWindow):
             return
 
         self.listFactoryFiles.clear()
-        for path in sorted(self.factory_dir.glob("*")):
-            if path.is_file():
-                self.listFactoryFiles.addItem(path.name)
+        for rec in FactoryStore.shared(self.factory_dir).load_all():
+            self.listFactoryFiles.addItem(rec.name)
 
     def preview_factory(self, item):
         factory_path = self.factory_dir / item.text()
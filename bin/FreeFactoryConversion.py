@@ -37,6 +37,12 @@
 # - Robust reprocess detection using (st_dev, st_ino, st_mtime_ns, st_size).
 # - Prevents FFmpeg from reading your TTY (adds -nostdin and uses stdin=DEVNULL).
 # - Prints a clear concurrency banner (CPU/GPU) and encoder in use.
+# - --service mode: one persistent process handles every notify event
+#   (replaces one Python start per dropped file via FreeFactoryNotify.sh).
+# - --watch is driven by inotify (polling fallback) and remembers converted
+#   files in a SQLite job ledger across restarts (ffwatch).
+# - --once/--watch cover every enabled factory (or just --factory) through one
+#   scheduler with per-accelerator caps (ffbatch).
 
 
 from __future__ import annotations
@@ -44,12 +50,15 @@ from __future__ import annotations
 import argparse
 import sys
 import time
+import signal
 import subprocess
 import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, NamedTuple
+from typing import Dict, List, Optional, NamedTuple, Tuple
 
 from config_manager import ConfigManager  # type: ignore
 from core import FreeFactoryCore  # type: ignore
@@ -60,9 +69,20 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 
-# --- global concurrency gate (process-safe) ---
-import json, fcntl, os
-from contextlib import contextmanager
+from ffslots import concurrency_slot, start_broker_thread  # type: ignore
+from ffsegments import run_segmented, segment_count  # type: ignore
+from factoryindex import FactoryIndex  # type: ignore
+from factorystore import FactoryStore  # type: ignore
+from ffwatch import JobLedger, open_watcher, scan_dir  # type: ignore
+from ffbatch import BatchJob, BatchScheduler, accel_caps  # type: ignore
+from ffcaptions import SIDECAR_EXTENSIONS, caption_report, start_caption_stage  # type: ignore
+from ffcaptions import enabled as captions_enabled  # type: ignore
+from ffprogress import (  # type: ignore
+    ProgressParser, below_realtime, expected_duration, format_progress,
+    probe_duration, with_progress_pipe,
+)
+
+PROGRESS_LOG_INTERVAL = 10.0  # seconds between [PROGRESS] lines in the service log
 
 def _cap_int(s, default=None):
     try:
@@ -71,73 +91,15 @@ def _cap_int(s, default=None):
     except Exception:
         return default
 
-def _sema_dir():
-    # user-writable, no root needed
-    d = Path.home() / ".freefactory" / "run"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
 @contextmanager
 def acquire_concurrency_slot(is_gpu: bool, cfg: ConfigManager):
-    """Block until both the global cap and the per-type cap have room."""
-    g_cap = _cap_int(cfg.get("MaxConcurrentJobs", 0))           # 0 => unlimited
-    c_cap = _cap_int(cfg.get("MaxConcurrentJobsCPU", 5))
-    u_cap = _cap_int(cfg.get("MaxConcurrentJobsGPU", 2))
-
-    sema = _sema_dir() / "concurrency.lock"
-    state_path = _sema_dir() / "concurrency.json"
-
-    # open lock file once
-    with open(sema, "a+") as lf:
-        while True:
-            fcntl.flock(lf, fcntl.LOCK_EX)
-            try:
-                try:
-                    data = json.loads(state_path.read_text())
-                except Exception:
-                    data = {"total": 0, "cpu": 0, "gpu": 0}
-
-                total = int(data.get("total", 0))
-                cpu   = int(data.get("cpu",   0))
-                gpu   = int(data.get("gpu",   0))
-
-                # room under caps?
-                total_room = (g_cap is None) or (total < g_cap)
-                type_room  = ( (u_cap is None) if is_gpu else (c_cap is None) ) or \
-                             ( (gpu if is_gpu else cpu) < (u_cap if is_gpu else c_cap) )
-
-                if total_room and type_room:
-                    # take slot
-                    data["total"] = total + 1
-                    if is_gpu:
-                        data["gpu"] = gpu + 1
-                    else:
-                        data["cpu"] = cpu + 1
-                    state_path.write_text(json.dumps(data))
-                    break
-            finally:
-                fcntl.flock(lf, fcntl.LOCK_UN)
-
-            time.sleep(0.5)  # wait then retry
-
-        try:
-            yield  # run job
-        finally:
-            # release slot
-            fcntl.flock(lf, fcntl.LOCK_EX)
-            try:
-                try:
-                    data = json.loads(state_path.read_text())
-                except Exception:
-                    data = {"total": 0, "cpu": 0, "gpu": 0}
-                data["total"] = max(0, int(data.get("total", 0)) - 1)
-                if is_gpu:
-                    data["gpu"] = max(0, int(data.get("gpu", 0)) - 1)
-                else:
-                    data["cpu"] = max(0, int(data.get("cpu", 0)) - 1)
-                state_path.write_text(json.dumps(data))
-            finally:
-                fcntl.flock(lf, fcntl.LOCK_UN)
+    """
+    Block until both the global cap and the per-type cap have room.
+    Slots are handed out by the ffslots broker (FIFO per CPU/GPU type); the
+    caps are read by the broker from the same ~/.freefactoryrc as cfg.
+    """
+    with concurrency_slot(is_gpu):
+        yield  # run job
 
 
 def _as_bool(val: Optional[str]) -> bool:
@@ -160,15 +122,9 @@ def is_settled(path: Path, min_age_sec: float = 2.0) -> bool:
 
 
 def read_factory(factory_path: Path) -> Dict[str, str]:
-    data: Dict[str, str] = {}
-    if not factory_path.exists():
+    data = FactoryStore.shared(factory_path.parent).load(factory_path.name)
+    if data is None:
         raise FileNotFoundError(f"Factory not found: {factory_path}")
-    for raw in factory_path.read_text(encoding="utf-8", errors="replace").splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        k, v = line.split("=", 1)
-        data[k.strip().upper()] = v.strip()
     return data
 
 
@@ -221,26 +177,22 @@ def _which_accel(factory: dict) -> str:
     """
     Return accelerator tag for concurrency gating:
       "" (CPU), "NVENC", "Intel QSV", "VAAPI", "AMD AMF", "CUDA"
-    Uses VIDEOCODECS only.
+    Uses VIDEOCODECS only. (Shared with the GUI queue via FreeFactoryCore.)
     """
-    vc = (factory.get("VIDEOCODECS") or "").strip().lower()
-    # tolerate comma/space separated values
-    tokens = vc.replace(",", " ").split()
-
-    s = " ".join(tokens)  # simple contains is fine here
-    if "nvenc" in s:   return "NVENC"
-    if "qsv"   in s:   return "Intel QSV"
-    if "vaapi" in s:   return "VAAPI"
-    if "amf"   in s:   return "AMD AMF"
-    if "cuda"  in s:   return "CUDA"
-    return ""  # CPU
+    return FreeFactoryCore.which_accel(factory)
 
 
 
 #def run_ffmpeg(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str, str], preview: bool=False) -> int:
 def run_ffmpeg(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str, str], factory_path: Optional[Path] = None, preview: bool = False) -> int:
+    if not preview and segment_count(factory_data):
+        rc = run_ffmpeg_segmented(core, input_file, factory_data, factory_path)
+        if rc is not None:
+            return rc
+
     cmd = core.build_ffmpeg_command(input_file, factory_data, preview=preview)
     cmd = [str(x) for x in cmd]
+    analysis = None if preview else core.analysis_session(input_file, factory_data)
 
     # Ensure -nostdin is after the binary (cmd[0])
     try:
@@ -251,6 +203,10 @@ def run_ffmpeg(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str,
         if "-nostdin" not in cmd:
             cmd.insert(1, "-nostdin")  # was 0; this keeps the exe at cmd[0]
 
+    # Structured progress on stdout; ffmpeg's own log stays on stderr.
+    cmd = with_progress_pipe(cmd)
+    parser = ProgressParser(expected_duration(cmd, probe_duration(input_file)))
+
     log_dir = ensure_log_dir()
     log_path = build_log_path(log_dir, input_file)
 
@@ -262,23 +218,76 @@ def run_ffmpeg(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str,
             cmd,
             stdin=subprocess.DEVNULL,           # key: don't let ffmpeg read our TTY
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            stderr=subprocess.PIPE,
             text=True,
             bufsize=1
         )
+        log_lock = threading.Lock()
+
+        def copy_stderr():
+            assert proc.stderr is not None
+            for line in proc.stderr:
+                if analysis:
+                    analysis.feed(line)
+                with log_lock:
+                    lf.write(line)
+
+        stderr_thread = threading.Thread(target=copy_stderr, daemon=True)
+        stderr_thread.start()
         try:
             assert proc.stdout is not None
+            last_report = time.monotonic()
             for line in proc.stdout:
-                lf.write(line)
+                snap = parser.feed(line)
+                if snap is None:
+                    continue
+                now = time.monotonic()
+                if snap["state"] == "end" or now - last_report >= PROGRESS_LOG_INTERVAL:
+                    last_report = now
+                    slow = "  [below realtime]" if below_realtime(snap) else ""
+                    msg = f"[PROGRESS] {input_file.name}  {format_progress(snap)}{slow}"
+                    print(msg)
+                    with log_lock:
+                        lf.write(msg + "\n")
         finally:
             proc.wait()
+            stderr_thread.join()
             lf.write(f"\n[exit_code] {proc.returncode}\n")
             lf.flush()
+    if analysis and proc.returncode == 0:
+        try:
+            print(f"[ANALYSIS] {input_file.name}  report: {analysis.save(proc.returncode)}")
+        except Exception as e:
+            print(f"[ANALYSIS] {input_file.name}  could not write report: {e}")
     return proc.returncode
 
 
+def run_ffmpeg_segmented(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str, str], factory_path: Optional[Path] = None) -> Optional[int]:
+    """
+    PARALLELSEGMENTS=N: GOP-aligned pieces encoded in parallel (ffsegments).
+    The caller's concurrency slot runs the first piece; every further ffmpeg
+    waits for a slot of the same CPU/GPU kind. None -> run as one process.
+    """
+    is_gpu = bool(_which_accel(factory_data))
+    log_path = build_log_path(ensure_log_dir(), input_file)
+    with log_path.open("a", encoding="utf-8") as lf:
+        lf.write(f"\n==== {datetime.now().isoformat()} ====\n")
+        lf.writelines(factory_provenance(factory_path))
+        rc = run_segmented(core, input_file, factory_data, log_fh=lf, slot=lambda request: concurrency_slot(is_gpu, request))
+        if rc is not None:
+            lf.write(f"\n[exit_code] {rc}\n")
+    return rc
+
+
 def process_file(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str, str], factory_path: Optional[Path] = None):
+    # Caption sidecars (CAPTIONSOURCE/CAPTIONFORMATS) are written while ffmpeg encodes;
+    # an embedded-caption extraction takes a CPU slot of its own
+    captions = start_caption_stage(core, input_file, factory_data,
+                                   slot=lambda request: concurrency_slot(False, request))
     rc = run_ffmpeg(core, input_file, factory_data, factory_path=factory_path, preview=False)
+    report = caption_report(captions)
+    if report:
+        print(report, end="")
 
     # Delete conversion logs on success if requested
     if rc == 0 and _as_bool(factory_data.get("DELETECONVERSIONLOGS")):
@@ -309,9 +318,7 @@ def process_file(core: FreeFactoryCore, input_file: Path, factory_data: Dict[str
 
 
 def scan_candidates(notify_dir: Path) -> List[Path]:
-    if not notify_dir.exists():
-        return []
-    return [p for p in notify_dir.iterdir() if p.is_file()]
+    return scan_dir(notify_dir)
 
 
 class Sig(NamedTuple):
@@ -326,25 +333,381 @@ def file_sig(p: Path) -> Sig:
     return Sig(st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
 
 
+# ============================
+#   Persistent service mode
+# ============================
+#
+# One long-lived process replaces the old "fork FreeFactoryConversion.py per
+# inotify event" chain. Events come either from FreeFactoryNotifyRunner.sh's
+# pipe (same '%T|%w|%e|%f' lines FreeFactoryNotify.sh used to read) or from an
+# inotifywait child we start ourselves. Config, FreeFactoryCore and the factory
+# lookup table are loaded once and shared by every job.
+
+INOTIFY_EVENTS = "close_write,moved_to"
+INOTIFY_EXCLUDES = [
+    r"\.swp$", r"~$", r"\.tmp$", r"\.part$", r"\.crdownload$", r"\.kate-swp$", r"\.DS_Store$",
+]
+
+
+class NotifyEvent(NamedTuple):
+    watch_dir: str
+    event: str
+    filename: str
+
+    @property
+    def path(self) -> Path:
+        return Path(self.watch_dir) / self.filename
+
+
+def parse_notify_line(line: str) -> Optional[NotifyEvent]:
+    """
+    Parse one inotifywait line in either runner format:
+      - 4 fields: time | dir | event | file
+      - 3 fields: dir | event | file
+    """
+    parts = line.rstrip("\n").split("|")
+    if len(parts) >= 4:
+        # filenames may legally contain '|'; keep everything after the 3rd separator
+        _, watch_dir, event, filename = parts[0], parts[1], parts[2], "|".join(parts[3:])
+    elif len(parts) == 3:
+        watch_dir, event, filename = parts
+    else:
+        return None
+    if not filename:
+        return None
+    return NotifyEvent(watch_dir, event, filename)
+
+
+def wait_until_settled(path: Path, timeout: float) -> bool:
+    """
+    Python port of FreeFactoryNotify.sh's settle_file(): wait until the file
+    size stops changing (or timeout). Returns False if the file disappeared.
+    """
+    end = time.monotonic() + max(0.0, timeout)
+    last = -1
+    while time.monotonic() < end:
+        try:
+            curr = path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if curr == last and curr > 0:
+            return True
+        last = curr
+        time.sleep(1)
+    return path.exists()
+
+
+def iter_inotifywait_events(folders: List[str]):
+    """Run inotifywait ourselves (no runner pipe) and yield raw event lines."""
+    cmd = [
+        "inotifywait", "-m", "-r",
+        "-e", INOTIFY_EVENTS,
+        "--timefmt", "%F %T",
+        "--format", "%T|%w|%e|%f",
+    ]
+    for pat in INOTIFY_EXCLUDES:
+        cmd += ["--exclude", pat]
+    cmd += folders
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, text=True, bufsize=1)
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            yield line
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+
+
+class ConversionService:
+    """Dispatch notify events to a shared worker pool inside one process."""
+
+    def __init__(self, cfg: ConfigManager, max_workers: Optional[int] = None):
+        self.cfg = cfg
+        self.core = FreeFactoryCore(cfg)
+        if start_broker_thread():
+            print("[service] Hosting concurrency slot broker")
+        self.index = FactoryIndex(Path(cfg.get("FactoryLocation") or "/opt/FreeFactory/Factories"), recheck_sec=2.0)
+        self.index.refresh(force=True)
+        print(f"[service] Factory index loaded: {len(self.index.notify_dirs())} notify folder(s)")
+
+        try:
+            self.settle_secs = float(cfg.get("AppleDelaySeconds", "2") or 2)
+        except ValueError:
+            self.settle_secs = 2.0
+
+        if not max_workers:
+            # Threads are cheap; the concurrency gate enforces the real CPU/GPU caps.
+            caps = (_cap_int(cfg.get("MaxConcurrentJobsCPU", 1)) or 4) + (_cap_int(cfg.get("MaxConcurrentJobsGPU", 1)) or 4)
+            max_workers = max(4, caps * 2)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ffjob")
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        print(f"[service] Started: {max_workers} worker thread(s), settle {self.settle_secs:g}s")
+
+    def submit(self, ev: NotifyEvent) -> None:
+        if "MOVED_TO" not in ev.event and "CLOSE_WRITE" not in ev.event:
+            return
+        if "ISDIR" in ev.event:
+            return
+        path = ev.path
+        key = path.as_posix()
+        with self._pending_lock:
+            # MOVED_TO + CLOSE_WRITE bursts for the same file collapse into one job
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        print(f"[service] DROP DETECTED: {path} (event={ev.event})")
+        self.pool.submit(self._run_job, path)
+
+    def _run_job(self, input_file: Path) -> None:
+        try:
+            if not input_file.is_file():
+                return
+            if not wait_until_settled(input_file, self.settle_secs):
+                print(f"[service] WARNING: file disappeared during settle: {input_file}")
+                return
+
+            matches = self.index.lookup(input_file.parent)
+            if not matches:
+                print(f"[service] No factory matches notify path: {input_file.parent}", file=sys.stderr)
+                return
+            if len(matches) > 1:
+                names = ", ".join(m[0].name for m in matches)
+                print(f"[service] Multiple factories match notify path: {input_file.parent} ({names})", file=sys.stderr)
+                return
+
+            factory_path, factory_data = matches[0]
+            if not _as_bool(factory_data.get("ENABLEFACTORY")):
+                print(f"[service] Factory is DISABLED: {factory_path.name}")
+                return
+            if input_file.suffix.lower() in SIDECAR_EXTENSIONS and captions_enabled(factory_data):
+                return  # caption sidecar, picked up with its video
+
+            is_gpu = bool(_which_accel(factory_data))
+            with acquire_concurrency_slot(is_gpu, self.cfg):
+                process_file(self.core, input_file, factory_data, factory_path)
+        except Exception as e:
+            print(f"[EXC] {input_file.name}: {e}", file=sys.stderr)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(input_file.as_posix())
+
+    def serve(self, lines) -> None:
+        for line in lines:
+            ev = parse_notify_line(line)
+            if ev is not None:
+                self.submit(ev)
+
+    def shutdown(self) -> None:
+        # Let running encodes finish; drop jobs that have not started yet.
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_service(cfg: ConfigManager, max_workers: Optional[int] = None) -> int:
+    service = ConversionService(cfg, max_workers=max_workers)
+
+    # systemd stops us with SIGTERM; handle it like Ctrl+C.
+    def _on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+    try:
+        if sys.stdin is not None and not sys.stdin.isatty():
+            print("[service] Reading events from stdin (runner pipe)")
+            service.serve(sys.stdin)
+        else:
+            folders = [str(Path(f).expanduser()) for f in cfg.get_notify_folders()]
+            folders = [f for f in folders if Path(f).is_dir()]
+            if not folders:
+                print("[service] ERROR: no valid NotifyFolders configured.", file=sys.stderr)
+                return 1
+            print(f"[service] Watching {len(folders)} folder(s) with inotifywait")
+            service.serve(iter_inotifywait_events(folders))
+    except KeyboardInterrupt:
+        print("[service] Shutting down...")
+    finally:
+        service.shutdown()
+    return 0
+
+
+# ============================
+#         Watch mode
+# ============================
+#
+# --watch/--once: one watcher (inotify, or polling where inotify can't reach)
+# over every enabled factory's notify folder feeds one BatchScheduler (ffbatch):
+# round-robin across factories, per-accelerator caps, long-lived workers.
+# JobLedger keeps the file versions already converted, so a restart (or the
+# next cron --once run) only picks up what is new or changed.
+
+class WatchRunner:
+    """Notify folder events -> ledger check -> global batch scheduler."""
+
+    def __init__(self, cfg: ConfigManager, core: FreeFactoryCore,
+                 folders: Dict[Path, Tuple[Path, Dict[str, str]]], max_workers: Optional[int] = None,
+                 ledger: Optional[JobLedger] = None):
+        self.cfg = cfg
+        self.core = core
+        self.folders = folders  # notify folder -> (factory path, factory data)
+        self.ledger = ledger or JobLedger()
+        try:
+            self.settle_secs = float(cfg.get("AppleDelaySeconds", "2") or 2)
+        except ValueError:
+            self.settle_secs = 2.0
+        self.caps = accel_caps(cfg)
+        if not max_workers:
+            # Enough threads to fill every accelerator in use; the caps do the limiting.
+            used = {_which_accel(data) for _fp, data in folders.values()}
+            max_workers = sum(self.caps.get(a) or 4 for a in used)
+            if self.caps["total"]:
+                max_workers = min(max_workers, self.caps["total"])
+        self.max_workers = max(1, max_workers)
+        self.scheduler = BatchScheduler(self.caps, self.max_workers, self._run_job)
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+
+    def submit(self, path: Path) -> None:
+        entry = self.folders.get(path.parent)
+        if entry is None:
+            return
+        factory_path, factory_data = entry
+        if path.suffix.lower() in SIDECAR_EXTENSIONS and captions_enabled(factory_data):
+            return  # caption sidecar for a video in the same folder, not a job
+        try:
+            if self.ledger.done(factory_path.name, path, file_sig(path)):
+                return
+        except FileNotFoundError:
+            return
+        key = path.as_posix()
+        with self._pending_lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self.scheduler.submit(BatchJob(factory_path.name, _which_accel(factory_data), path,
+                                       (factory_path, factory_data)))
+
+    def _run_job(self, job: BatchJob) -> None:
+        input_file: Path = job.path
+        factory_path, factory_data = job.payload
+        try:
+            # Backlog files are long settled; only fresh drops wait for the writer
+            if not is_settled(input_file, self.settle_secs) and not wait_until_settled(input_file, self.settle_secs):
+                return
+            sig = file_sig(input_file)
+            if self.ledger.done(factory_path.name, input_file, sig):
+                return
+            with acquire_concurrency_slot(bool(job.accel), self.cfg):
+                _, rc = process_file(self.core, input_file, factory_data, factory_path)
+            self.ledger.record(factory_path.name, input_file, sig, rc)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[EXC] {input_file.name}: {e}", file=sys.stderr)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(input_file.as_posix())
+
+    def rescan(self) -> None:
+        """Queue every unconverted file in the notify folders."""
+        for folder, (factory_path, _data) in self.folders.items():
+            present = sorted(scan_candidates(folder))
+            self.ledger.forget_missing(factory_path.name, folder, present)
+            for p in present:
+                self.submit(p)
+        queued = self.scheduler.pending()
+        if queued:
+            print("[batch] Queued: " + ", ".join(f"{name} {n}" for name, n in sorted(queued.items())))
+
+    def run(self, once: bool = False, poll_interval: float = 2.0) -> int:
+        def _on_sigterm(signum, frame):
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGTERM, _on_sigterm)
+        watcher = None
+        try:
+            self.rescan()
+            if once:
+                while not self.scheduler.join(timeout=1.0):
+                    pass  # short waits keep Ctrl+C responsive
+                return 0
+            watcher = open_watcher(list(self.folders), poll_interval)
+            print(f"[watch] Watching {len(self.folders)} folder(s) with {type(watcher).__name__}")
+            while True:
+                paths, rescan = watcher.poll(1.0)
+                if rescan:
+                    self.rescan()
+                for p in paths:
+                    self.submit(p)
+        except KeyboardInterrupt:
+            print("Shutting down...")
+            return 0
+        finally:
+            if watcher is not None:
+                watcher.close()
+            # Let running encodes finish; drop jobs that have not started yet.
+            self.scheduler.shutdown()
+            self.ledger.close()
+
+
+def watch_folders(cfg: ConfigManager, factory_name: Optional[str] = None) -> Dict[Path, Tuple[Path, Dict[str, str]]]:
+    """
+    Notify folder -> (factory path, data) for --factory, or for every enabled
+    factory with a NOTIFYDIRECTORY. A folder claimed by several factories is
+    skipped, as the notify service does.
+    """
+    store = FactoryStore.shared(Path(cfg.get("FactoryLocation") or "/opt/FreeFactory/Factories"))
+    if factory_name:
+        rec = store.get(factory_name)
+        if rec is None:
+            raise FileNotFoundError(f"Factory not found: {store.factory_dir / factory_name}")
+        records = [rec]
+    else:
+        records = [r for r in store.load_all() if r.enabled and r.notify_dir]
+
+    claims: Dict[Path, list] = {}
+    for rec in records:
+        if not rec.notify_dir:
+            print(f"[batch] {rec.name}: no NOTIFYDIRECTORY set", file=sys.stderr)
+            continue
+        claims.setdefault(Path(rec.notify_dir).expanduser(), []).append(rec)
+
+    folders: Dict[Path, Tuple[Path, Dict[str, str]]] = {}
+    for folder, recs in claims.items():
+        if len(recs) > 1:
+            names = ", ".join(r.name for r in recs)
+            print(f"[batch] Multiple factories match notify path: {folder} ({names}); skipped", file=sys.stderr)
+            continue
+        folders[folder] = (recs[0].path, dict(recs[0].data))
+    return folders
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="FreeFactory Conversion Service (Python)")
-    parser.add_argument("--factory", help="Factory filename (e.g., MyFactory)")
+    parser.add_argument("--factory", help="Factory filename (e.g., MyFactory); --once/--watch default to all enabled factories")
 
     mode = parser.add_mutually_exclusive_group(required=True)
-    mode.add_argument("--once", action="store_true", help="Process current files and exit")
+    mode.add_argument("--once", action="store_true", help="Process current files in the notify folders and exit (cron catch-up)")
     mode.add_argument("--watch", action="store_true", help="Watch the notify directory and process continuously")
     mode.add_argument("--daemon", action="store_true", help="Run in event-triggered mode (one file, one conversion)")
+    mode.add_argument("--service", action="store_true",
+                      help="Long-lived notify service: read runner events from stdin (or run inotifywait) and convert in-process")
 
     parser.add_argument("--sourcepath", help="Path to directory containing the input file (for daemon mode)")
     parser.add_argument("--filename", help="Name of the file to process (for daemon mode)")
     parser.add_argument("--notify-event", help="Inotify event type (optional)")
 
     parser.add_argument("--max-workers", type=int, default=None, help="Override global concurrency limit")
-    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between scans in watch mode")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between rescans in watch mode when inotify is unavailable")
     args = parser.parse_args(argv)
 
     cfg = ConfigManager()
 
+    if args.service:
+        return run_service(cfg, max_workers=args.max_workers)
+
     if args.daemon:
         # --- Daemon Mode ---
         if not args.sourcepath or not args.filename:
@@ -365,135 +728,52 @@ def main(argv: Optional[List[str]] = None) -> int:
             factory_path = factory_dir / args.factory
             factory_data = read_factory(factory_path)
         else:
-            # Try to auto-discover factory by matching NOTIFYDIRECTORY
-            matches: List[Path] = []
-            for fpath in factory_dir.iterdir():
-                if not fpath.is_file():
-                    continue
-                try:
-                    fdata = read_factory(fpath)
-                    notify = fdata.get("NOTIFYDIRECTORY", "").strip()
-                    if notify:
-                        npath = Path(notify).expanduser().resolve()
-                        print(f"[debug] Checking {fpath.name} -> NOTIFYDIRECTORY={npath} vs source={source_dir}")
-                        if npath.as_posix() == source_dir.as_posix():
-                            matches.append(fpath)
-                except Exception:
-                    continue
+            # Auto-discover the factory by NOTIFYDIRECTORY via the persisted factory index
+            matches = FactoryIndex(factory_dir).lookup(source_dir)
 
             if len(matches) == 0:
                 print(f"ERROR: No factory matches notify path: {source_dir}", file=sys.stderr)
                 return 2
             elif len(matches) > 1:
                 print(f"ERROR: Multiple factories match notify path: {source_dir}", file=sys.stderr)
-                for m in matches:
+                for m, _ in matches:
                     print(f" - {m.name}", file=sys.stderr)
                 return 2
             else:
-                factory_path = matches[0]
-                factory_data = read_factory(factory_path)
+                factory_path, factory_data = matches[0]
                 print(f"[daemon] Matched factory: {factory_path.name}")
 
         if not _as_bool(factory_data.get("ENABLEFACTORY")):
             print(f"[FreeFactoryConversion.py] Factory is DISABLED: {factory_path.name}")
             return 0
 
-    core = FreeFactoryCore(cfg)
-    is_gpu = bool(_which_accel(factory_data))  # '' -> CPU, 'NVENC'/'QSV'/... -> GPU
-    with acquire_concurrency_slot(is_gpu, cfg):
-        #process_file(core, input_file, factory_data)
-        process_file(core, input_file, factory_data, factory_path)
-    return 0
-
-
-    notify_raw = (factory_data.get("NOTIFYDIRECTORY") or "").strip()
-    if not notify_raw:
-        print("This factory has no NOTIFYDIRECTORY set.", file=sys.stderr)
-        return 2
-    notify_dir = Path(notify_raw).expanduser()
-
-    # Determine encoder/accel and pick concurrency
-    accel = _which_accel(factory_data)
-
-    if args.max_workers is not None:
-        max_workers = args.max_workers
-        override_note = " (override via --max-workers)"
-    else:
-        cfg_cpu = cfg.get("MaxConcurrentJobsCPU")
-        cfg_gpu = cfg.get("MaxConcurrentJobsGPU")
-        cfg_legacy = cfg.get("MaxConcurrentJobs")
-
-        if accel:  # GPU path
-            chosen = cfg_gpu or cfg_legacy
-        else:      # CPU path
-            chosen = cfg_cpu or cfg_legacy
-
-        try:
-            max_workers = int(chosen) if chosen else 1
-        except Exception:
-            max_workers = 1
-        override_note = ""
-
-    # Friendly banner lines
-    if accel:
-        print(f"[FreeFactoryConversion.py] Concurrency mode: GPU {max_workers} worker(s) [{accel}]{override_note}")
-    else:
-        print(f"[FreeFactoryConversion.py] Concurrency mode: CPU {max_workers} worker(s){override_note}")
-
-    print(f"[FreeFactoryConversion.py] Factory: {factory_path.name}")
-    print(f"[FreeFactoryConversion.py] Notify dir: {notify_dir}")
-    print(f"[FreeFactoryConversion.py] Max workers: {max_workers}")
-
-    processed: Dict[Path, Sig] = {}
-
-    def cycle_once() -> int:
-        nonlocal processed
-
-        # Drop stale entries
-        for old in list(processed.keys()):
-            if not old.exists():
-                processed.pop(old, None)
-
-        # Build batch for changed/new files
-        batch = []
-        for p in scan_candidates(notify_dir):
-            try:
-                sig = file_sig(p)
-            except FileNotFoundError:
-                continue
-            if processed.get(p) != sig:
-                batch.append((p, sig))
-
-        # Filter out files that might still be "hot" (mtime too recent)
-        batch = [(p, sig) for (p, sig) in batch if is_settled(p)]
-
-        if not batch:
-            return 0
-
-
-        mode_hint = accel if accel else "CPU"
-        print(f"Discovered {len(batch)} file(s). Starting conversions... [{mode_hint}]")
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
-            futures = {pool.submit(process_file, core, f, factory_data): (f, sig) for f, sig in batch}
-            for fut in as_completed(futures):
-                f, sig = futures[fut]
-                try:
-                    in_file, rc = fut.result()
-                except Exception as e:
-                    print(f"[EXC] {f.name}: {e}")
-        return len(batch)
-
-    if args.once:
-        cycle_once()
+        core = FreeFactoryCore(cfg)
+        is_gpu = bool(_which_accel(factory_data))  # '' -> CPU, 'NVENC'/'QSV'/... -> GPU
+        with acquire_concurrency_slot(is_gpu, cfg):
+            process_file(core, input_file, factory_data, factory_path)
         return 0
 
+    # --- Once / Watch Mode ---
+    # --factory limits the run to one factory; otherwise every enabled factory's
+    # notify folder is drained through one scheduler.
     try:
-        while True:
-            cycle_once()
-            time.sleep(args.poll_interval)
-    except KeyboardInterrupt:
-        print("Shutting down...")
-        return 0
+        folders = watch_folders(cfg, args.factory)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    if not folders:
+        print("ERROR: no enabled factory with a NOTIFYDIRECTORY to process", file=sys.stderr)
+        return 2
+
+    runner = WatchRunner(cfg, FreeFactoryCore(cfg), folders, args.max_workers)
+    override_note = " (override via --max-workers)" if args.max_workers else ""
+    print(f"[FreeFactoryConversion.py] Max workers: {runner.max_workers}{override_note}")
+    for folder, (factory_path, factory_data) in sorted(folders.items()):
+        accel = _which_accel(factory_data)
+        cap = runner.caps.get(accel)
+        print(f"[FreeFactoryConversion.py] Factory: {factory_path.name}  Notify dir: {folder}  "
+              f"[{accel or 'CPU'}, cap {cap or 'unlimited'}]")
+    return runner.run(once=args.once, poll_interval=args.poll_interval)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,37 @@
 #!/bin/bash
 # FreeFactoryNotifyRunner.sh
-# Watches drop folders recursively and feeds events to FreeFactoryNotify.sh
-# This is raun from the freefactory-notify.service
+# Watches drop folders recursively and feeds events to the dispatcher selected
+# by FREEFACTORY_NOTIFY_MODE (see below).
+# This is run from the freefactory-notify.service
 
 # FORMAT: 4 fields time|dir|event|file
 # Static runner: reads NotifyFolders from ~/.freefactoryrc
+#
+# Events are piped into one persistent FreeFactoryConversion.py --service
+# process. Set FREEFACTORY_NOTIFY_MODE=legacy to use FreeFactoryNotify.sh
+# instead (one Python process per dropped file).
 
 set -Eeuo pipefail
 
 RC="$HOME/.freefactoryrc"
 NOTIFY_SCRIPT="/opt/FreeFactory/bin/FreeFactoryNotify.sh"
+PYTHON_BIN="${PYTHON_BIN:-/usr/bin/python3}"
+CONVERTER_PY="${CONVERTER_PY:-/opt/FreeFactory/bin/FreeFactoryConversion.py}"
+NOTIFY_MODE="${FREEFACTORY_NOTIFY_MODE:-service}"
 
-if [[ ! -f "$NOTIFY_SCRIPT" ]]; then
-  echo "FreeFactoryNotifyRunner: missing $NOTIFY_SCRIPT" >&2
-  exit 1
+if [[ "$NOTIFY_MODE" == "legacy" ]]; then
+  if [[ ! -f "$NOTIFY_SCRIPT" ]]; then
+    echo "FreeFactoryNotifyRunner: missing $NOTIFY_SCRIPT" >&2
+    exit 1
+  fi
+  DISPATCH=("$NOTIFY_SCRIPT")
+else
+  if [[ ! -f "$CONVERTER_PY" ]]; then
+    echo "FreeFactoryNotifyRunner: missing $CONVERTER_PY" >&2
+    exit 1
+  fi
+  export PYTHONUNBUFFERED=1
+  DISPATCH=("$PYTHON_BIN" "$CONVERTER_PY" --service)
 fi
 
 if [[ ! -f "$RC" ]]; then
@@ -66,4 +84,4 @@ fi
   --exclude '\.kate-swp$' \
   --exclude '\.DS_Store$' \
   "${valid_folders[@]}" \
-| "$NOTIFY_SCRIPT"
+| "${DISPATCH[@]}"
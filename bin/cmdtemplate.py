@@ -0,0 +1,75 @@
+# cmdtemplate.py
+#
+# Compiled ffmpeg command templates.
+#
+# Between two files run through the same factory only the input path and the
+# names derived from it (output stem, {stem} in MANUALOPTIONSOUTPUT) change.
+# FreeFactoryCore builds the command once against a sentinel input path and
+# keeps the resulting argv as a template; rendering it for a real file is a
+# couple of string replacements on the few tokens that mention the sentinel.
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, List, Tuple
+
+# Unlikely to appear in a factory; the input "file" is /<INPUT>/<STEM>.ffin
+STEM_SENTINEL = "@@FFSTEM-5e1c@@"
+INPUT_SENTINEL = f"/@@FFINPUT-5e1c@@/{STEM_SENTINEL}.ffin"
+
+TEMPLATE_CACHE_SIZE = 64
+
+
+class CommandTemplate:
+    """argv with placeholder slots for the input path and its stem."""
+
+    __slots__ = ("tokens", "slots")
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = [str(t) for t in tokens]
+        # only tokens that mention the sentinel need work at render time
+        self.slots: Tuple[int, ...] = tuple(i for i, t in enumerate(self.tokens) if STEM_SENTINEL in t)
+
+    def render(self, input_path) -> List[str]:
+        cmd = list(self.tokens)
+        input_str = str(input_path)
+        stem = Path(input_str).stem
+        for i in self.slots:
+            cmd[i] = cmd[i].replace(INPUT_SENTINEL, input_str).replace(STEM_SENTINEL, stem)
+        return cmd
+
+
+def factory_key(factory_data, preview: bool) -> Hashable:
+    """Content key for a factory dict: any edit to the factory yields a new key."""
+    return (bool(preview), tuple(sorted((k, str(v)) for k, v in factory_data.items())))
+
+
+class TemplateCache:
+    """Small LRU of compiled templates keyed by factory content."""
+
+    def __init__(self, size: int = TEMPLATE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()  # the conversion service renders from worker threads
+        self._items: "OrderedDict[Hashable, CommandTemplate]" = OrderedDict()
+
+    def get_or_compile(self, key: Hashable, compile_fn: Callable[[], List[str]]) -> CommandTemplate:
+        with self._lock:
+            tpl = self._items.get(key)
+            if tpl is not None:
+                self._items.move_to_end(key)
+                return tpl
+        tpl = CommandTemplate(compile_fn())
+        with self._lock:
+            self._items[key] = tpl
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return tpl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -17,10 +17,18 @@ class ConfigManager:
             "MaxConcurrentJobsCPU": "1",
             "MaxConcurrentJobsGPU": "1",
             "MaxConcurrentJobs": "0", # 0 = unlimited
+            # --once/--watch per-accelerator caps; 0 = MaxConcurrentJobsGPU
+            "MaxConcurrentJobsNVENC": "0",
+            "MaxConcurrentJobsCUDA": "0",
+            "MaxConcurrentJobsQSV": "0",
+            "MaxConcurrentJobsVAAPI": "0",
+            "MaxConcurrentJobsAMF": "0",
             "AppleDelaySeconds": "30",
             "PathtoFFmpegGlobal": "/usr/bin/",
             "NotifyFolders": "/video/dropbox",
             "HelpFontSize": "10",
+            "LoudnormCacheHash": "False",  # also match cached loudnorm passes by file content
+            "MediaProbeCacheSize": "5000",  # ffprobe results kept in ~/.freefactory/cache
         }
         self.load()
 
@@ -29,112 +29,17 @@ import os
 import subprocess
 import shlex
 from pathlib import Path
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
 import re, shutil
 
-
-
-#=======For Drop Queue
-class FFmpegWorker(QThread):
-    result = pyqtSignal(int, str, str)  # returncode, stdout, stderr
-
-    def __init__(self, cmd, report_path=None):
-        super().__init__()
-        self.cmd = cmd
-        self.report_path = report_path
-        self.error = None
-
-    def run(self):
-        process = subprocess.run(self.cmd, capture_output=True, text=True)
-
-        if self.report_path:
-            try:
-                report_text = ""
-                if process.stdout:
-                    report_text += process.stdout
-                if process.stderr:
-                    report_text += process.stderr
-
-                Path(self.report_path).write_text(report_text, encoding="utf-8")
-            except Exception as e:
-                process.stderr += f"\n⚠️ Could not write report file: {e}\n"
-
-        self.result.emit(process.returncode, process.stdout, process.stderr)
-
-
-#=======For Drop Zone (Main Tab FFmpegWorkerZone)
-class FFmpegWorkerZone(QObject):
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-
-    def __init__(self, cmd, report_path=None):
-        super().__init__()
-        self.cmd = cmd
-        self.report_path = report_path
-
-    def run(self):
-        try:
-            process = subprocess.run(self.cmd, capture_output=True, text=True)
-
-            if self.report_path:
-                try:
-                    report_text = ""
-                    if process.stdout:
-                        report_text += process.stdout
-                    if process.stderr:
-                        report_text += process.stderr
-
-                    Path(self.report_path).write_text(report_text, encoding="utf-8")
-                except Exception as e:
-                    process.stderr += f"\n⚠️ Could not write report file: {e}\n"
-
-            if process.returncode == 0:
-                if self.report_path:
-                    self.finished.emit(f"✅ Analysis complete.\n📄 Report saved: {self.report_path}")
-                else:
-                    self.finished.emit("✅ Conversion complete.")
-            else:
-                self.error.emit(f"❌ Error:\n{process.stderr}")
-
-        except Exception as e:
-            self.error.emit(f"⚠️ Exception: {str(e)}")
-            
-#========StreamWorker for Streaming Tab
-class StreamWorker(QThread):
-    output = pyqtSignal(str)
-    finished = pyqtSignal()
-    error = pyqtSignal(str)
-
-    def __init__(self, cmd):
-        super().__init__()
-        self.cmd = cmd
-        self.process = None
-        self._stop_requested = False
-
-    def run(self):
-        try:
-            self.process = subprocess.Popen(
-                self.cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
-            )
-
-            for line in self.process.stdout:
-                if self._stop_requested:
-                    break
-                self.output.emit(line.strip())
-
-            self.process.wait()
-            self.finished.emit()
-        except Exception as e:
-            self.error.emit(str(e))
-
-    def stop(self):
-        self._stop_requested = True
-        if self.process:
-            self.process.terminate()
+from ffanalysis import (
+    AnalysisSession, LoudnormParser, build_analysis_command, detector_filter, run_analysis, split_types,
+)
+from loudnormcache import LoudnormCache
+from mediaprobe import MediaProbe
+import smartcopy
+import hwpipeline
+from factorystore import FactoryStore, parse_factory_lines
+from cmdtemplate import INPUT_SENTINEL, TemplateCache, factory_key
 
 
 class FreeFactoryCore:
@@ -145,33 +50,33 @@ class FreeFactoryCore:
         self.active_factory = None
         self.output_directory = Path.home() / "FreeFactory-Output"
         self.command_line = ""
+        self.last_analysis = None  # structured report from the most recent first pass
+        self.command_templates = TemplateCache()
+        self.loudnorm_cache = LoudnormCache(
+            hash_content=self._truthy(config.get("LoudnormCacheHash", "False"))
+        )
+        self.media_probe = MediaProbe.shared(config)
 
         self.init_variables()
         
         
     def parse_factory_file(self, lines):
-        data = {}
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" in line:
-                key, value = line.split("=", 1)
-                data[key.strip().upper()] = value.strip()
-        return data    
+        return parse_factory_lines(lines)
 
     def init_variables(self):
         self.factory_dir.mkdir(parents=True, exist_ok=True)
         self.output_directory.mkdir(exist_ok=True)
-        self.factory_files = list(self.factory_dir.glob("*"))
+        self.store = FactoryStore.shared(self.factory_dir)
+        self.reload_factory_files()
        
     def reload_factory_files(self):
-            self.factory_files = list(self.factory_dir.glob("*"))        
+        self.factory_files = [rec.path for rec in self.store.load_all()]
 
     def save_factory_file(self, filename, content):
         path = self.factory_dir / filename
         with open(path, "w") as f:
             f.write(content)
+        self.store.invalidate(filename)
         if path not in self.factory_files:
             self.factory_files.append(path)
 
@@ -179,7 +84,9 @@ class FreeFactoryCore:
         path = self.factory_dir / filename
         if path.exists():
             path.unlink()
-            self.factory_files.remove(path)
+            self.store.invalidate(filename)
+            if path in self.factory_files:
+                self.factory_files.remove(path)
         
         
     def view_command_line(self, input_file, options):
@@ -210,17 +117,9 @@ class FreeFactoryCore:
             return None
 
         try:
-            with open(factory_path, "r") as f:
-                lines = f.readlines()
-
-            factory_data = {}
-            for line in lines:
-                if "=" in line:
-                    key, value = line.strip().split("=", 1)
-                    factory_data[key.strip().upper()] = value.strip()
-                #else:
-                #    print(f"[DEBUG] Skipping invalid line (no '='): {line.strip()}")
-
+            # Parsed once per (mtime, size) in the shared FactoryStore; callers get a copy.
+            factory_path = Path(factory_path)
+            factory_data = FactoryStore.shared(factory_path.parent).load(factory_path.name)
             #print(f"[DEBUG] Loaded factory: {factory_data}")
             return factory_data
         except Exception as e:
@@ -240,8 +139,8 @@ class FreeFactoryCore:
         show_audio_report = self._truthy(factory_data.get("SHOWAUDIOANALYSISREPORT", "False"))
         show_video_report = self._truthy(factory_data.get("SHOWVIDEOANALYSISREPORT", "False"))
 
-        audio_analysis = (factory_data.get("AUDIOANALYSISTYPE") or "").strip().lower()
-        video_analysis = (factory_data.get("VIDEOANALYSISTYPE") or "").strip().lower()
+        audio_analysis = "_".join(split_types(factory_data.get("AUDIOANALYSISTYPE")))
+        video_analysis = "_".join(split_types(factory_data.get("VIDEOANALYSISTYPE")))
 
         if analyze_audio and show_audio_report:
             suffix = audio_analysis or "audio"
@@ -253,6 +152,78 @@ class FreeFactoryCore:
 
         return None        
 
+    def analysis_detectors(self, factory_data, report_only=True):
+        """
+        [(detector, filter), ...] requested by the factory. AUDIOANALYSISTYPE and
+        VIDEOANALYSISTYPE may list several detectors separated by commas; all of
+        them run in one decode (see ffanalysis). report_only=True returns only
+        the kinds whose Show Report box is ticked.
+        """
+        af = (factory_data.get("AUDIOFILTERS") or "").strip()
+        vf = (factory_data.get("VIDEOFILTERS") or "").strip()
+        detectors = []
+
+        if self._truthy(factory_data.get("ANALYZEAUDIO", "False")) and (
+            not report_only or self._truthy(factory_data.get("SHOWAUDIOANALYSISREPORT", "False"))
+        ):
+            for name in split_types(factory_data.get("AUDIOANALYSISTYPE")):
+                if name == "loudnorm" and af:
+                    if not af.startswith("loudnorm"):
+                        raise ValueError(
+                            "Audio loudnorm analysis requires AUDIOFILTERS to contain a loudnorm filter."
+                        )
+                    if "," in af:
+                        raise ValueError(
+                            "Loudnorm report mode currently supports only one audio filter."
+                        )
+                detectors.append((name, detector_filter(name, af)))
+
+        if self._truthy(factory_data.get("ANALYZEVIDEO", "False")) and (
+            not report_only or self._truthy(factory_data.get("SHOWVIDEOANALYSISREPORT", "False"))
+        ):
+            for name in split_types(factory_data.get("VIDEOANALYSISTYPE")):
+                detectors.append((name, detector_filter(name, vf)))
+
+        return detectors
+
+    def analysis_session(self, input_path, factory_data):
+        """Parsers for the report-mode command built by build_ffmpeg_command, or None."""
+        detectors = self.analysis_detectors(factory_data)
+        if not detectors:
+            return None
+        report_path = self.get_analysis_report_path(input_path, factory_data)
+        json_path = Path(report_path).with_suffix(".json") if report_path else None
+        return AnalysisSession(input_path, detectors, json_path=json_path)
+
+    def probe_media(self, input_path):
+        """Typed ffprobe result (mediaprobe.MediaInfo) for input_path, or None."""
+        return self.media_probe.probe(input_path)
+
+    def smart_copy_factory(self, input_path, factory_data, announce=True):
+        """
+        With SMARTCOPY=True, the factory with VIDEOCODECS/AUDIOCODECS switched to
+        copy for streams the probed input already delivers (see smartcopy).
+        """
+        if not self._truthy(factory_data.get("SMARTCOPY", "False")):
+            return factory_data
+        factory_data, notes = smartcopy.apply(factory_data, self.probe_media(input_path))
+        if announce and notes:
+            print(f"[SMARTCOPY] {Path(input_path).name}: {'; '.join(notes)}")
+        return factory_data
+
+    def hw_pipeline_factory(self, input_path, factory_data, announce=True):
+        """
+        With HWDECODE=True, the factory rewritten for the GPU decode/scale path
+        that matches its encoder family, or unchanged when the probed input
+        needs a software decode (see hwpipeline).
+        """
+        if not self._truthy(factory_data.get("HWDECODE", "False")):
+            return factory_data
+        hw = hwpipeline.plan(factory_data, self.probe_media(input_path), self.which_accel(factory_data))
+        if announce:
+            print(f"[HWDECODE] {Path(input_path).name}: {hw.describe()}")
+        return hwpipeline.apply(factory_data, hw)
+
 # Multi-Outputs Helpers
     @staticmethod
     def _expand_multioutput_tokens(mo: str, input_path: str, output_dir: str) -> str:
@@ -266,6 +237,23 @@ class FreeFactoryCore:
             outdir_str += _os.sep
         return (mo or "").replace("{stem}", stem).replace("{outdir}", outdir_str)
 
+    @staticmethod
+    def which_accel(factory: dict) -> str:
+        """
+        Return accelerator tag for concurrency gating:
+          "" (CPU), "NVENC", "Intel QSV", "VAAPI", "AMD AMF", "CUDA"
+        Uses VIDEOCODECS only.
+        """
+        vc = (factory.get("VIDEOCODECS") or "").strip().lower()
+        # tolerate comma/space separated values
+        s = " ".join(vc.replace(",", " ").split())
+        if "nvenc" in s:   return "NVENC"
+        if "qsv"   in s:   return "Intel QSV"
+        if "vaapi" in s:   return "VAAPI"
+        if "amf"   in s:   return "AMD AMF"
+        if "cuda"  in s:   return "CUDA"
+        return ""  # CPU
+
     @staticmethod
     def _truthy(v) -> bool:
         return str(v).strip().lower() in {"1", "true", "yes", "on"}
@@ -276,24 +264,16 @@ class FreeFactoryCore:
     def _extract_loudnorm_json(text: str) -> dict | None:
         """
         Extract the JSON object printed by FFmpeg's loudnorm filter.
-        FFmpeg writes loudnorm output to stderr.
+        FFmpeg writes loudnorm output to stderr. Same line parser as the
+        analysis pass (ffanalysis.LoudnormParser): last block wins.
         """
-        import json
-        import re
-
         if not text:
             return None
 
-        matches = re.findall(r"\{[\s\S]*?\}", text)
-        for block in reversed(matches):
-            try:
-                data = json.loads(block)
-                if "input_i" in data and "input_tp" in data:
-                    return data
-            except Exception:
-                pass
-
-        return None
+        parser = LoudnormParser()
+        for line in text.splitlines():
+            parser.feed(line)
+        return parser.measured
 
 
     @staticmethod
@@ -353,55 +333,68 @@ class FreeFactoryCore:
 # END Build LoudNorm Second Pass
 
 # Run the LoudNorm Analysis
-    def _run_loudnorm_analysis(self, input_path, original_filter):
+    def _run_loudnorm_analysis(self, input_path, original_filter, extra_detectors=(), json_path=None):
         """
-        Run a temporary first-pass loudnorm analysis and return the parsed JSON.
+        Run the first-pass loudnorm analysis and return the parsed JSON.
+        Any extra (detector, filter) pairs ride along in the same decode and
+        end up in the structured report at json_path.
         """
+        analysis_filter = detector_filter("loudnorm", original_filter)
+        extra_detectors = [d for d in extra_detectors if d[0] != "loudnorm"]
 
-        import subprocess
-
-        analysis_filter = original_filter
+        # Same audio + same loudnorm options = same measurements (loudnormcache).
+        if not extra_detectors:
+            measured = self.loudnorm_cache.get(input_path, analysis_filter)
+            if measured:
+                print(f"[LOUDNORM ANALYSIS] Using cached first pass for {Path(input_path).name}")
+                return measured
 
-        if "print_format=" not in analysis_filter:
-            analysis_filter += ":print_format=json"
-
-        cmd = [
-            "ffmpeg",
-            "-hide_banner",
-            "-y",
-            "-i", str(input_path),
-            "-vn",
-            "-af", analysis_filter,
-            "-f", "null",
-            "-"
-        ]
-
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
-
-        stderr_text = process.stderr or ""
-
-        measured = self._extract_loudnorm_json(stderr_text)
+        detectors = [("loudnorm", analysis_filter)] + extra_detectors
+        session = run_analysis(input_path, detectors, json_path=json_path)
+        self.last_analysis = session.report(0)
 
+        measured = session.loudnorm()
         if not measured:
             raise RuntimeError(
                 "Could not extract loudnorm analysis JSON from FFmpeg output."
             )
+        self.loudnorm_cache.put(input_path, analysis_filter, measured)
         return measured
 
-        print(
-            f"[LOUDNORM RENDER] "
-            f"Applying correction: "
-            f"{input_i} LUFS -> {target_i} LUFS"
-        )
 # END Run the LoudNorm Analysis
     
 
 # This builds the ffmpeg command via cmd. 
     def build_ffmpeg_command(self, input_path, factory_data, preview=False):
+        """
+        ffmpeg argv for input_path. The factory part of the command is compiled
+        once into a CommandTemplate (cmdtemplate) and reused for every file; a
+        changed factory has a different content key, so it compiles afresh.
+        Factories that need a per-file first pass are built in full each time.
+        """
+        if not preview:
+            factory_data = self.smart_copy_factory(input_path, factory_data)
+            factory_data = self.hw_pipeline_factory(input_path, factory_data)
+        if self._needs_loudnorm_pass(factory_data, preview):
+            return self._build_ffmpeg_command_full(input_path, factory_data, preview)
+        template = self.command_templates.get_or_compile(
+            factory_key(factory_data, preview),
+            lambda: self._build_ffmpeg_command_full(INPUT_SENTINEL, factory_data, preview),
+        )
+        return template.render(input_path)
+
+    def _needs_loudnorm_pass(self, factory_data, preview=False) -> bool:
+        """Same condition as the Automatic Loudnorm Pass in _build_ffmpeg_command_full."""
+        af = (factory_data.get("AUDIOFILTERS") or "").strip()
+        return (
+            not preview
+            and self._truthy(factory_data.get("ANALYZEAUDIO", "False"))
+            and not self._truthy(factory_data.get("SHOWAUDIOANALYSISREPORT", "False"))
+            and (factory_data.get("AUDIOANALYSISTYPE") or "").strip().lower() == "loudnorm"
+            and af.startswith("loudnorm")
+        )
+
+    def _build_ffmpeg_command_full(self, input_path, factory_data, preview=False):
         import shlex
         from pathlib import Path
         fac = factory_data
@@ -483,10 +476,7 @@ class FreeFactoryCore:
         #A/V Analysis
         analyze_audio       = self._truthy(factory_data.get("ANALYZEAUDIO", "False"))
         audio_analysis      = (factory_data.get("AUDIOANALYSISTYPE") or "").strip().lower()
-        analyze_video       = self._truthy(factory_data.get("ANALYZEVIDEO", "False"))
-        video_analysis      = (factory_data.get("VIDEOANALYSISTYPE") or "").strip().lower()
         show_audio_report   = self._truthy(factory_data.get("SHOWAUDIOANALYSISREPORT", "False"))
-        show_video_report   = self._truthy(factory_data.get("SHOWVIDEOANALYSISREPORT", "False"))
         
         disablevideo        = (factory_data.get("DISABLEVIDEO")  or "").strip()
         disableaudio        = (factory_data.get("DISABLEAUDIO")  or "").strip()
@@ -537,97 +527,12 @@ class FreeFactoryCore:
         # Report mode may temporarily modify filter strings for command generation,
         # but it must never write those changes back to factory_data or the UI.
 
-        # Audio Reports
-        if analyze_audio and show_audio_report:
-            if audio_analysis == "loudnorm":
-                analysis_filter = af or "loudnorm=I=-24:LRA=7:TP=-2"
-
-                if not analysis_filter.startswith("loudnorm"):
-                    raise ValueError(
-                        "Audio loudnorm analysis requires AUDIOFILTERS to contain a loudnorm filter."
-                    )
-
-                if "," in analysis_filter:
-                    raise ValueError(
-                        "Loudnorm report mode currently supports only one audio filter."
-                    )
-
-                if "print_format=" not in analysis_filter:
-                    analysis_filter += ":print_format=json"
-
-                cmd += [
-                    "-vn",
-                    "-af", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-            elif audio_analysis == "volumedetect":
-                cmd += [
-                    "-vn",
-                    "-af", "volumedetect",
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-        # Video Reports
-        if analyze_video and show_video_report:
-            if video_analysis == "blackdetect":
-                analysis_filter = vf or "blackdetect=d=2:pix_th=0.10"
-
-                cmd += [
-                    "-an",
-                    "-vf", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-            elif video_analysis == "blackframe":
-                analysis_filter = vf or "blackframe"
-
-                cmd += [
-                    "-an",
-                    "-vf", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-            elif video_analysis == "freezedetect":
-                analysis_filter = vf or "freezedetect=n=-60dB:d=2"
-
-                cmd += [
-                    "-an",
-                    "-vf", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-            elif video_analysis == "idet":
-                analysis_filter = vf or "idet"
-
-                cmd += [
-                    "-an",
-                    "-vf", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
-
-            elif video_analysis == "signalstats":
-                analysis_filter = vf or "signalstats"
-
-                cmd += [
-                    "-an",
-                    "-vf", analysis_filter,
-                    "-f", "null",
-                    "-"
-                ]
-                return cmd
+        # All requested detectors share a single decode (ffanalysis).
+        detectors = self.analysis_detectors(factory_data)
+        if detectors:
+            return build_analysis_command(
+                input_path, detectors, shlex.split(manual_input) if manual_input else ()
+            )
         # End A/V Analysis Reports
 
 
@@ -841,7 +746,12 @@ class FreeFactoryCore:
             and af.startswith("loudnorm")
         ):
             if not preview:
-                measured = self._run_loudnorm_analysis(input_path, af)
+                # Other detectors enabled on this factory (e.g. video QC) are
+                # measured in the same decode as the loudnorm first pass.
+                extra_qc = [d for d in self.analysis_detectors(factory_data, report_only=False)
+                            if d[0] != "loudnorm"]
+                json_path = (Path(output_dir) / f"{input_stem}_analysis_report.json") if extra_qc else None
+                measured = self._run_loudnorm_analysis(input_path, af, extra_qc, json_path)
                 target_i = float(self._parse_loudnorm_targets(af)["I"])
                 input_i = float(measured["input_i"])
 
@@ -1123,6 +1033,78 @@ class FreeFactoryCore:
 
         return cmd
 
+    # ============================
+    #      Fan-out Streaming (tee)
+    # ============================
+    #
+    # Rows that share inputs and factory are encoded once. The encode writes
+    # MPEG-TS over loopback UDP through the tee muxer (one slave per
+    # destination, onfail=ignore) and a small "-c copy" relay per destination
+    # pushes that to the real endpoint. Stopping or restarting a relay never
+    # touches the encoder or the other destinations; a restarted relay simply
+    # picks the stream up again from its UDP port.
+
+    @staticmethod
+    def allocate_relay_url() -> str:
+        """Loopback UDP URL on a currently free port."""
+        import socket
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        return f"udp://127.0.0.1:{port}?pkt_size=1316"
+
+    @staticmethod
+    def _guess_stream_format(output_url: str) -> str:
+        scheme = (output_url.split("://", 1)[0] if "://" in output_url else "").lower()
+        if scheme in ("rtmp", "rtmps", "rtmpt", "rtmpe"):
+            return "flv"
+        if scheme in ("srt", "udp", "rtp"):
+            return "mpegts"
+        return ""
+
+    def build_fanout_command(self, factory_data: dict, *, relay_urls: list, **inputs) -> list[str]:
+        """
+        One streaming encode feeding every relay URL through -f tee.
+        inputs are the build_streaming_command keywords (video_input, ...).
+        """
+        if not relay_urls:
+            raise ValueError("Fan-out needs at least one destination.")
+        cmd = self.build_streaming_command(factory_data, output_url=relay_urls[0], **inputs)
+
+        # Replace "[-f FORCEFORMAT] <url>" with the tee muxer
+        cmd = cmd[:-1]
+        if len(cmd) >= 2 and cmd[-2] == "-f":
+            cmd = cmd[:-2]
+
+        # tee has no default codecs, so nothing is auto-selected without -map
+        if "-map" not in cmd:
+            num_inputs = sum(1 for t in cmd if t == "-i")
+            if num_inputs >= 2:
+                cmd += ["-map", "0:v:0", "-map", "1:a:0"]
+            else:
+                cmd += ["-map", "0:v:0?", "-map", "0:a:0?"]
+
+        slaves = "|".join(f"[f=mpegts:onfail=ignore]{url}" for url in relay_urls)
+        return cmd + ["-f", "tee", slaves]
+
+    def build_relay_command(self, factory_data: dict, relay_url: str, output_url: str) -> list[str]:
+        """Copy the fan-out stream from relay_url to one destination."""
+        if not output_url:
+            raise ValueError("Missing output_url for streaming command.")
+        force_format = (factory_data.get("FORCEFORMAT", "") or "").strip()
+        fmt = force_format or self._guess_stream_format(output_url)
+
+        cmd = [
+            "ffmpeg", "-hide_banner", "-y",
+            "-f", "mpegts",
+            "-i", f"{relay_url}&fifo_size=1000000&overrun_nonfatal=1",
+            "-map", "0", "-c", "copy",
+        ]
+        if fmt:
+            cmd += ["-f", fmt]
+        cmd.append(output_url)
+        return cmd
+
 
 
     # ============================
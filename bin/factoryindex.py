@@ -0,0 +1,146 @@
+# factoryindex.py
+#
+# Persistent NOTIFYDIRECTORY -> factory index for FreeFactoryConversion.py.
+#
+# Daemon/service dispatch used to read and parse every factory file to find the
+# one watching a drop folder. The index keeps the parsed factories on disk
+# (~/.freefactory/cache/factory_index.json) with each file's mtime/size and
+# primes the shared FactoryStore from it, so a fresh --daemon process only
+# stats the factory directory and re-parses the files that actually changed.
+# The notify map is rebuilt (and the file rewritten) only when the store hands
+# back a different set of records.
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+from factorystore import FactoryRecord, FactoryStore
+from ffstate import cache_dir
+
+INDEX_VERSION = 2
+
+
+def _notify_key(notify: str) -> str:
+    if not notify:
+        return ""
+    try:
+        return Path(notify).expanduser().resolve().as_posix()
+    except Exception:
+        return ""
+
+
+class FactoryIndex:
+    """
+    Notify-dir lookup table over the shared FactoryStore for factory_dir,
+    persisted across processes.
+
+    `recheck_sec` throttles directory re-stats for long-lived callers (the
+    service); one-shot --daemon runs construct a fresh index and pay a single
+    scandir against the persisted state.
+    """
+
+    def __init__(self, factory_dir: Path, recheck_sec: float = 0.0, store: Optional[FactoryStore] = None,
+                 index_path: Optional[Path] = None):
+        self.factory_dir = Path(factory_dir)
+        self.store = store or FactoryStore.shared(self.factory_dir)
+        self.index_path = index_path or (cache_dir() / "factory_index.json")
+        self.recheck_sec = recheck_sec
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._records: Dict[str, FactoryRecord] = {}
+        self._by_notify: Dict[str, List[str]] = {}
+        self._saved: Dict[str, Tuple[int, int]] = {}  # name -> (mtime_ns, size) as on disk
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> None:
+        try:
+            raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if raw.get("version") != INDEX_VERSION or raw.get("factory_dir") != self.factory_dir.as_posix():
+            return
+        records = []
+        for name, entry in (raw.get("files") or {}).items():
+            try:
+                records.append(FactoryRecord(name, self.factory_dir / name, int(entry["mtime_ns"]),
+                                             int(entry["size"]), MappingProxyType(dict(entry["data"]))))
+            except (KeyError, TypeError, ValueError):
+                continue
+        # the store re-stats each file and only re-parses those whose mtime/size moved
+        self.store.prime(records)
+        self._saved = {rec.name: (rec.mtime_ns, rec.size) for rec in records}
+
+    def _save(self) -> None:
+        payload = {
+            "version": INDEX_VERSION,
+            "factory_dir": self.factory_dir.as_posix(),
+            "files": {name: {"mtime_ns": rec.mtime_ns, "size": rec.size, "data": dict(rec.data)}
+                      for name, rec in self._records.items()},
+        }
+        tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, self.index_path)  # atomic; concurrent writers just race to the same content
+            self._saved = {name: (rec.mtime_ns, rec.size) for name, rec in self._records.items()}
+        except Exception:
+            try:
+                tmp.unlink()
+            except Exception:
+                pass
+
+    def _rebuild_notify_map(self) -> None:
+        table: Dict[str, List[str]] = {}
+        for name, rec in self._records.items():
+            key = _notify_key(rec.notify_dir)
+            if key:
+                table.setdefault(key, []).append(name)
+        for names in table.values():
+            names.sort()
+        self._by_notify = table
+
+    # ---------- validation ----------
+    def refresh(self, force: bool = False) -> bool:
+        """Re-validate the store; rebuild and persist the notify map if any factory changed. True if so."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and (now - self._checked_at) < self.recheck_sec:
+                return False
+            self._checked_at = now
+
+        records = {rec.name: rec for rec in self.store.load_all()}
+        with self._lock:
+            # the store returns the same record object until the file changes
+            if records.keys() == self._records.keys() and all(
+                rec is self._records[name] for name, rec in records.items()
+            ):
+                return False
+            self._records = records
+            self._rebuild_notify_map()
+            # a fresh process primed from the file only rewrites it when a factory moved
+            if {name: (rec.mtime_ns, rec.size) for name, rec in records.items()} != self._saved:
+                self._save()
+            return True
+
+    # ---------- queries ----------
+    def lookup(self, source_dir: Path) -> List[Tuple[Path, Dict[str, str]]]:
+        """All factories whose NOTIFYDIRECTORY resolves to source_dir."""
+        self.refresh()
+        key = Path(source_dir).expanduser().resolve().as_posix()
+        with self._lock:
+            return [(self._records[name].path, dict(self._records[name].data))
+                    for name in self._by_notify.get(key, [])]
+
+    def get(self, name: str) -> Optional[Dict[str, str]]:
+        return self.store.load(name)
+
+    def notify_dirs(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return sorted(self._by_notify)
@@ -0,0 +1,157 @@
+# factorystore.py
+#
+# One parser and one in-process cache for factory files.
+#
+# Factories are small KEY=VALUE text files that every part of FreeFactory
+# reads (GUI lists and loaders, the streaming selector, FactoryTools, the
+# conversion service). FactoryStore parses each file once into an immutable
+# FactoryRecord and hands the same record back until the file's mtime or size
+# changes, so per-file loops no longer re-open and re-parse the factory.
+#
+#   store = FactoryStore.shared("/opt/FreeFactory/Factories")
+#   rec = store.get("MyFactory")         # FactoryRecord or None
+#   for rec in store.load_all(): ...     # every factory, sorted by name
+
+from __future__ import annotations
+
+import os
+import stat
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional
+
+
+def parse_factory_lines(lines) -> Dict[str, str]:
+    """KEY=VALUE parser for factory files (blank/# lines skipped, keys upper-cased)."""
+    data: Dict[str, str] = {}
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        k, v = line.split("=", 1)
+        data[k.strip().upper()] = v.strip()
+    return data
+
+
+class FactoryRecord(NamedTuple):
+    name: str
+    path: Path
+    mtime_ns: int
+    size: int
+    data: Mapping[str, str]  # read-only; use dict(rec.data) for a working copy
+
+    def get(self, key: str, default: str = "") -> str:
+        return self.data.get(key, default)
+
+    @property
+    def enabled(self) -> bool:
+        return str(self.data.get("ENABLEFACTORY", "")).strip().lower() in ("1", "true", "yes")
+
+    @property
+    def notify_dir(self) -> str:
+        return (self.data.get("NOTIFYDIRECTORY") or "").strip()
+
+    @property
+    def stream_mode(self) -> str:
+        return (self.data.get("STREAMMGRMODE") or "").strip().upper()
+
+
+class FactoryStore:
+    """Parsed factories for one directory, re-validated by (mtime_ns, size) on access."""
+
+    _shared: Dict[str, "FactoryStore"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, factory_dir):
+        self.factory_dir = Path(factory_dir)
+        self._lock = threading.Lock()
+        self._records: Dict[str, FactoryRecord] = {}
+
+    @classmethod
+    def shared(cls, factory_dir) -> "FactoryStore":
+        """Process-wide store for factory_dir (core, GUI and service share the cache)."""
+        key = Path(factory_dir).expanduser().as_posix()
+        with cls._shared_lock:
+            store = cls._shared.get(key)
+            if store is None:
+                store = cls._shared[key] = cls(Path(factory_dir).expanduser())
+            return store
+
+    def _load(self, name: str, st: os.stat_result) -> Optional[FactoryRecord]:
+        with self._lock:
+            rec = self._records.get(name)
+            if rec and rec.mtime_ns == st.st_mtime_ns and rec.size == st.st_size:
+                return rec
+        path = self.factory_dir / name
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                data = parse_factory_lines(f)
+        except OSError:
+            return None
+        rec = FactoryRecord(name, path, st.st_mtime_ns, st.st_size, MappingProxyType(data))
+        with self._lock:
+            self._records[name] = rec
+        return rec
+
+    def get(self, name) -> Optional[FactoryRecord]:
+        """Record for one factory (file name or path inside factory_dir), or None."""
+        name = Path(name).name
+        try:
+            st = os.stat(self.factory_dir / name)
+        except OSError:
+            self.invalidate(name)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return self._load(name, st)
+
+    def load(self, name) -> Optional[Dict[str, str]]:
+        """Mutable copy of a factory's KEY=VALUE data, or None."""
+        rec = self.get(name)
+        return dict(rec.data) if rec else None
+
+    def load_all(self) -> List[FactoryRecord]:
+        """Every factory in the directory, sorted case-insensitively by name."""
+        records = []
+        seen = set()
+        try:
+            it = os.scandir(self.factory_dir)
+        except OSError:
+            it = None
+        if it is not None:
+            with it:
+                for entry in it:
+                    if entry.name.startswith("."):  # same as glob("*")
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    rec = self._load(entry.name, st)
+                    if rec is not None:
+                        records.append(rec)
+                        seen.add(entry.name)
+        with self._lock:
+            for name in [n for n in self._records if n not in seen]:
+                del self._records[name]
+        records.sort(key=lambda r: r.name.lower())
+        return records
+
+    def prime(self, records) -> None:
+        """Seed the cache with records parsed elsewhere (e.g. a persisted index); still re-validated on access."""
+        with self._lock:
+            for rec in records:
+                self._records.setdefault(rec.name, rec)
+
+    def names(self) -> List[str]:
+        return [r.name for r in self.load_all()]
+
+    def invalidate(self, name=None) -> None:
+        with self._lock:
+            if name is None:
+                self._records.clear()
+            else:
+                self._records.pop(Path(name).name, None)
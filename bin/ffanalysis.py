@@ -0,0 +1,515 @@
+# ffanalysis.py
+#
+# Single-pass A/V analysis for FreeFactory.
+#
+# Every requested detector (loudnorm, volumedetect, ebur128, silencedetect,
+# blackdetect, blackframe, freezedetect, idet, signalstats) is attached to one
+# filter graph: audio
+# detectors hang off an asplit of the first audio stream, video detectors off a
+# split of the first video stream, and all branches go to the null muxer. The
+# input is decoded once no matter how many detectors run.
+#
+# ffmpeg's log is fed line by line through one small parser per detector, so
+# the structured report is built while the job runs and nothing holds the full
+# log in memory. The loudnorm measurements in that report are what
+# FreeFactoryCore uses for the second (render) pass.
+#
+# Detectors are registered with @register_detector(name, kind, default_filter)
+# on their parser class; DETECTORS and PARSERS are filled from that. Parsers
+# keep typed events (Interval, LoudnessSummary) and hand each one to an
+# optional listener as soon as it is parsed.
+
+from __future__ import annotations
+
+import inspect
+import json
+import re
+import subprocess
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# name -> (media kind, default filter when the factory doesn't supply one)
+DETECTORS: Dict[str, Tuple[str, str]] = {}
+# name -> parser class
+PARSERS: Dict[str, type] = {}
+
+MAX_EVENTS = 1000  # per detector; per-frame detectors only keep the first N events
+
+
+def split_types(value) -> List[str]:
+    """'loudnorm, volumedetect' -> ['loudnorm', 'volumedetect'] (unknown names dropped)."""
+    names = []
+    for part in str(value or "").replace(";", ",").split(","):
+        name = part.strip().lower()
+        if name in DETECTORS and name not in names:
+            names.append(name)
+    return names
+
+
+def _filter_names(chain: str) -> List[str]:
+    return [f.split("=", 1)[0].strip().lower() for f in (chain or "").split(",") if f.strip()]
+
+
+def detector_filter(name: str, user_chain: str = "") -> str:
+    """
+    Filter text for one detector: the factory's own chain when it uses this
+    detector (so its thresholds apply), otherwise the default. Adds whatever
+    the detector needs to print results to the log.
+    """
+    chain = (user_chain or "").strip()
+    flt = chain if name in _filter_names(chain) else DETECTORS[name][1]
+    if name == "loudnorm" and "print_format=" not in flt:
+        flt += ":print_format=json"
+    if name == "signalstats" and "metadata" not in _filter_names(flt):
+        flt += ",metadata=mode=print"
+    return flt
+
+
+def build_analysis_command(input_path, detectors: Sequence[Tuple[str, str]],
+                           input_args: Sequence[str] = ()) -> List[str]:
+    """One decode, every detector: [(name, filter), ...] -> ffmpeg argv writing to the null muxer."""
+    graph, maps = [], []
+    for kind, src, splitter in (("audio", "[0:a:0]", "asplit"), ("video", "[0:v:0]", "split")):
+        filters = [flt for name, flt in detectors if DETECTORS[name][0] == kind]
+        if not filters:
+            continue
+        tag = kind[0]
+        if len(filters) == 1:
+            graph.append(f"{src}{filters[0]}[{tag}out0]")
+        else:
+            pads = "".join(f"[{tag}{i}]" for i in range(len(filters)))
+            graph.append(f"{src}{splitter}={len(filters)}{pads}")
+            graph += [f"[{tag}{i}]{flt}[{tag}out{i}]" for i, flt in enumerate(filters)]
+        for i in range(len(filters)):
+            maps += ["-map", f"[{tag}out{i}]"]
+
+    cmd = ["ffmpeg", "-hide_banner", "-y", *input_args, "-i", str(input_path)]
+    cmd += ["-filter_complex", ";".join(graph), *maps, "-f", "null", "-"]
+    return cmd
+
+
+# ============================
+#      Detector parsers
+# ============================
+def register_detector(name: str, kind: str, default_filter: str):
+    """Class decorator: make a parser available as detector `name` ("audio"/"video")."""
+    def deco(cls):
+        if inspect.isabstract(cls):
+            missing = ", ".join(sorted(cls.__abstractmethods__))
+            raise TypeError(f"detector {name!r}: {cls.__name__} does not implement {missing}")
+        DETECTORS[name] = (kind, default_filter)
+        PARSERS[name] = cls
+        cls.name = name
+        return cls
+    return deco
+
+
+class Interval(NamedTuple):
+    start: Optional[float]
+    end: Optional[float]
+    duration: Optional[float]
+
+
+class LoudnessSummary(NamedTuple):
+    """ebur128 summary block (LUFS / LU / dBFS)."""
+    integrated: Optional[float]
+    threshold: Optional[float]
+    lra: Optional[float]
+    lra_threshold: Optional[float]
+    lra_low: Optional[float]
+    lra_high: Optional[float]
+    true_peak: Optional[float]
+    sample_peak: Optional[float]
+
+
+class _Parser(ABC):
+    """Incremental parser: feed() every log line, result() at the end."""
+
+    name = ""
+    listener: Optional[Callable[[str, object], None]] = None
+
+    @abstractmethod
+    def feed(self, line: str) -> None: ...
+
+    @abstractmethod
+    def result(self) -> dict: ...
+
+    def close(self) -> None:
+        """End of log: emit anything only known once the run is over."""
+
+    def _emit(self, event) -> None:
+        if self.listener is not None:
+            self.listener(self.name, event)
+
+
+def _num(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+@register_detector("loudnorm", "audio", "loudnorm=I=-24:LRA=7:TP=-2")
+class LoudnormParser(_Parser):
+    """Captures only the JSON block that follows the [Parsed_loudnorm_N] line."""
+
+    def __init__(self):
+        self._lines: Optional[List[str]] = None
+        self.measured: Optional[dict] = None
+
+    def feed(self, line):
+        if self._lines is None:
+            if "Parsed_loudnorm" in line:
+                self._lines = []
+            return
+        stripped = line.strip()
+        if not self._lines and not stripped.startswith("{"):
+            return
+        self._lines.append(stripped)
+        if stripped.startswith("}"):
+            try:
+                data = json.loads("".join(self._lines))
+                if "input_i" in data and "input_tp" in data:
+                    self.measured = data
+                    self._emit(data)
+            except ValueError:
+                pass
+            self._lines = None
+
+    def result(self):
+        return {"measured": self.measured}
+
+
+@register_detector("volumedetect", "audio", "volumedetect")
+class VolumedetectParser(_Parser):
+    _RE = re.compile(r"(mean_volume|max_volume|histogram_\d+db|n_samples):\s*([-\d.]+)")
+
+    def __init__(self):
+        self.values: dict = {}
+
+    def feed(self, line):
+        if "Parsed_volumedetect" not in line:
+            return
+        m = self._RE.search(line)
+        if m:
+            self.values[m.group(1)] = _num(m.group(2))
+
+    def result(self):
+        return dict(self.values)
+
+
+class _IntervalParser(_Parser):
+    """Shared by blackdetect/freezedetect: collect start/end/duration intervals."""
+
+    def __init__(self):
+        self.intervals: List[dict] = []
+        self.total = 0.0
+        self.count = 0
+
+    def _add(self, start, end, duration):
+        event = Interval(start, end, duration)
+        self.count += 1
+        self.total += duration or 0.0
+        if len(self.intervals) < MAX_EVENTS:
+            self.intervals.append(event)
+        self._emit(event)
+
+    def result(self):
+        return {"count": self.count, "total_duration": round(self.total, 3),
+                "intervals": [iv._asdict() for iv in self.intervals],
+                "truncated": self.count > len(self.intervals)}
+
+
+@register_detector("silencedetect", "audio", "silencedetect=n=-50dB:d=2")
+class SilencedetectParser(_IntervalParser):
+    _START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+    _END = re.compile(r"silence_end:\s*(-?[\d.]+)\s*\|\s*silence_duration:\s*([\d.]+)")
+
+    def __init__(self):
+        super().__init__()
+        self._start = None
+
+    def feed(self, line):
+        if "silence_" not in line:
+            return
+        m = self._END.search(line)
+        if m:
+            end, duration = _num(m.group(1)), _num(m.group(2))
+            start = self._start if self._start is not None else round(end - duration, 6)
+            self._add(start, end, duration)
+            self._start = None
+            return
+        m = self._START.search(line)
+        if m:
+            self._start = _num(m.group(1))
+
+    def result(self):
+        out = super().result()
+        if self._start is not None:
+            out["open_at_end"] = self._start  # silent until end of file
+        return out
+
+
+@register_detector("blackdetect", "video", "blackdetect=d=2:pix_th=0.10")
+class BlackdetectParser(_IntervalParser):
+    _RE = re.compile(r"black_start:\s*([\d.]+)\s+black_end:\s*([\d.]+)\s+black_duration:\s*([\d.]+)")
+
+    def feed(self, line):
+        m = self._RE.search(line)
+        if m:
+            self._add(*(_num(g) for g in m.groups()))
+
+
+@register_detector("freezedetect", "video", "freezedetect=n=-60dB:d=2")
+class FreezedetectParser(_IntervalParser):
+    _RE = re.compile(r"lavfi\.freezedetect\.freeze_(start|duration|end):\s*([\d.]+)")
+
+    def __init__(self):
+        super().__init__()
+        self._open: dict = {}
+
+    def feed(self, line):
+        m = self._RE.search(line)
+        if not m:
+            return
+        self._open[m.group(1)] = _num(m.group(2))
+        if m.group(1) == "end":
+            self._add(self._open.get("start"), self._open.get("end"), self._open.get("duration"))
+            self._open = {}
+
+    def result(self):
+        out = super().result()
+        if "start" in self._open:
+            out["open_at_end"] = self._open["start"]  # frozen until end of file
+        return out
+
+
+@register_detector("blackframe", "video", "blackframe")
+class BlackframeParser(_Parser):
+    _RE = re.compile(r"frame:(\d+)\s+pblack:(\d+)\s+pts:\S+\s+t:([\d.]+)")
+
+    def __init__(self):
+        self.frames: List[dict] = []
+        self.count = 0
+
+    def feed(self, line):
+        if "Parsed_blackframe" not in line:
+            return
+        m = self._RE.search(line)
+        if m:
+            self.count += 1
+            if len(self.frames) < MAX_EVENTS:
+                self.frames.append({"frame": int(m.group(1)), "pblack": int(m.group(2)), "t": _num(m.group(3))})
+
+    def result(self):
+        return {"count": self.count, "frames": list(self.frames), "truncated": self.count > len(self.frames)}
+
+
+@register_detector("idet", "video", "idet")
+class IdetParser(_Parser):
+    _RE = re.compile(r"(Repeated Fields|Single frame detection|Multi frame detection):\s*(.*)")
+    _KV = re.compile(r"(\w+):\s*(\d+)")
+
+    def __init__(self):
+        self.sections: dict = {}
+
+    def feed(self, line):
+        if "Parsed_idet" not in line:
+            return
+        m = self._RE.search(line)
+        if m:
+            key = m.group(1).lower().replace(" ", "_")
+            self.sections[key] = {k.lower(): int(v) for k, v in self._KV.findall(m.group(2))}
+
+    def result(self):
+        out = dict(self.sections)
+        multi = self.sections.get("multi_frame_detection") or {}
+        if multi:
+            out["verdict"] = max(("tff", "bff", "progressive"), key=lambda k: multi.get(k, 0))
+        return out
+
+
+@register_detector("signalstats", "video", "signalstats")
+class SignalstatsParser(_Parser):
+    """Running min/max/mean of each lavfi.signalstats.* key (frames are not kept)."""
+
+    _RE = re.compile(r"lavfi\.signalstats\.(\w+)=([-\d.]+)")
+
+    def __init__(self):
+        self.stats: Dict[str, list] = {}  # key -> [min, max, sum, n]
+
+    def feed(self, line):
+        m = self._RE.search(line)
+        if not m:
+            return
+        v = _num(m.group(2))
+        if v is None:
+            return
+        s = self.stats.get(m.group(1))
+        if s is None:
+            self.stats[m.group(1)] = [v, v, v, 1]
+        else:
+            s[0] = min(s[0], v)
+            s[1] = max(s[1], v)
+            s[2] += v
+            s[3] += 1
+
+    def result(self):
+        return {k: {"min": lo, "max": hi, "mean": round(total / n, 3), "frames": n}
+                for k, (lo, hi, total, n) in sorted(self.stats.items())}
+
+
+@register_detector("ebur128", "audio", "ebur128=peak=true")
+class Ebur128Parser(_Parser):
+    """
+    EBU R128 summary (integrated, LRA, peaks). The per-frame lines are only
+    used for the running maximum of momentary/short-term loudness.
+    """
+
+    _FRAME = re.compile(r"\bM:\s*(-?[\d.]+)\s+S:\s*(-?[\d.]+)")
+    _FIELD = re.compile(r"^\s*(I|Threshold|LRA|LRA low|LRA high|Peak):\s*(-?[\d.]+|-inf)")
+    _SECTIONS = {"Integrated loudness:": "integrated", "Loudness range:": "range",
+                 "True peak:": "true_peak", "Sample peak:": "sample_peak"}
+
+    def __init__(self):
+        self.max_momentary = None
+        self.max_short_term = None
+        self.summary: Optional[LoudnessSummary] = None
+        self._in_summary = False
+        self._section = ""
+        self._values: dict = {}
+
+    def feed(self, line):
+        if "Parsed_ebur128" in line:
+            if "Summary:" in line:
+                self._in_summary, self._section, self._values = True, "", {}
+                return
+            m = self._FRAME.search(line)
+            if m:
+                mom, short = _num(m.group(1)), _num(m.group(2))
+                if mom is not None and (self.max_momentary is None or mom > self.max_momentary):
+                    self.max_momentary = mom
+                if short is not None and (self.max_short_term is None or short > self.max_short_term):
+                    self.max_short_term = short
+            return
+        if not self._in_summary:
+            return
+        stripped = line.strip()
+        if stripped in self._SECTIONS:
+            self._section = self._SECTIONS[stripped]
+            return
+        m = self._FIELD.match(line)
+        if not m:
+            return
+        key, value = m.group(1), _num(m.group(2))
+        if value is not None and value in (float("inf"), float("-inf")):
+            value = None  # silence: keep the JSON report valid
+        slot = {
+            ("integrated", "I"): "integrated", ("integrated", "Threshold"): "threshold",
+            ("range", "LRA"): "lra", ("range", "Threshold"): "lra_threshold",
+            ("range", "LRA low"): "lra_low", ("range", "LRA high"): "lra_high",
+            ("true_peak", "Peak"): "true_peak", ("sample_peak", "Peak"): "sample_peak",
+        }.get((self._section, key))
+        if slot:
+            self._values[slot] = value
+            self._publish()
+
+    def _publish(self):
+        self.summary = LoudnessSummary(**{f: self._values.get(f) for f in LoudnessSummary._fields})
+
+    def close(self):
+        if self.summary and self._in_summary:
+            self._in_summary = False
+            self._emit(self.summary)
+
+    def result(self):
+        out = self.summary._asdict() if self.summary else {}
+        out["max_momentary"] = self.max_momentary
+        out["max_short_term"] = self.max_short_term
+        return out
+
+
+# ============================
+#       Analysis session
+# ============================
+class AnalysisSession:
+    """
+    Parsers for one analysis run; feed() log lines, report() for the
+    structured result. listener(detector, event) receives typed events
+    (Interval, LoudnessSummary, loudnorm dict) as they are parsed.
+    """
+
+    def __init__(self, input_path, detectors: Sequence[Tuple[str, str]], json_path=None, listener=None):
+        self.input_path = str(input_path)
+        self.detectors = list(detectors)
+        self.json_path = Path(json_path) if json_path else None
+        self.parsers = {name: PARSERS[name]() for name, _flt in self.detectors}
+        for parser in self.parsers.values():
+            parser.listener = listener
+        self._closed = False
+
+    def feed(self, line: str) -> None:
+        for parser in self.parsers.values():
+            parser.feed(line)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            for parser in self.parsers.values():
+                parser.close()
+
+    def loudnorm(self) -> Optional[dict]:
+        parser = self.parsers.get("loudnorm")
+        return parser.measured if parser else None
+
+    def report(self, returncode: Optional[int] = None) -> dict:
+        self.close()
+        return {
+            "input": self.input_path,
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "returncode": returncode,
+            "detectors": {
+                name: {"filter": flt, "result": self.parsers[name].result()}
+                for name, flt in self.detectors
+            },
+        }
+
+    def save(self, returncode: Optional[int] = None, path=None) -> Optional[Path]:
+        path = Path(path) if path else self.json_path
+        if path is None:
+            return None
+        path.write_text(json.dumps(self.report(returncode), indent=2), encoding="utf-8")
+        return path
+
+
+def run_analysis(input_path, detectors: Sequence[Tuple[str, str]], input_args: Sequence[str] = (),
+                 log_path=None, json_path=None, listener=None) -> AnalysisSession:
+    """
+    Run every detector in one ffmpeg decode. The raw log is streamed to
+    log_path (if given) and the structured report saved to json_path.
+    Raises RuntimeError with the end of the log if ffmpeg fails.
+    """
+    session = AnalysisSession(input_path, detectors, json_path=json_path, listener=listener)
+    cmd = build_analysis_command(input_path, session.detectors, input_args)
+    tail = deque(maxlen=20)
+    log = open(log_path, "w", encoding="utf-8") if log_path else None
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True, errors="replace")
+        for line in proc.stderr:
+            session.feed(line)
+            tail.append(line)
+            if log:
+                log.write(line)
+        proc.wait()
+    finally:
+        if log:
+            log.close()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"Analysis failed (exit {proc.returncode}):\n{''.join(tail)}")
+    session.save(proc.returncode)
+    return session
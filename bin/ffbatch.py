@@ -0,0 +1,157 @@
+# ffbatch.py
+#
+# Global job scheduler for FreeFactoryConversion --once/--watch.
+#
+# One scheduler serves every enabled factory's notify folder. Jobs wait in a
+# single queue ordered round-robin across factories (a 5000-file backlog in one
+# folder doesn't hold up a file dropped in another) and are started by a fixed
+# set of worker threads whenever their accelerator has room:
+#
+#   CPU           MaxConcurrentJobsCPU
+#   NVENC/CUDA    MaxConcurrentJobsNVENC / MaxConcurrentJobsCUDA
+#   Intel QSV     MaxConcurrentJobsQSV
+#   VAAPI         MaxConcurrentJobsVAAPI
+#   AMD AMF       MaxConcurrentJobsAMF
+#   everything    MaxConcurrentJobs
+#
+# An accelerator cap of 0 falls back to MaxConcurrentJobsGPU. Like the slot
+# broker (ffslots), a job blocked on a busy accelerator never blocks a job for
+# another one behind it, and jobs of one accelerator start in queue order. The
+# broker slot is still taken per job, so the GUI and other services on this
+# machine stay within the machine-wide CPU/GPU caps.
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ffslots import read_caps
+
+ACCEL_CAP_KEYS = {
+    "": "MaxConcurrentJobsCPU",
+    "NVENC": "MaxConcurrentJobsNVENC",
+    "CUDA": "MaxConcurrentJobsCUDA",
+    "Intel QSV": "MaxConcurrentJobsQSV",
+    "VAAPI": "MaxConcurrentJobsVAAPI",
+    "AMD AMF": "MaxConcurrentJobsAMF",
+}
+
+
+def _cap(cfg, key: str) -> Optional[int]:
+    try:
+        v = int(str(cfg.get(key, 0) or 0).strip())
+    except ValueError:
+        return None
+    return v if v > 0 else None
+
+
+def accel_caps(cfg) -> Dict[str, Optional[int]]:
+    """Per-accelerator caps ('' = CPU) plus 'total'; None = unlimited."""
+    base = read_caps(cfg)
+    caps: Dict[str, Optional[int]] = {"total": base["total"]}
+    for accel, key in ACCEL_CAP_KEYS.items():
+        caps[accel] = _cap(cfg, key) or (base["cpu"] if accel == "" else base["gpu"])
+    return caps
+
+
+class BatchJob(NamedTuple):
+    factory: str
+    accel: str       # FreeFactoryCore.which_accel tag, '' for CPU
+    path: object
+    payload: object = None
+
+
+class BatchScheduler:
+    """Round-robin-by-factory queue, started per accelerator cap by worker threads."""
+
+    def __init__(self, caps: Dict[str, Optional[int]], workers: int, run: Callable[[BatchJob], None]):
+        self.caps = dict(caps)
+        self.run = run
+        self._cond = threading.Condition()
+        self._queues: Dict[str, List[tuple]] = {}  # accel -> heap of (round, seq, job)
+        self._rounds: Dict[str, int] = {}          # factory -> round of its next job
+        self._floor = 0                            # highest round started so far
+        self._seq = itertools.count()
+        self._running: Dict[str, int] = {}
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"ffbatch-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, job: BatchJob) -> None:
+        with self._cond:
+            # a factory that once had a big backlog doesn't stay behind ones that
+            # start queueing now: nobody's next job lands before the current round
+            rnd = max(self._rounds.get(job.factory, 0), self._floor)
+            self._rounds[job.factory] = rnd + 1
+            heapq.heappush(self._queues.setdefault(job.accel, []), (rnd, next(self._seq), job))
+            self._cond.notify()
+
+    def _has_room(self, accel: str) -> bool:
+        total = self.caps.get("total")
+        if total is not None and sum(self._running.values()) >= total:
+            return False
+        cap = self.caps.get(accel)
+        return cap is None or self._running.get(accel, 0) < cap
+
+    def _take(self) -> Optional[BatchJob]:
+        """Earliest queued job whose accelerator has room (caller holds the lock)."""
+        ready = [q for accel, q in self._queues.items() if q and self._has_room(accel)]
+        if not ready:
+            return None
+        rnd, _seq, job = heapq.heappop(min(ready, key=lambda q: q[0][:2]))
+        self._floor = max(self._floor, rnd)
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self._take()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+                self._running[job.accel] = self._running.get(job.accel, 0) + 1
+            try:
+                self.run(job)
+            finally:
+                with self._cond:
+                    self._running[job.accel] -= 1
+                    self._cond.notify_all()
+
+    # ---------- control ----------
+    def idle(self) -> bool:
+        with self._cond:
+            return not any(self._queues.values()) and not any(self._running.values())
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue is drained and nothing runs; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(self._queues.values()) and not any(self._running.values()), timeout
+            )
+
+    def pending(self) -> Dict[str, int]:
+        """Queued jobs per factory."""
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for _rnd, _seq, job in itertools.chain.from_iterable(self._queues.values()):
+                counts[job.factory] = counts.get(job.factory, 0) + 1
+            return counts
+
+    def shutdown(self) -> None:
+        """Drop queued jobs and let running ones finish."""
+        with self._cond:
+            self._queues.clear()
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
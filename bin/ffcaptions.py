@@ -0,0 +1,231 @@
+# ffcaptions.py
+#
+# Sidecar caption stage: caption files written next to every encode.
+#
+# The bundled ttconv (third_party/ttconv) is called in-process -- no second
+# tool pass, no Python start per sidecar. The stage is submitted to a small
+# shared pool when the encode starts and runs while ffmpeg works; the encode's
+# caller collects the result before it touches the source (DELETESOURCE).
+#
+# Extracting embedded captions decodes the whole video, so that ffmpeg runs
+# under the slot the caller passes in (slot(request), e.g. a CPU
+# ffslots.concurrency_slot; None for no gating), like ffsegments' helpers. The
+# encode's caller may hold the only free slot while it waits for the stage, so
+# caption_report() calls the wait off and the extraction runs on the caller's
+# slot instead.
+#
+# Factory keys (no widgets yet; kept across GUI saves):
+#
+#   CAPTIONSOURCE=auto        sidecar, else embedded CEA-608 (default: stage off)
+#                 sidecar     <input stem>.scc/.ttml/.xml/.dfxp/.stl/.srt/.vtt next to the input
+#                 embedded    CEA-608 carried in the video (ffmpeg lavfi subcc)
+#   CAPTIONFORMATS=srt,vtt    any of srt, vtt, ttml (alias imsc), scc
+#
+# Sidecars are written to OUTPUTDIRECTORY as <input stem>.<ext>, the same stem
+# as the encoded output.
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as et
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from ffslots import SlotRequest
+
+TTCONV_DIR = Path(__file__).resolve().parent.parent / "third_party" / "ttconv"
+if TTCONV_DIR.is_dir() and str(TTCONV_DIR) not in sys.path:
+    sys.path.append(str(TTCONV_DIR))
+
+CAPTION_WORKERS = 2
+EXTRACT_TIMEOUT_SEC = 3600
+
+SIDECAR_EXTENSIONS = (".scc", ".ttml", ".xml", ".dfxp", ".stl", ".srt", ".vtt")
+FORMAT_EXTENSIONS = {"srt": "srt", "vtt": "vtt", "ttml": "ttml", "imsc": "ttml", "scc": "scc"}
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def caption_formats(factory) -> List[str]:
+    """Requested output formats, de-duplicated, in factory order."""
+    out: List[str] = []
+    for fmt in (factory.get("CAPTIONFORMATS") or "").replace(";", ",").split(","):
+        fmt = fmt.strip().lower().lstrip(".")
+        fmt = "ttml" if fmt == "imsc" else fmt
+        if fmt in FORMAT_EXTENSIONS and fmt not in out:
+            out.append(fmt)
+    return out
+
+
+def enabled(factory) -> bool:
+    source = (factory.get("CAPTIONSOURCE") or "").strip().lower()
+    return source in ("auto", "sidecar", "embedded") and bool(caption_formats(factory))
+
+
+def find_sidecar(input_path) -> Optional[Path]:
+    """First <stem>.<caption ext> next to the input (either case of extension)."""
+    p = Path(input_path)
+    for ext in SIDECAR_EXTENSIONS:
+        for candidate in (p.with_suffix(ext), p.with_suffix(ext.upper())):
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+# ============================
+#       ttconv read/write
+# ============================
+def read_document(path: Path):
+    """ttconv ContentDocument for a caption file, by extension."""
+    ext = path.suffix.lower()
+    if ext == ".scc":
+        from ttconv.scc import reader as scc_reader
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return scc_reader.to_model(f)
+    if ext in (".ttml", ".xml", ".dfxp"):
+        from ttconv.imsc import reader as imsc_reader
+        return imsc_reader.to_model(et.parse(str(path)))
+    if ext == ".stl":
+        from ttconv.stl import reader as stl_reader
+        with open(path, "rb") as f:
+            return stl_reader.to_model(f)
+    if ext == ".srt":
+        from ttconv.srt import reader as srt_reader
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return srt_reader.to_model(f)
+    if ext == ".vtt":
+        from ttconv.vtt import reader as vtt_reader
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return vtt_reader.to_model(f)
+    raise ValueError(f"unsupported caption file: {path.name}")
+
+
+def write_document(doc, fmt: str, out_path: Path) -> None:
+    if fmt == "ttml":
+        from ttconv.imsc import writer as imsc_writer
+        imsc_writer.from_model(doc).write(str(out_path), encoding="utf-8", xml_declaration=True)
+        return
+    if fmt == "srt":
+        from ttconv.srt import writer
+    elif fmt == "vtt":
+        from ttconv.vtt import writer
+    elif fmt == "scc":
+        from ttconv.scc import writer
+    else:
+        raise ValueError(f"unsupported caption format: {fmt}")
+    out_path.write_text(writer.from_model(doc), encoding="utf-8")
+
+
+# ============================
+#       Embedded CEA-608
+# ============================
+def has_embedded_cc(core, input_path) -> bool:
+    info = core.probe_media(input_path)
+    return bool(info and any(s.closed_captions for s in info.video))
+
+
+def extract_embedded(input_path, work_dir: Path) -> Optional[Path]:
+    """CEA-608 from the first video stream as SRT (ffmpeg movie=...[out0+subcc])."""
+    # movie= takes a filtergraph-escaped name; a plain-named link avoids quoting the real one
+    link = work_dir / ("input" + Path(input_path).suffix.lower())
+    try:
+        os.symlink(Path(input_path).resolve(), link)
+    except OSError:
+        return None
+    out = work_dir / "embedded.srt"
+    cmd = ["ffmpeg", "-hide_banner", "-nostdin", "-v", "error", "-y",
+           "-f", "lavfi", "-i", f"movie={link}[out0+subcc]", "-map", "0:s:0", str(out)]
+    try:
+        proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                              timeout=EXTRACT_TIMEOUT_SEC)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if proc.returncode != 0 or not out.is_file() or out.stat().st_size == 0:
+        return None
+    return out
+
+
+# ============================
+#            Stage
+# ============================
+def output_paths(factory, input_path) -> List[Tuple[str, Path]]:
+    out_dir = Path(factory.get("OUTPUTDIRECTORY") or ".")
+    stem = Path(input_path).stem
+    return [(fmt, out_dir / f"{stem}.{FORMAT_EXTENSIONS[fmt]}") for fmt in caption_formats(factory)]
+
+
+class CaptionStage(NamedTuple):
+    future: Future
+    slot_request: SlotRequest  # CPU slot for an embedded extraction
+
+
+def run_caption_stage(core, input_path, factory, slot: Optional[Callable] = None,
+                      slot_request: Optional[SlotRequest] = None) -> List[str]:
+    """Write the factory's caption sidecars for input_path; one report line per file."""
+    source = (factory.get("CAPTIONSOURCE") or "").strip().lower()
+    name = Path(input_path).name
+    sidecar = find_sidecar(input_path) if source in ("auto", "sidecar") else None
+    with tempfile.TemporaryDirectory(prefix="ffcaptions-") as tmp:
+        origin = sidecar
+        if origin is None and source in ("auto", "embedded") and has_embedded_cc(core, input_path):
+            # a cancelled wait runs on the caller's slot
+            with (slot(slot_request) if slot else nullcontext(True)):
+                origin = extract_embedded(input_path, Path(tmp))
+        if origin is None:
+            return [f"[CAPTIONS] {name}: no caption source ({source})"]
+        try:
+            doc = read_document(origin)
+        except Exception as e:
+            return [f"[CAPTIONS] {name}: could not read {origin.name}: {e}"]
+        if doc is None:
+            return [f"[CAPTIONS] {name}: {origin.name} has no captions"]
+
+        lines = []
+        for fmt, out_path in output_paths(factory, input_path):
+            if sidecar is not None and out_path.resolve() == sidecar.resolve():
+                lines.append(f"[CAPTIONS] {name}: {out_path.name} is the source; left as is")
+                continue
+            try:
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                write_document(doc, fmt, out_path)
+                lines.append(f"[CAPTIONS] {name}: wrote {out_path}")
+            except Exception as e:
+                lines.append(f"[CAPTIONS] {name}: {fmt} failed: {e}")
+        return lines
+
+
+def start_caption_stage(core, input_path, factory, slot: Optional[Callable] = None) -> Optional[CaptionStage]:
+    """
+    Submit the stage for this job (None when the factory has no captions).
+    slot(request) gates an embedded extraction; None runs it ungated.
+    """
+    global _pool
+    if not enabled(factory):
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=CAPTION_WORKERS, thread_name_prefix="ffcaptions")
+    request = SlotRequest()
+    return CaptionStage(_pool.submit(run_caption_stage, core, input_path, dict(factory), slot, request), request)
+
+
+def caption_report(stage: Optional[CaptionStage]) -> str:
+    """
+    Wait for a started stage once the encode is done; its report lines (empty
+    when there was none). An extraction still queued for a CPU slot stops
+    waiting and runs on the slot the caller holds.
+    """
+    if stage is None:
+        return ""
+    stage.slot_request.cancel()
+    try:
+        return "\n".join(stage.future.result()) + "\n"
+    except Exception as e:
+        return f"[CAPTIONS] failed: {e}\n"
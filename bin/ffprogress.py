@@ -0,0 +1,202 @@
+# ffprogress.py
+#
+# Structured ffmpeg progress via "-progress pipe:1".
+#
+# ffmpeg writes blocks of key=value lines to the progress pipe, each block
+# terminated by "progress=continue" (or "progress=end" on the last one).
+# ProgressParser turns those blocks into small dicts with fps, speed,
+# out_time and a percent computed against the probed input duration.
+# Used by FreeFactoryConversion.run_ffmpeg (service logs) and the GUI workers.
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+PROGRESS_ARGS = ["-progress", "pipe:1"]
+
+
+def probe_duration(path) -> Optional[float]:
+    """Container duration in seconds (mediaprobe cache), or None if unknown."""
+    from mediaprobe import MediaProbe
+    return MediaProbe.shared().duration(path)
+
+
+def parse_time(value: str) -> Optional[float]:
+    """Seconds from an ffmpeg time value: '90', '90.5', '01:30', '00:01:30.500'."""
+    s = (value or "").strip()
+    if not s or s.upper() == "N/A":
+        return None
+    try:
+        if ":" in s:
+            secs = 0.0
+            for part in s.split(":"):
+                secs = secs * 60 + float(part)
+            return secs
+        if s.endswith("us"):
+            return float(s[:-2]) / 1_000_000
+        if s.endswith("ms"):
+            return float(s[:-2]) / 1000
+        return float(s.rstrip("s"))
+    except ValueError:
+        return None
+
+
+def expected_duration(cmd: List[str], probed: Optional[float]) -> Optional[float]:
+    """Output duration to measure percent against: probed length clipped by -ss/-t."""
+    duration = probed
+    for i, tok in enumerate(cmd[:-1]):
+        if tok == "-t":
+            t = parse_time(cmd[i + 1])
+            if t is not None:
+                duration = t if duration is None else min(duration, t)
+        elif tok == "-ss" and duration is not None:
+            ss = parse_time(cmd[i + 1])
+            if ss is not None:
+                duration = max(0.0, duration - ss)
+    return duration
+
+
+def with_progress_pipe(cmd: List[str]) -> List[str]:
+    """
+    Return cmd with "-progress pipe:1" right after the ffmpeg binary.
+    Left unchanged if ffmpeg already writes media or progress to stdout.
+    """
+    cmd = [str(x) for x in cmd]
+    if "-progress" in cmd:
+        return cmd
+    last = cmd[-1] if cmd else ""
+    if last in ("pipe:", "pipe:1") or (last == "-" and not _is_null_output(cmd)):
+        return cmd
+    return cmd[:1] + PROGRESS_ARGS + cmd[1:]
+
+
+def _is_null_output(cmd: List[str]) -> bool:
+    return len(cmd) >= 3 and cmd[-3] == "-f" and cmd[-2] == "null"
+
+
+class ProgressParser:
+    """Incremental parser for ffmpeg -progress output."""
+
+    _NUM = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+    def __init__(self, duration: Optional[float] = None):
+        self.duration = duration
+        self._block: dict = {}
+        self.last: Optional[dict] = None
+
+    def feed(self, line: str) -> Optional[dict]:
+        """Feed one line; returns a snapshot dict when a progress block completes."""
+        line = line.strip()
+        if "=" not in line:
+            return None
+        key, value = line.split("=", 1)
+        key, value = key.strip(), value.strip()
+        if key != "progress":
+            self._block[key] = value
+            return None
+
+        block, self._block = self._block, {}
+        snap = self._snapshot(block, value)
+        self.last = snap
+        return snap
+
+    def _number(self, value) -> Optional[float]:
+        m = self._NUM.search(value or "")
+        return float(m.group(0)) if m else None
+
+    def _snapshot(self, block: dict, state: str) -> dict:
+        out_time_sec = None
+        if block.get("out_time_us", "").lstrip("-").isdigit():
+            out_time_sec = max(0.0, int(block["out_time_us"]) / 1_000_000)
+        elif "out_time" in block:
+            out_time_sec = parse_time(block["out_time"])
+
+        percent = None
+        if state == "end":
+            percent = 100.0
+        elif self.duration and out_time_sec is not None:
+            percent = max(0.0, min(100.0, out_time_sec / self.duration * 100.0))
+
+        return {
+            "state": state,
+            "frame": int(self._number(block.get("frame")) or 0),
+            "fps": self._number(block.get("fps")),
+            "speed": self._number(block.get("speed")),
+            "bitrate": block.get("bitrate", ""),
+            "out_time": block.get("out_time", ""),
+            "out_time_sec": out_time_sec,
+            "percent": percent,
+            "drop_frames": int(self._number(block.get("drop_frames")) or 0),
+            "dup_frames": int(self._number(block.get("dup_frames")) or 0),
+        }
+
+
+_STATS_RE = re.compile(r"(frame|fps|q|size|time|bitrate|dup|drop|speed)=\s*(\S+)")
+
+
+def parse_stats_line(line: str) -> Optional[dict]:
+    """
+    Counters from an ffmpeg -stats line on stderr (the live/streaming case,
+    where "-progress" isn't used), e.g.
+    'frame= 1234 fps= 30 q=23.0 size= 4096kB time=00:00:41.13 bitrate= 815.6kbits/s dup=0 drop=2 speed=1.00x'
+    """
+    if "frame=" not in line and "size=" not in line:
+        return None
+    fields = dict(_STATS_RE.findall(line))
+    if "time" not in fields:
+        return None
+
+    def num(key):
+        m = ProgressParser._NUM.search(fields.get(key, ""))
+        return float(m.group(0)) if m else None
+
+    return {
+        "frame": int(num("frame") or 0),
+        "fps": num("fps"),
+        "bitrate_kbps": num("bitrate"),
+        "out_time": fields.get("time", ""),
+        "out_time_sec": parse_time(fields.get("time", "")),
+        "dup_frames": int(num("dup") or 0),
+        "drop_frames": int(num("drop") or 0),
+        "speed": num("speed"),
+    }
+
+
+def format_progress(snap: Optional[dict]) -> str:
+    """Short human readable summary, e.g. '42.0%  57.3 fps  1.91x  00:01:23'."""
+    if not snap:
+        return ""
+    parts = []
+    if snap.get("percent") is not None:
+        parts.append(f"{snap['percent']:.1f}%")
+    if snap.get("fps") is not None:
+        parts.append(f"{snap['fps']:.1f} fps")
+    if snap.get("speed") is not None:
+        parts.append(f"{snap['speed']:.2f}x")
+    out_time = (snap.get("out_time") or "").split(".")[0]
+    if out_time:
+        parts.append(out_time)
+    return "  ".join(parts)
+
+
+def below_realtime(snap: Optional[dict]) -> bool:
+    return bool(snap and snap.get("speed") is not None and snap["speed"] < 1.0)
+
+
+def format_stream_stats(stats: Optional[dict]) -> str:
+    """Live stream counters, e.g. '30.0 fps  2500 kb/s  1.00x  drop 2'."""
+    if not stats:
+        return ""
+    parts = []
+    if stats.get("fps") is not None:
+        parts.append(f"{stats['fps']:.1f} fps")
+    if stats.get("bitrate_kbps") is not None:
+        parts.append(f"{stats['bitrate_kbps']:.0f} kb/s")
+    if stats.get("speed") is not None:
+        parts.append(f"{stats['speed']:.2f}x")
+    if stats.get("drop_frames"):
+        parts.append(f"drop {stats['drop_frames']}")
+    if stats.get("dup_frames"):
+        parts.append(f"dup {stats['dup_frames']}")
+    return "  ".join(parts)
@@ -0,0 +1,349 @@
+# ffsegments.py
+#
+# Segment-parallel encoding for long inputs (PARALLELSEGMENTS=N).
+#
+# One libx264/libx265 process doesn't keep a many-core box busy on the slower
+# presets. With PARALLELSEGMENTS=N in a factory, the conversion service:
+#
+#   1. reads the video keyframe times (packet flags only, nothing is decoded)
+#      and picks N-1 keyframes near equal fractions of the duration,
+#   2. encodes each GOP-aligned segment with the factory's video settings as a
+#      separate ffmpeg (-ss at the keyframe, -t to the next one, no audio),
+#      up to N at a time, each extra process holding its own concurrency slot,
+#   3. encodes the audio once over the whole file (loudnorm pass included),
+#   4. concat-muxes the segments and the audio with -c copy into the
+#      factory's output file.
+#
+# Factories this can't be done for (copy codecs, multi-output, manual -map,
+# subtitles, -ss/-t, analysis reports, short inputs) run as one process.
+
+from __future__ import annotations
+
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from ffslots import SlotRequest
+
+MIN_SEGMENT_SEC = 30.0  # don't split below this; startup cost would dominate
+MAX_SEGMENTS = 64
+BOUNDARY_GUARD = 0.001  # seconds kept off -t so the next keyframe isn't encoded twice
+
+
+def segment_count(factory) -> int:
+    try:
+        n = int(str(factory.get("PARALLELSEGMENTS", "") or "0").strip())
+    except ValueError:
+        return 0
+    return min(n, MAX_SEGMENTS) if n > 1 else 0
+
+
+def _truthy(v) -> bool:
+    return str(v or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def ineligible_reason(core, factory) -> str:
+    """Why this factory must run as a single process ('' if it can be split)."""
+    vcodec = (factory.get("VIDEOCODECS") or "").strip().lower()
+    manual_out = (factory.get("MANUALOPTIONSOUTPUT") or "").strip()
+    if not vcodec or vcodec == "copy" or _truthy(factory.get("DISABLEVIDEO")):
+        return "no video encode"
+    if _truthy(factory.get("MULTIOUTPUT")):
+        return "MULTIOUTPUT"
+    if any(tok in shlex.split(manual_out) for tok in ("-map", "-filter_complex", "-ss", "-t", "-to")):
+        return "MANUALOPTIONSOUTPUT maps/filters/seeks streams"
+    if (factory.get("SUBTITLECODECS") or "").strip() and not _truthy(factory.get("DISABLESUBS")):
+        return "subtitle streams"
+    if (factory.get("STARTTIMEOFFSET") or "").strip() or (factory.get("ENCODELENGTH") or "").strip():
+        return "STARTTIMEOFFSET/ENCODELENGTH"
+    if core.analysis_detectors(factory):
+        return "analysis report factory"
+    return ""
+
+
+# ============================
+#           Probing
+# ============================
+def probe_layout(core, input_path) -> Optional[dict]:
+    """start_time, duration and whether there is an audio stream."""
+    info = core.probe_media(input_path)
+    if info is None:
+        return None
+    return {
+        "start": info.start_time,
+        "duration": info.duration or 0.0,
+        "has_video": bool(info.video),
+        "has_audio": bool(info.audio),
+    }
+
+
+def probe_keyframes(input_path) -> List[float]:
+    """Presentation times of the first video stream's keyframes (demux only)."""
+    proc = subprocess.Popen(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(input_path)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    times = []
+    assert proc.stdout is not None
+    for line in proc.stdout:
+        pts, _, flags = line.strip().partition(",")
+        if "K" in flags:
+            try:
+                times.append(float(pts))
+            except ValueError:
+                pass  # pts_time N/A
+    proc.wait()
+    return sorted(set(times))
+
+
+def choose_boundaries(keyframes: Sequence[float], start: float, duration: float, n: int) -> List[float]:
+    """
+    Segment start times (relative to the file start): 0 plus up to n-1
+    keyframes near duration*i/n, none closer than MIN_SEGMENT_SEC apart.
+    """
+    bounds = [0.0]
+    rel = [k - start for k in keyframes]
+    j = 0
+    for i in range(1, n):
+        target = duration * i / n
+        while j < len(rel) and rel[j] < target:
+            j += 1
+        if j >= len(rel):
+            break
+        t = rel[j]
+        if t - bounds[-1] >= MIN_SEGMENT_SEC and duration - t >= MIN_SEGMENT_SEC:
+            bounds.append(t)
+    return bounds
+
+
+# ============================
+#     Per-segment commands
+# ============================
+_AUDIO_KEYS = ("AUDIOCODECS", "AUDIOBITRATE", "AUDIOSAMPLERATE", "AUDIOCHANNELS", "AUDIOTAGS",
+               "AUDIOFILTERS", "AUDIOSTREAMID")
+_VIDEO_KEYS = ("VIDEOCODECS", "VIDEOBITRATE", "VIDEOFILTERS", "VIDEOSIZE", "VIDEOPIXFORMAT", "VIDEOPRESET",
+               "VIDEOPROFILE", "VIDEOPROFILELEVEL", "VIDEOCRF", "VIDEOTAGS", "VIDEOFRAMERATE", "FRAMERATECFR",
+               "ASPECT", "GROUPPICSIZE", "BFRAMES", "FRAMESTRATEGY", "MATCHMINMAXBITRATE", "BUFSIZE",
+               "VIDEOSTREAMID", "REMOVEA53CC")
+# container-level options that belong to the final mux only
+_MUX_KEYS = ("MOVFLAGS", "TIMECODEMODE", "TIMECODESTART", "TIMECODEGOP", "FORCEFORMAT", "MANUALOPTIONSOUTPUT",
+             "SUBTITLECODECS")
+
+
+def _stage_factory(factory, out_dir: Path, wrapper: str, drop_keys) -> dict:
+    stage = dict(factory)
+    for key in drop_keys + _MUX_KEYS:
+        stage[key] = ""
+    stage.update({
+        "OUTPUTDIRECTORY": str(out_dir),
+        "VIDEOWRAPPER": wrapper,
+        "DISABLESUBS": "True",
+        "DISABLEDATA": "True",
+        "MULTIOUTPUT": "False",
+        "PARALLELSEGMENTS": "",
+    })
+    return stage
+
+
+def segment_command(core, input_path, factory, work_dir: Path, index: int, start: float,
+                    end: Optional[float]) -> List[str]:
+    """Video-only encode of [start, end) with the factory's video settings."""
+    out_dir = work_dir / f"seg{index:03d}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stage = _stage_factory(factory, out_dir, "mkv", _AUDIO_KEYS)
+    stage.update({"DISABLEAUDIO": "True", "ANALYZEAUDIO": "False", "ANALYZEVIDEO": "False"})
+    seek = f"-ss {start:.6f}" if start > 0 else ""
+    stage["MANUALOPTIONSINPUT"] = " ".join(p for p in (seek, factory.get("MANUALOPTIONSINPUT", "")) if p)
+    if end is not None:
+        stage["ENCODELENGTH"] = f"{max(0.0, end - start - BOUNDARY_GUARD):.6f}"
+    # per segment -ss/-t: not worth a template slot each
+    return [str(x) for x in core._build_ffmpeg_command_full(input_path, stage)]
+
+
+def audio_command(core, input_path, factory, work_dir: Path) -> List[str]:
+    """The whole programme's audio, once (runs the loudnorm first pass if configured)."""
+    out_dir = work_dir / "audio"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stage = _stage_factory(factory, out_dir, "mka", _VIDEO_KEYS)
+    stage.update({"DISABLEVIDEO": "True", "ANALYZEVIDEO": "False"})
+    return [str(x) for x in core._build_ffmpeg_command_full(input_path, stage)]
+
+
+def _concat_line(path: Path) -> str:
+    return "file '" + str(path).replace("'", "'\\''") + "'\n"
+
+
+def mux_command(factory, segment_files: Sequence[Path], audio_file: Optional[Path], list_path: Path,
+                output_path: Path) -> List[str]:
+    list_path.write_text("".join(_concat_line(p) for p in segment_files), encoding="utf-8")
+    cmd = ["ffmpeg", "-hide_banner", "-y", "-f", "concat", "-safe", "0", "-i", str(list_path)]
+    if audio_file is not None:
+        cmd += ["-i", str(audio_file), "-map", "0:v:0", "-map", "1:a"]
+    cmd += ["-c", "copy"]
+    movflags = (factory.get("MOVFLAGS") or "").strip()
+    if movflags:
+        cmd += ["-movflags", movflags]
+    tc_mode = (factory.get("TIMECODEMODE") or "").strip()
+    if tc_mode in ("DF", "NDF"):
+        default = "00:00:00;00" if tc_mode == "DF" else "00:00:00:00"
+        cmd += ["-timecode", (factory.get("TIMECODESTART") or "").strip() or default]
+    force_format = (factory.get("FORCEFORMAT") or "").strip()
+    if force_format:
+        cmd += ["-f", force_format]
+    cmd.append(str(output_path))
+    return cmd
+
+
+def output_path_for(factory, input_path) -> Path:
+    """Same name _build_ffmpeg_command_full gives the single-process output."""
+    ext = ((factory.get("VIDEOWRAPPER") or "").strip().lstrip(".")
+           or (factory.get("AUDIOFILEEXTENSION") or "").strip().lstrip(".") or "out")
+    return Path(factory.get("OUTPUTDIRECTORY") or ".") / f"{Path(input_path).stem}.{ext}"
+
+
+# ============================
+#           Runner
+# ============================
+class _Log:
+    """Line-locked writer shared by the segment processes of one job."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        if self.fh is None:
+            return
+        with self.lock:
+            self.fh.write(text)
+            self.fh.flush()
+
+
+def _run(cmd: List[str], log: _Log, tag: str) -> int:
+    if "-nostdin" not in cmd:
+        cmd = [cmd[0], "-nostdin", *cmd[1:]]
+    log.write(f"[{tag}] CMD: {' '.join(cmd)}\n")
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, errors="replace")
+    assert proc.stderr is not None
+    for line in proc.stderr:
+        log.write(f"[{tag}] {line}")
+    proc.wait()
+    log.write(f"[{tag}] exit {proc.returncode}\n")
+    return proc.returncode
+
+
+def run_jobs(jobs, workers: int, slot: Optional[Callable] = None, run_one=None) -> int:
+    """
+    Run jobs (tag, cmd) with up to `workers` at a time. The caller already
+    holds one concurrency slot and works the queue itself; each helper thread
+    takes another slot from slot(request) first (ffslots.concurrency_slot
+    semantics), so a cap of 1 degrades to serial instead of deadlocking.
+    Helpers still queued when the work runs out cancel their request.
+    Returns 0, or the first non-zero exit code.
+    """
+    pending = list(jobs)
+    pending.reverse()
+    cond = threading.Condition()
+    state = {"running": 0, "rc": 0}
+
+    def take():
+        with cond:
+            if not pending or state["rc"]:
+                return None
+            state["running"] += 1
+            return pending.pop()
+
+    def work():
+        while True:
+            job = take()
+            if job is None:
+                return
+            try:
+                rc = run_one(job)
+            except Exception:
+                rc = 1
+            with cond:
+                state["running"] -= 1
+                if rc and not state["rc"]:
+                    state["rc"] = rc
+                cond.notify_all()
+
+    def helper(request):
+        with (slot(request) if slot else nullcontext(True)) as granted:
+            if granted:
+                work()
+
+    requests = []
+    for _ in range(max(0, min(workers, len(pending)) - 1)):
+        request = SlotRequest()
+        requests.append(request)
+        threading.Thread(target=helper, args=(request,), daemon=True).start()
+    work()
+    # the queue is empty: helpers still waiting for a slot leave the broker's
+    # FIFO now instead of taking a slot only to release it
+    for request in requests:
+        request.cancel()
+    with cond:
+        cond.wait_for(lambda: state["running"] == 0)
+    return state["rc"]
+
+
+def run_segmented(core, input_path, factory, log_fh=None, slot: Optional[Callable] = None,
+                  work_root=None) -> Optional[int]:
+    """
+    Encode input_path through factory in PARALLELSEGMENTS pieces. Returns the
+    exit code, or None when the job should run as one process instead.
+    """
+    n = segment_count(factory)
+    if not n:
+        return None
+    why = ineligible_reason(core, core.smart_copy_factory(input_path, factory, announce=False))
+    if why:
+        print(f"[SEGMENTS] {Path(input_path).name}: single process ({why})")
+        return None
+    layout = probe_layout(core, input_path)
+    if not layout or not layout["has_video"] or layout["duration"] < 2 * MIN_SEGMENT_SEC:
+        return None
+    bounds = choose_boundaries(probe_keyframes(input_path), layout["start"], layout["duration"], n)
+    if len(bounds) < 2:
+        return None
+
+    log = _Log(log_fh)
+    output_path = output_path_for(factory, input_path)
+    work_dir = Path(tempfile.mkdtemp(prefix=f".ffseg-{Path(input_path).stem}-",
+                                     dir=str(work_root or output_path.parent)))
+    started = time.monotonic()
+    try:
+        jobs = []
+        seg_files = []
+        ends = bounds[1:] + [None]
+        video_factory = core.hw_pipeline_factory(input_path, factory)
+        for i, (start, end) in enumerate(zip(bounds, ends)):
+            cmd = segment_command(core, input_path, video_factory, work_dir, i, start, end)
+            jobs.append((f"seg {i + 1}/{len(bounds)}", cmd))
+            seg_files.append(Path(cmd[-1]))
+        audio_file = None
+        if layout["has_audio"] and not _truthy(factory.get("DISABLEAUDIO")):
+            cmd = audio_command(core, input_path, factory, work_dir)
+            jobs.insert(0, ("audio", cmd))  # runs alongside the first wave of segments
+            audio_file = Path(cmd[-1])
+
+        print(f"[SEGMENTS] {Path(input_path).name}: {len(bounds)} video segments"
+              f"{' + audio' if audio_file else ''}, up to {n} at a time")
+        rc = run_jobs(jobs, n, slot, lambda job: _run(job[1], log, job[0]))
+        if rc == 0:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            rc = _run(mux_command(factory, seg_files, audio_file, work_dir / "concat.txt", output_path),
+                      log, "concat")
+        print(f"[SEGMENTS] {Path(input_path).name}: exit {rc} after {time.monotonic() - started:.1f}s")
+        return rc
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
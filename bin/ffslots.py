@@ -0,0 +1,426 @@
+# ffslots.py
+#
+# Concurrency slot broker for FreeFactoryConversion.py.
+#
+# One broker process (or the --service process) owns a Unix socket under
+# ~/.freefactory/run. Every conversion connects, asks for a CPU or GPU slot and
+# blocks in recv() until the broker answers GRANT. Waiters are granted in
+# arrival order per slot type. A slot is held for as long as the connection is
+# open, so when a job exits (or is SIGKILLed) the kernel closes the socket and
+# the broker reclaims the slot immediately -- nothing to poll, nothing to leak.
+#
+#   python3 ffslots.py --broker     run a broker in the foreground
+#   python3 ffslots.py --status     print current holders / waiters
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from ffstate import run_dir
+
+SOCKET_NAME = "slots.sock"
+LOCK_NAME = "slots-broker.lock"
+BROKER_IDLE_EXIT_SEC = 30.0     # spawned brokers exit after this long with no clients
+CONNECT_TIMEOUT_SEC = 10.0
+
+
+def _cap(cfg, key: str, default) -> Optional[int]:
+    try:
+        v = int(str(cfg.get(key, default)).strip())
+        return None if v <= 0 else v  # 0/None => unlimited
+    except Exception:
+        return None
+
+
+def read_caps(cfg=None) -> Dict[str, Optional[int]]:
+    """Current caps from ~/.freefactoryrc (re-read so edits apply without restarts)."""
+    if cfg is None:
+        from config_manager import ConfigManager  # type: ignore
+        cfg = ConfigManager()
+    return {
+        "total": _cap(cfg, "MaxConcurrentJobs", 0),
+        "cpu":   _cap(cfg, "MaxConcurrentJobsCPU", 5),
+        "gpu":   _cap(cfg, "MaxConcurrentJobsGPU", 2),
+    }
+
+
+# ============================
+#          Broker
+# ============================
+class SlotBroker:
+    """Single-threaded selector loop that hands out slots over a Unix socket."""
+
+    def __init__(self, sock_path: Path, idle_exit: Optional[float] = None):
+        self.sock_path = sock_path
+        self.idle_exit = idle_exit
+        self.sel = selectors.DefaultSelector()
+        self.buffers: Dict[socket.socket, bytes] = {}
+        self.holders: Dict[socket.socket, tuple] = {}     # conn -> (kind, pid, since)
+        self.waiters: deque = deque()                      # (conn, kind, pid)
+        self.caps = read_caps()
+        self._lock_file = None
+
+    def _claim(self) -> bool:
+        """Take the broker lock; False if another broker is already running."""
+        self._lock_file = open(self.sock_path.with_name(LOCK_NAME), "a+")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def serve_forever(self) -> bool:
+        if self._lock_file is None and not self._claim():
+            return False
+
+        # We own the lock, so any existing socket file is stale.
+        try:
+            self.sock_path.unlink()
+        except FileNotFoundError:
+            pass
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.sock_path))
+        server.listen(128)
+        server.setblocking(False)
+        self.sel.register(server, selectors.EVENT_READ, None)
+
+        idle_since = time.monotonic()
+        try:
+            while True:
+                timeout = None
+                if self.idle_exit is not None:
+                    timeout = max(0.5, self.idle_exit / 2)
+                for key, _ in self.sel.select(timeout):
+                    if key.data is None:
+                        self._accept(server)
+                    else:
+                        self._read(key.fileobj)
+
+                if self.buffers:
+                    idle_since = time.monotonic()
+                elif self.idle_exit is not None and time.monotonic() - idle_since >= self.idle_exit:
+                    return True
+        finally:
+            # Stop listening and remove the socket while the lock is still ours
+            # (a successor's socket must never be unlinked), then give up the
+            # lock right away: a client that finds no socket spawns the successor
+            # as soon as the lock is free (see _connect).
+            self.sel.unregister(server)
+            server.close()
+            try:
+                self.sock_path.unlink()
+            except FileNotFoundError:
+                pass
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+            self.sel.close()
+
+    def _accept(self, server: socket.socket) -> None:
+        try:
+            conn, _ = server.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self.buffers[conn] = b""
+        self.sel.register(conn, selectors.EVENT_READ, "client")
+
+    def _drop(self, conn: socket.socket) -> None:
+        """Client went away: reclaim its slot or its place in line."""
+        try:
+            self.sel.unregister(conn)
+        except Exception:
+            pass
+        conn.close()
+        self.buffers.pop(conn, None)
+        released = self.holders.pop(conn, None) is not None
+        self.waiters = deque(w for w in self.waiters if w[0] is not conn)
+        if released:
+            self._grant()
+
+    def _read(self, conn: socket.socket) -> None:
+        try:
+            chunk = conn.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._drop(conn)
+            return
+
+        buf = self.buffers.get(conn, b"") + chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            self._handle(conn, line.decode("utf-8", "replace").split())
+            if conn not in self.buffers:
+                return
+        self.buffers[conn] = buf
+
+    def _handle(self, conn: socket.socket, parts: list) -> None:
+        if not parts:
+            return
+        cmd = parts[0].upper()
+        if cmd == "ACQUIRE" and len(parts) >= 2:
+            kind = "gpu" if parts[1].lower() == "gpu" else "cpu"
+            pid = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+            self.caps = read_caps()
+            self.waiters.append((conn, kind, pid))
+            self._grant()
+        elif cmd == "RELEASE":
+            self._drop(conn)
+        elif cmd == "STATUS":
+            self._send(conn, json.dumps(self.status()) + "\n")
+
+    def _count(self, kind: Optional[str] = None) -> int:
+        if kind is None:
+            return len(self.holders)
+        return sum(1 for k, _pid, _t in self.holders.values() if k == kind)
+
+    def _has_room(self, kind: str) -> bool:
+        total_cap = self.caps["total"]
+        kind_cap = self.caps[kind]
+        if total_cap is not None and self._count() >= total_cap:
+            return False
+        return kind_cap is None or self._count(kind) < kind_cap
+
+    def _grant(self) -> None:
+        # FIFO per slot type: a waiting GPU job never blocks a CPU job behind it,
+        # but no job is ever granted ahead of an earlier job of its own type.
+        blocked = set()
+        still_waiting = deque()
+        dead = []
+        for conn, kind, pid in self.waiters:
+            if kind in blocked or not self._has_room(kind):
+                blocked.add(kind)
+                still_waiting.append((conn, kind, pid))
+            elif self._send(conn, "GRANT\n"):
+                self.holders[conn] = (kind, pid, time.time())
+            else:
+                dead.append(conn)
+        self.waiters = still_waiting
+        for conn in dead:
+            self._drop(conn)
+
+    def _send(self, conn: socket.socket, text: str) -> bool:
+        try:
+            conn.sendall(text.encode("utf-8"))
+            return True
+        except OSError:
+            return False
+
+    def status(self) -> dict:
+        return {
+            "caps": self.caps,
+            "holders": [{"kind": k, "pid": p, "since": t} for k, p, t in self.holders.values()],
+            "waiting": [{"kind": k, "pid": p} for _c, k, p in self.waiters],
+        }
+
+
+def start_broker_thread() -> bool:
+    """
+    Host the broker inside the calling process (used by --service so the
+    broker lives exactly as long as the service). False if one already runs.
+    """
+    broker = SlotBroker(run_dir() / SOCKET_NAME)
+    if not broker._claim():
+        return False
+    t = threading.Thread(target=broker.serve_forever, name="ffslots-broker", daemon=True)
+    t.start()
+    return True
+
+
+def _broker_lock_free() -> bool:
+    """True when no broker holds the lock, i.e. a spawned broker can take over."""
+    try:
+        with open(run_dir() / LOCK_NAME, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)  # released again on close
+    except OSError:
+        return False
+    return True
+
+
+def _spawn_broker() -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--broker", "--idle-exit", str(BROKER_IDLE_EXIT_SEC)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+# ============================
+#          Client
+# ============================
+def _connect(timeout: float = CONNECT_TIMEOUT_SEC) -> Optional[socket.socket]:
+    path = run_dir() / SOCKET_NAME
+    deadline = time.monotonic() + timeout
+    child = None
+    while True:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(str(path))
+            return s
+        except OSError:
+            s.close()
+        # Spawn whenever the lock is free and our last spawn is gone: a broker
+        # that was idle-exiting when we looked (so our first spawn lost the lock
+        # to it and quit) is replaced instead of waited out.
+        if (child is None or child.poll() is not None) and _broker_lock_free():
+            child = _spawn_broker()
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)  # only while a spawned broker claims the lock and binds its socket
+
+
+class SlotRequest:
+    """
+    A concurrency_slot() wait that another thread can call off. cancel()
+    shuts down the connection of a request still queued, so it leaves the
+    broker's FIFO at once; a slot already granted is kept until its
+    with-block ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: Optional[socket.socket] = None
+        self.cancelled = False
+
+    def _attach(self, conn: socket.socket) -> bool:
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._conn = conn
+            return True
+
+    def _detach(self) -> bool:
+        """Stop tracking the connection (before it is closed); False if cancelled."""
+        with self._lock:
+            self._conn = None
+            return not self.cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                try:
+                    self._conn.shutdown(socket.SHUT_RDWR)  # wakes the recv() below
+                except OSError:
+                    pass
+
+
+@contextmanager
+def concurrency_slot(is_gpu: bool, request: Optional[SlotRequest] = None):
+    """
+    Block (without polling) until the broker grants a CPU or GPU slot. Yields
+    True once it is held (or the broker is unavailable), False when request
+    was cancelled first.
+    """
+    kind = "gpu" if is_gpu else "cpu"
+    conn = None
+    granted = True
+    while conn is None:
+        if request is not None and request.cancelled:
+            granted = False
+            break
+        conn = _connect()
+        if conn is None:
+            print("[ffslots] WARNING: slot broker unavailable; running without concurrency gate", file=sys.stderr)
+            break
+        if request is not None and not request._attach(conn):
+            conn.close()
+            conn = None
+            granted = False
+            break
+        try:
+            conn.sendall(f"ACQUIRE {kind} {os.getpid()}\n".encode("utf-8"))
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = conn.recv(64)
+                if not chunk:
+                    break
+                reply += chunk
+        except OSError:
+            reply = b""
+        if request is not None and not request._detach():
+            conn.close()
+            conn = None
+            granted = False
+            break
+        if reply.strip() != b"GRANT":
+            # broker went away while we waited; queue again with its successor
+            conn.close()
+            conn = None
+
+    try:
+        yield granted
+    finally:
+        if conn is not None:
+            conn.close()  # closing the connection releases the slot
+
+
+def broker_status() -> Optional[dict]:
+    path = run_dir() / SOCKET_NAME
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(str(path))
+        s.sendall(b"STATUS\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data.decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    finally:
+        s.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="FreeFactory concurrency slot broker")
+    ap.add_argument("--broker", action="store_true", help="Run the slot broker in the foreground")
+    ap.add_argument("--idle-exit", type=float, default=None, help="Exit after N idle seconds")
+    ap.add_argument("--status", action="store_true", help="Print broker status as JSON")
+    args = ap.parse_args(argv)
+
+    if args.status:
+        st = broker_status()
+        if st is None:
+            print("No slot broker running.")
+            return 1
+        print(json.dumps(st, indent=2))
+        return 0
+
+    if args.broker:
+        broker = SlotBroker(run_dir() / SOCKET_NAME, idle_exit=args.idle_exit)
+        if not broker.serve_forever():
+            print("A slot broker is already running.", file=sys.stderr)
+            return 1
+        return 0
+
+    ap.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    # Make config_manager importable when spawned as a script.
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    raise SystemExit(main())
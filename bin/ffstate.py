@@ -0,0 +1,35 @@
+# ffstate.py
+#
+# Per-user state under ~/.freefactory (caches, the slot broker's socket, the
+# watch ledger) and the file identity key the caches are indexed by, shared
+# so each module does not carry its own copy.
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def state_dir() -> Path:
+    # user-writable, no root needed
+    d = Path.home() / ".freefactory"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def cache_dir() -> Path:
+    d = state_dir() / "cache"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def run_dir() -> Path:
+    d = state_dir() / "run"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def file_identity(path) -> str:
+    """(st_dev, st_ino, size, mtime_ns) of path as a cache key; raises OSError."""
+    st = os.stat(path)
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
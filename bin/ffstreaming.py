@@ -1,19 +1,63 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import subprocess
 import shlex
+import threading
+import time
+from collections import deque
 from pathlib import Path
 from PyQt6.QtWidgets import QMessageBox
 
+from ffprogress import parse_stats_line
+
+LOG_RING_LINES = 2000       # per stream: recent log kept in memory
+LOG_BATCH_INTERVAL = 0.25   # seconds between batched `output` emits
+
+
 class StreamWorker(QThread):
+    """
+    Runs one streaming ffmpeg. Log lines go to a bounded ring buffer instead
+    of one signal per line; -stats lines are parsed into `stats` and kept out
+    of the log.
+
+    The owner either polls drain()/stats on a UI timer (batch_interval=None),
+    or receives the pending lines as one `output` emit per batch_interval.
+    """
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     output = pyqtSignal(str)
 
-    def __init__(self, command: list[str], rtmp_url: str):
+    def __init__(self, command: list[str], rtmp_url: str, batch_interval=LOG_BATCH_INTERVAL):
         super().__init__()
         self.command = command
         self.rtmp_url = rtmp_url
         self.process = None
+        self.batch_interval = batch_interval
+        self.log = deque(maxlen=LOG_RING_LINES)
+        self.stats = {}             # latest parsed -stats counters (see ffprogress.parse_stats_line)
+        self.stats_seq = 0          # bumped on every stats update
+        self.dropped_lines = 0      # pending lines lost because nobody drained in time
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def _push(self, line: str):
+        with self._lock:
+            self.log.append(line)
+            if len(self._pending) >= LOG_RING_LINES:
+                self._pending.popleft()
+                self.dropped_lines += 1
+            self._pending.append(line)
+
+    def drain(self) -> list[str]:
+        """Log lines received since the last drain (thread-safe)."""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+    def _emit_batch(self):
+        lines = self.drain()
+        if lines:
+            self.output.emit("\n".join(lines))
 
     def run(self):
         try:
@@ -21,11 +65,26 @@ class StreamWorker(QThread):
                 self.command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True
+                text=True,
+                errors="replace",
             )
-            for line in self.process.stdout:
-                self.output.emit(line.strip())
+            last_emit = time.monotonic()
+            for line in self.process.stdout:  # text mode splits -stats' \r updates too
+                line = line.strip()
+                if not line:
+                    continue
+                stats = parse_stats_line(line)
+                if stats is not None:
+                    self.stats = stats
+                    self.stats_seq += 1
+                else:
+                    self._push(line)
+                if self.batch_interval is not None and time.monotonic() - last_emit >= self.batch_interval:
+                    self._emit_batch()
+                    last_emit = time.monotonic()
             self.process.wait()
+            if self.batch_interval is not None:
+                self._emit_batch()
             self.finished.emit(self.rtmp_url)
         except Exception as e:
             self.error.emit(f"{self.rtmp_url}: {e}")
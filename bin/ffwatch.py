@@ -0,0 +1,274 @@
+# ffwatch.py
+#
+# Directory watching and the job ledger behind FreeFactoryConversion --watch.
+#
+# InotifyWatcher talks to the kernel through ctypes (no inotifywait child, no
+# extra package) and reports files as they are closed after writing or moved
+# into a notify folder. Where inotify isn't available (non-Linux, NFS/SMB
+# mounts that never deliver events, watch limit reached) PollWatcher rescans
+# on an interval and reports only entries whose (inode, mtime, size) changed.
+# Both answer poll(timeout) -> (paths, rescan); rescan=True means events were
+# lost (queue overflow, folder recreated) and the caller should rescan.
+#
+# JobLedger remembers which file versions each factory has already converted,
+# in SQLite, so a restarted watcher only picks up new or changed files:
+#
+#   ledger = JobLedger()
+#   if not ledger.done("MyFactory", path, sig): ... ledger.record("MyFactory", path, sig, rc)
+#
+# Stored in ~/.freefactory/jobs.sqlite3.
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ffstate import state_dir
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+# Same editor/partial-download leftovers the notify service skips
+IGNORED_SUFFIXES = (".swp", "~", ".tmp", ".part", ".crdownload", ".kate-swp")
+IGNORED_NAMES = (".DS_Store",)
+
+
+def ignored(name: str) -> bool:
+    return name.startswith(".") or name.endswith(IGNORED_SUFFIXES) or name in IGNORED_NAMES
+
+
+def scan_dir(folder: Path) -> List[Path]:
+    """Regular files directly in folder (one scandir, no per-file stat)."""
+    try:
+        with os.scandir(folder) as it:
+            return [Path(e.path) for e in it if e.is_file() and not ignored(e.name)]
+    except OSError:
+        return []
+
+
+# ============================
+#          Watchers
+# ============================
+class InotifyWatcher:
+    """Non-recursive inotify watch on a set of folders (ctypes, Linux only)."""
+
+    def __init__(self, folders: Sequence[Path]):
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(name, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wds: Dict[int, Path] = {}
+        self._lost: List[Path] = []   # folders whose watch went away, re-added on poll
+        try:
+            for folder in folders:
+                self.add(Path(folder))
+        except OSError:
+            self.close()
+            raise
+
+    def add(self, folder: Path) -> None:
+        wd = self._add(self.fd, os.fsencode(str(folder)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {folder}: {os.strerror(err)}")
+        self._wds[wd] = folder
+
+    def poll(self, timeout: float) -> Tuple[List[Path], bool]:
+        rescan = self._rewatch()
+        try:
+            ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        except InterruptedError:
+            return [], rescan
+        if not ready:
+            return [], rescan
+        try:
+            buf = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return [], rescan
+
+        paths: List[Path] = []
+        offset = 0
+        while offset + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+            raw = buf[offset + _EVENT.size: offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            folder = self._wds.get(wd)
+            if folder is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self._wds.pop(wd, None)
+                self._lost.append(folder)
+                continue
+            name = os.fsdecode(raw.rstrip(b"\0"))
+            if name and not mask & IN_ISDIR and not ignored(name):
+                paths.append(folder / name)
+        return paths, rescan
+
+    def _rewatch(self) -> bool:
+        """Watch recreated folders again; True when one came back (rescan it)."""
+        if not self._lost:
+            return False
+        back = False
+        for folder in list(self._lost):
+            if folder.is_dir():
+                try:
+                    self.add(folder)
+                except OSError:
+                    continue
+                self._lost.remove(folder)
+                back = True
+        return back
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollWatcher:
+    """Interval rescan for folders inotify can't watch."""
+
+    def __init__(self, folders: Sequence[Path], interval: float = 2.0):
+        self.folders = [Path(f) for f in folders]
+        self.interval = max(0.1, interval)
+        self._seen: Dict[Path, Tuple[int, int, int]] = {}
+        self._next = 0.0
+        self._scan()
+
+    def _scan(self) -> List[Path]:
+        changed: List[Path] = []
+        current: Dict[Path, Tuple[int, int, int]] = {}
+        for folder in self.folders:
+            try:
+                it = os.scandir(folder)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if ignored(e.name):
+                        continue
+                    try:
+                        if not e.is_file():
+                            continue
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    p = Path(e.path)
+                    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+                    current[p] = key
+                    if self._seen.get(p) != key:
+                        changed.append(p)
+        self._seen = current
+        return changed
+
+    def poll(self, timeout: float) -> Tuple[List[Path], bool]:
+        wait = self._next - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, max(0.0, timeout)))
+            if time.monotonic() < self._next:
+                return [], False
+        self._next = time.monotonic() + self.interval
+        return self._scan(), False
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(folders: Sequence[Path], poll_interval: float = 2.0, use_inotify: bool = True):
+    """InotifyWatcher when the kernel allows it, PollWatcher otherwise."""
+    if use_inotify and hasattr(select, "select"):
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError) as e:
+            # AttributeError: libc without inotify_* (not Linux)
+            reason = e.strerror if isinstance(e, OSError) and e.strerror else str(e)
+            if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+                reason = "inotify watch limit reached (fs.inotify.max_user_watches)"
+            print(f"[watch] inotify unavailable ({reason}); polling every {poll_interval:g}s")
+    return PollWatcher(folders, poll_interval)
+
+
+# ============================
+#          Job ledger
+# ============================
+class JobLedger:
+    """Converted file versions per factory; survives restarts of the watcher."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else state_dir() / "jobs.sqlite3"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " factory TEXT, path TEXT, dev INTEGER, ino INTEGER, mtime_ns INTEGER, size INTEGER,"
+            " rc INTEGER, finished REAL, PRIMARY KEY (factory, path))"
+        )
+        self._db.commit()
+
+    def done(self, factory: str, path: Path, sig: Tuple[int, int, int, int]) -> bool:
+        """True when this exact version (dev, ino, mtime_ns, size) was already run."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT dev, ino, mtime_ns, size FROM jobs WHERE factory=? AND path=?",
+                (factory, str(path)),
+            ).fetchone()
+        return row is not None and tuple(row) == tuple(sig)
+
+    def record(self, factory: str, path: Path, sig: Tuple[int, int, int, int], rc: int) -> None:
+        """Failed runs are recorded too: a broken file waits until it changes."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs(factory, path, dev, ino, mtime_ns, size, rc, finished)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (factory, str(path), *sig, rc, time.time()),
+            )
+            self._db.commit()
+
+    def forget_missing(self, factory: str, folder: Path, present: Iterable[Path]) -> int:
+        """Drop rows for files no longer in folder (deleted sources, renamed files)."""
+        keep = {str(p) for p in present}
+        prefix = str(folder).rstrip(os.sep) + os.sep
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path FROM jobs WHERE factory=? AND substr(path, 1, ?)=?",
+                (factory, len(prefix), prefix),
+            ).fetchall()
+            gone = [(factory, r[0]) for r in rows if r[0] not in keep and os.sep not in r[0][len(prefix):]]
+            self._db.executemany("DELETE FROM jobs WHERE factory=? AND path=?", gone)
+            self._db.commit()
+        return len(gone)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
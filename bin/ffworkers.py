@@ -0,0 +1,259 @@
+# ffworkers.py
+#
+# Qt worker threads used by the GUI (conversion queue, drop zone).
+# Kept out of core.py so the headless conversion service can import
+# FreeFactoryCore without pulling in PyQt6.
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal, QThread
+
+from ffprogress import ProgressParser, expected_duration, probe_duration, with_progress_pipe
+from mediaprobe import MediaProbe
+from ffcaptions import caption_report
+
+PROGRESS_EMIT_INTERVAL = 0.5  # seconds; keeps the GUI thread from being flooded
+TAIL_LINES = 500              # per stream, kept in memory for the UI / error dialogs
+REPORT_FLUSH_INTERVAL = 1.0   # seconds; partial reports are readable while ffmpeg runs
+
+
+class OutputSink:
+    """
+    Streams ffmpeg output to the report file as it arrives and keeps only the
+    last TAIL_LINES lines of each stream in memory, so a multi-hour job with
+    per-frame filter logging uses the same memory as a short one.
+    """
+
+    def __init__(self, report_path=None, tail_lines=TAIL_LINES, listener=None):
+        self.report_path = report_path
+        self.report_error = None
+        self.listener = listener  # e.g. AnalysisSession.feed, called for every line
+        self._tails = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+        self._lock = threading.Lock()
+        self._file = None
+        self._flushed_at = time.monotonic()
+        if report_path:
+            try:
+                self._file = open(report_path, "w", encoding="utf-8")
+            except OSError as e:
+                self.report_error = e
+
+    def write(self, line, stream="stderr"):
+        with self._lock:
+            self._tails[stream].append(line)
+            if self.listener:
+                self.listener(line)
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                now = time.monotonic()
+                if now - self._flushed_at >= REPORT_FLUSH_INTERVAL:
+                    self._file.flush()
+                    self._flushed_at = now
+            except OSError as e:
+                self.report_error = e
+                self._close_file()
+
+    def tail(self, stream="stderr") -> str:
+        with self._lock:
+            return "".join(self._tails[stream])
+
+    def _close_file(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._close_file()
+
+
+def run_with_progress(cmd, input_path=None, on_progress=None, on_start=None, sink=None) -> subprocess.CompletedProcess:
+    """
+    Run ffmpeg with "-progress pipe:1" and call on_progress(snapshot) while it
+    runs. on_start(popen) receives the process handle (pause/cancel).
+    Output lines go to `sink` (an OutputSink) as they arrive; the returned
+    CompletedProcess carries only the bounded tail of stdout/stderr.
+    """
+    duration = expected_duration([str(c) for c in cmd], probe_duration(input_path)) if input_path else None
+    parser = ProgressParser(duration)
+    run_cmd = with_progress_pipe(cmd)
+    sink = sink or OutputSink()
+
+    proc = subprocess.Popen(
+        run_cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        bufsize=1,
+    )
+    if on_start:
+        on_start(proc)
+
+    def _pump_stderr():
+        for line in proc.stderr:
+            sink.write(line, "stderr")
+
+    reader = threading.Thread(target=_pump_stderr, daemon=True)
+    reader.start()
+
+    last_emit = 0.0
+    for line in proc.stdout:
+        snap = parser.feed(line)
+        if snap is None:
+            if "=" not in line:
+                sink.write(line, "stdout")
+            continue
+        now = time.monotonic()
+        if on_progress and (snap["state"] == "end" or now - last_emit >= PROGRESS_EMIT_INTERVAL):
+            last_emit = now
+            on_progress(snap)
+
+    proc.wait()
+    reader.join()
+    sink.close()
+    return subprocess.CompletedProcess(run_cmd, proc.returncode, sink.tail("stdout"), sink.tail("stderr"))
+
+
+def _save_analysis(analysis, returncode) -> str:
+    """Write the structured analysis report; returns a warning line on failure."""
+    if analysis is None or returncode != 0:
+        return ""
+    try:
+        analysis.save(returncode)
+    except Exception as e:
+        return f"\n⚠️ Could not write analysis report: {e}\n"
+    return ""
+
+
+#=======For Drop Queue
+class FFmpegWorker(QThread):
+    result = pyqtSignal(int, str, str)  # returncode, stdout, stderr
+    progress = pyqtSignal(dict)         # ffprogress snapshot (fps, speed, out_time, percent)
+
+    def __init__(self, cmd, report_path=None, input_path=None, analysis=None, captions=None):
+        super().__init__()
+        self.cmd = cmd
+        self.report_path = report_path
+        self.input_path = input_path
+        self.analysis = analysis  # ffanalysis.AnalysisSession for report-mode jobs
+        self.captions = captions  # ffcaptions.CaptionStage, running alongside the encode
+        self.error = None
+        self.process = None
+        self.paused = False
+        self.cancelled = False
+        self.sink = None  # OutputSink while running; sink.tail() for a live view
+
+    def _attach(self, proc):
+        self.process = proc
+        if self.cancelled:
+            proc.terminate()
+        elif self.paused:
+            self._signal(signal.SIGSTOP)
+
+    def _signal(self, sig) -> bool:
+        proc = self.process
+        if proc is None or proc.poll() is not None:
+            return False
+        try:
+            os.kill(proc.pid, sig)
+            return True
+        except OSError:
+            return False
+
+    # Queue controls (called from the GUI thread)
+    def pause(self):
+        self.paused = True
+        self._signal(signal.SIGSTOP)
+
+    def resume(self):
+        self.paused = False
+        self._signal(signal.SIGCONT)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.paused:
+            self._signal(signal.SIGCONT)  # a stopped process can't act on SIGTERM
+        self._signal(signal.SIGTERM)
+
+    def run(self):
+        self.sink = OutputSink(self.report_path, listener=self.analysis.feed if self.analysis else None)
+        try:
+            process = run_with_progress(self.cmd, self.input_path, self.progress.emit,
+                                        on_start=self._attach, sink=self.sink)
+        except Exception as e:
+            self.sink.close()
+            self.result.emit(-1, "", f"⚠️ Exception: {e}")
+            return
+
+        if self.sink.report_error:
+            process.stderr += f"\n⚠️ Could not write report file: {self.sink.report_error}\n"
+        process.stderr += _save_analysis(self.analysis, process.returncode)
+        process.stdout += caption_report(self.captions)
+
+        self.result.emit(process.returncode, process.stdout, process.stderr)
+
+
+#=======Background duration probe for queue weighting
+class DurationProbeWorker(QThread):
+    probed = pyqtSignal(int, float)  # job_id, seconds (0.0 if unknown)
+    media = pyqtSignal(int, object)  # job_id, mediaprobe.MediaInfo (or None)
+
+    def __init__(self, jobs):
+        super().__init__()
+        self.jobs = list(jobs)  # [(job_id, path), ...]
+
+    def run(self):
+        for job_id, path in self.jobs:
+            if self.isInterruptionRequested():
+                return
+            info = MediaProbe.shared().probe(path)
+            self.probed.emit(job_id, (info.duration if info else None) or 0.0)
+            self.media.emit(job_id, info)
+
+
+#=======For Drop Zone (Main Tab FFmpegWorkerZone)
+class FFmpegWorkerZone(QObject):
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(dict)
+
+    def __init__(self, cmd, report_path=None, input_path=None, analysis=None, captions=None):
+        super().__init__()
+        self.cmd = cmd
+        self.report_path = report_path
+        self.input_path = input_path
+        self.analysis = analysis
+        self.captions = captions
+
+    def run(self):
+        sink = OutputSink(self.report_path, listener=self.analysis.feed if self.analysis else None)
+        try:
+            process = run_with_progress(self.cmd, self.input_path, self.progress.emit, sink=sink)
+
+            if sink.report_error:
+                process.stderr += f"\n⚠️ Could not write report file: {sink.report_error}\n"
+            process.stderr += _save_analysis(self.analysis, process.returncode)
+            captions = caption_report(self.captions)
+
+            if process.returncode == 0:
+                if self.report_path:
+                    self.finished.emit(f"✅ Analysis complete.\n📄 Report saved: {self.report_path}")
+                else:
+                    self.finished.emit(f"{captions}✅ Conversion complete.")
+            else:
+                self.error.emit(f"❌ Error:\n{process.stderr}")
+
+        except Exception as e:
+            sink.close()
+            self.error.emit(f"⚠️ Exception: {str(e)}")
@@ -0,0 +1,231 @@
+# hwpipeline.py
+#
+# Hardware decode/scale for GPU encoder factories (HWDECODE=True).
+#
+# FreeFactoryCore.which_accel only tells the slot gate that a factory encodes
+# on a GPU; without this the input is still decoded and scaled on the CPU and
+# every frame crosses the bus on its way to NVENC/QSV/VAAPI. plan() picks one
+# of three pipelines from the factory and the probed input (mediaprobe):
+#
+#   gpu       -hwaccel X -hwaccel_output_format X; scale=/VIDEOSIZE/pix fmt
+#             become scale_cuda / scale_vaapi / scale_qsv, frames stay on the GPU
+#   decode    -hwaccel X only; ffmpeg downloads the frames, so any software
+#             filter chain still works
+#   software  the command is left alone (codec/format the decoder can't do,
+#             input not probed, video copied or disabled, -hwaccel already set)
+#
+# apply() returns a factory dict for _build_ffmpeg_command_full, so plans are
+# plain data and can be checked without a GPU:
+#
+#   p = plan(factory, media_info, "NVENC")
+#   p.mode, p.input_args, p.vf   # 'gpu', ('-hwaccel', 'cuda', ...), 'scale_cuda=w=1280:h=720'
+#
+# HWDEVICE (optional) picks the device: a CUDA index, or a DRM render node for
+# VAAPI/QSV (default /dev/dri/renderD128 for VAAPI).
+
+from __future__ import annotations
+
+import re
+import shlex
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+_420_8 = frozenset({"yuv420p", "yuvj420p", "nv12"})
+_420_10 = frozenset({"yuv420p10le", "p010le"})
+
+
+class Family(NamedTuple):
+    hwaccel: str
+    scaler: str
+    upload: FrozenSet[str]                  # upload filters made redundant by hw frames
+    decodable: Dict[str, FrozenSet[str]]    # codec -> input pix_fmts the decoder takes
+    max_dim: int = 8192
+
+
+FAMILIES: Dict[str, Family] = {
+    "cuda": Family(
+        "cuda", "scale_cuda", frozenset({"hwupload_cuda", "hwupload"}),
+        {
+            "h264": _420_8, "hevc": _420_8 | _420_10, "av1": _420_8 | _420_10,
+            "vp9": _420_8 | _420_10, "vp8": _420_8, "mpeg2video": _420_8,
+            "mpeg1video": _420_8, "mpeg4": _420_8, "vc1": _420_8,
+        },
+    ),
+    "vaapi": Family(
+        "vaapi", "scale_vaapi", frozenset({"hwupload"}),
+        {
+            "h264": _420_8, "hevc": _420_8 | _420_10, "av1": _420_8 | _420_10,
+            "vp9": _420_8 | _420_10, "vp8": _420_8, "mpeg2video": _420_8, "vc1": _420_8,
+        },
+    ),
+    "qsv": Family(
+        "qsv", "scale_qsv", frozenset({"hwupload"}),
+        {
+            "h264": _420_8, "hevc": _420_8 | _420_10, "av1": _420_8 | _420_10,
+            "vp9": _420_8 | _420_10, "mpeg2video": _420_8, "vc1": _420_8,
+        },
+    ),
+}
+
+# FreeFactoryCore.which_accel tag -> decode family (AMF has no portable hwaccel)
+ACCEL_FAMILY = {"NVENC": "cuda", "CUDA": "cuda", "VAAPI": "vaapi", "Intel QSV": "qsv"}
+
+# -pix_fmt for the encoder -> format= of the hw scaler
+HW_PIX_FMT = {"yuv420p": "nv12", "nv12": "nv12", "yuv420p10le": "p010le", "p010le": "p010le"}
+
+# GPU encoders without 10-bit input: 10-bit frames kept on the GPU need format=nv12
+ENCODERS_8BIT = frozenset({
+    "h264_nvenc", "nvenc", "nvenc_h264", "h264_qsv", "h264_vaapi",
+    "mpeg2_qsv", "mpeg2_vaapi", "vp8_vaapi", "mjpeg_qsv", "mjpeg_vaapi",
+})
+
+_DIM = re.compile(r"^(-1|-2|\d{1,5}|iw|ih)$")
+
+
+class HwPlan(NamedTuple):
+    mode: str                           # "gpu", "decode" or "software"
+    accel: str = ""                     # "cuda", "vaapi", "qsv"
+    input_args: Tuple[str, ...] = ()
+    vf: str = ""                        # replacement VIDEOFILTERS in gpu mode
+    reason: str = ""
+
+    def describe(self) -> str:
+        if self.mode == "software":
+            return f"software ({self.reason})"
+        if self.mode == "decode":
+            return f"{self.accel} decode, software filters ({self.reason})"
+        return f"{self.accel} decode" + (f" + {self.vf}" if self.vf else "") + ", frames stay on the GPU"
+
+
+def _truthy(value) -> bool:
+    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _device_args(family: Family, device: str) -> Tuple[str, ...]:
+    if family.hwaccel == "vaapi":
+        return ("-hwaccel_device", device or "/dev/dri/renderD128")
+    if family.hwaccel == "qsv" and device:
+        return ("-qsv_device", device)
+    if device:
+        return ("-hwaccel_device", device)
+    return ()
+
+
+def _parse_scale_args(args: str) -> Optional[dict]:
+    """'1280:720' / 'w=1280:h=-2' / 'format=nv12' -> {w, h, format}; None if not plain."""
+    out: dict = {}
+    positional = ("w", "h")
+    for i, part in enumerate(p for p in args.split(":") if p):
+        key, eq, value = part.partition("=")
+        if not eq:
+            if i >= len(positional):
+                return None
+            key, value = positional[i], part
+        key = {"width": "w", "height": "h"}.get(key, key)
+        if key in ("w", "h") and _DIM.match(value):
+            out[key] = value
+        elif key == "format" and value in HW_PIX_FMT.values():
+            out[key] = value
+        else:
+            return None  # flags=, interp options, expressions: keep the software scaler
+    return out
+
+
+def gpu_filter(family: Family, vf: str, size: str, pix_fmt: str, default_format: str = "") -> Optional[str]:
+    """
+    The hw scaler equivalent of VIDEOFILTERS + VIDEOSIZE + VIDEOPIXFORMAT, ''
+    when nothing is needed, or None when the chain has to run in software.
+    default_format is the hw format= used when none of them sets one.
+    """
+    if any(c in vf for c in "[];'\"\\"):
+        return None
+    scale: dict = {}
+    for item in (f.strip() for f in vf.split(",")):
+        if not item or item == "null" or item in family.upload:
+            continue
+        name, _, args = item.partition("=")
+        if name == "format":
+            fmt = HW_PIX_FMT.get(args.strip())
+            if fmt is None:
+                return None
+            scale["format"] = fmt
+        elif name in ("scale", family.scaler):
+            parsed = _parse_scale_args(args)
+            if parsed is None or ("w" in parsed and "w" in scale):
+                return None
+            scale.update(parsed)
+        else:
+            return None
+
+    if size and "w" not in scale:
+        w, _, h = size.lower().partition("x")
+        if not (w.isdigit() and h.isdigit()):
+            return None
+        scale.update(w=w, h=h)
+    if pix_fmt:
+        fmt = HW_PIX_FMT.get(pix_fmt)
+        if fmt is None:
+            return None
+        scale["format"] = fmt
+    if default_format and "format" not in scale:
+        scale["format"] = default_format
+    if not scale:
+        return ""
+    return family.scaler + "=" + ":".join(f"{k}={scale[k]}" for k in ("w", "h", "format") if k in scale)
+
+
+def plan(factory, info, accel_tag: str) -> HwPlan:
+    """Decode/scale pipeline for this factory, input (MediaInfo) and which_accel tag."""
+    family = FAMILIES.get(ACCEL_FAMILY.get(accel_tag, ""))
+    if family is None:
+        return HwPlan("software", reason=f"no hw decode path for {accel_tag or 'CPU'} encoders")
+    vcodec = (factory.get("VIDEOCODECS") or "").strip().lower()
+    if not vcodec or vcodec == "copy" or _truthy(factory.get("DISABLEVIDEO")):
+        return HwPlan("software", reason="no video encode")
+    manual_in = shlex.split(factory.get("MANUALOPTIONSINPUT") or "")
+    if any(tok.startswith(("-hwaccel", "-init_hw_device", "-qsv_device", "-vaapi_device")) for tok in manual_in):
+        return HwPlan("software", reason="MANUALOPTIONSINPUT sets up the device itself")
+    if info is None or not info.video:
+        return HwPlan("software", reason="input not probed")
+
+    stream = info.video[0]
+    fmts = family.decodable.get(stream.codec_name)
+    if fmts is None:
+        return HwPlan("software", reason=f"{family.hwaccel} can't decode {stream.codec_name}")
+    if stream.pix_fmt not in fmts:
+        return HwPlan("software", reason=f"{family.hwaccel} can't decode {stream.codec_name} {stream.pix_fmt}")
+    if max(stream.width or 0, stream.height or 0) > family.max_dim:
+        return HwPlan("software", reason=f"{stream.width}x{stream.height} above decoder limit")
+
+    accel = family.hwaccel
+    args = ("-hwaccel", accel) + _device_args(family, (factory.get("HWDEVICE") or "").strip())
+    manual_out = shlex.split(factory.get("MANUALOPTIONSOUTPUT") or "")
+    if _truthy(factory.get("MULTIOUTPUT")) or any(
+        tok in ("-vf", "-filter_complex", "-s", "-pix_fmt") or tok.startswith(("-filter:", "-filter_complex"))
+        for tok in manual_out
+    ):
+        return HwPlan("decode", accel, args, reason="MANUALOPTIONSOUTPUT filters")
+
+    vf = (factory.get("VIDEOFILTERS") or "").strip()
+    size = (factory.get("VIDEOSIZE") or "").strip()
+    pix_fmt = (factory.get("VIDEOPIXFORMAT") or "").strip()
+    if (vf or size) and stream.field_order not in ("", "progressive", "unknown"):
+        return HwPlan("decode", accel, args, reason=f"{stream.field_order} input")
+    # the software path converts 10-bit input for an 8-bit encoder by itself; on the GPU the scaler has to
+    to_8bit = "nv12" if stream.pix_fmt in _420_10 and vcodec in ENCODERS_8BIT else ""
+    hw_vf = gpu_filter(family, vf, size, pix_fmt, to_8bit)
+    if hw_vf is None:
+        return HwPlan("decode", accel, args, reason="software-only filters")
+    return HwPlan("gpu", accel, args + ("-hwaccel_output_format", accel), vf=hw_vf)
+
+
+def apply(factory, hw: HwPlan):
+    """Factory dict that builds the planned pipeline (the same dict in software mode)."""
+    if hw.mode == "software":
+        return factory
+    out = dict(factory)
+    out["MANUALOPTIONSINPUT"] = " ".join(
+        p for p in (shlex.join(hw.input_args), (factory.get("MANUALOPTIONSINPUT") or "").strip()) if p
+    )
+    if hw.mode == "gpu":
+        out.update(VIDEOFILTERS=hw.vf, VIDEOSIZE="", VIDEOPIXFORMAT="")
+    return out
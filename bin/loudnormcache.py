@@ -0,0 +1,140 @@
+# loudnormcache.py
+#
+# Persistent cache of loudnorm first-pass measurements.
+#
+# The first pass decodes the whole programme just to learn its loudness, and
+# the answer only depends on the audio and the loudnorm options. Entries are
+# keyed by file identity (st_dev, st_ino, size, mtime_ns) plus the analysis
+# filter text, so re-running a factory or sending the same master through
+# several delivery factories with the same targets skips the decode.
+#
+# With LoudnormCacheHash=True (~/.freefactoryrc) entries are also indexed by a
+# BLAKE2b digest of the file contents, which survives copies, renames and
+# touch(1). The digest is only computed when the identity lookup misses, and
+# a miss remembers it for the put() that follows the first pass.
+#
+# Stored in ~/.freefactory/cache/loudnorm_measurements.json.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from ffstate import cache_dir, file_identity
+
+CACHE_VERSION = 1
+MAX_ENTRIES = 5000
+MAX_PENDING_DIGESTS = 64
+HASH_CHUNK = 1 << 20
+
+
+def content_hash(path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LoudnormCache:
+    """measured-JSON lookups by (file identity | content hash, analysis filter)."""
+
+    def __init__(self, hash_content: bool = False, cache_path: Optional[Path] = None):
+        self.hash_content = hash_content
+        self.cache_path = cache_path or (cache_dir() / "loudnorm_measurements.json")
+        self._lock = threading.Lock()
+        self._entries: dict = {}   # "identity|filter" -> {"measured", "hash", "used"}
+        self._by_hash: dict = {}   # "hash|filter" -> measured
+        self._digests: dict = {}   # identity -> digest of a hashed miss, until put()
+        self._mtime_ns: Optional[int] = None
+
+    # ---------- persistence ----------
+    def _reload_if_changed(self) -> None:
+        """Pick up entries written by other processes (service workers, GUI)."""
+        try:
+            mtime = self.cache_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime_ns:
+            return
+        try:
+            raw = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if raw.get("version") != CACHE_VERSION:
+            return
+        self._entries = raw.get("entries") or {}
+        self._by_hash = raw.get("by_hash") or {}
+        self._mtime_ns = mtime
+
+    def _save(self) -> None:
+        if len(self._entries) > MAX_ENTRIES:
+            keep = sorted(self._entries.items(), key=lambda kv: kv[1].get("used", 0))[-MAX_ENTRIES:]
+            self._entries = dict(keep)
+            live = {f"{e['hash']}|{k.split('|', 1)[1]}" for k, e in self._entries.items() if e.get("hash")}
+            self._by_hash = {k: v for k, v in self._by_hash.items() if k in live}
+
+        payload = {"version": CACHE_VERSION, "entries": self._entries, "by_hash": self._by_hash}
+        tmp = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+            self._mtime_ns = self.cache_path.stat().st_mtime_ns
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    # ---------- queries ----------
+    def get(self, input_path, analysis_filter: str) -> Optional[dict]:
+        try:
+            identity = file_identity(input_path)
+        except OSError:
+            return None
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(f"{identity}|{analysis_filter}")
+            if entry:
+                entry["used"] = time.time()
+                return dict(entry["measured"])
+            if not self.hash_content:
+                return None
+
+        digest = content_hash(input_path)  # outside the lock; this reads the whole file
+        with self._lock:
+            measured = self._by_hash.get(f"{digest}|{analysis_filter}")
+            if measured is None:
+                if len(self._digests) >= MAX_PENDING_DIGESTS:
+                    self._digests.pop(next(iter(self._digests)))
+                self._digests[identity] = digest
+                return None
+            # remember the new identity so the next lookup is a stat() again
+            self._entries[f"{identity}|{analysis_filter}"] = {
+                "measured": measured, "hash": digest, "used": time.time(),
+            }
+            self._save()
+            return dict(measured)
+
+    def put(self, input_path, analysis_filter: str, measured: dict) -> None:
+        try:
+            identity = file_identity(input_path)
+            with self._lock:
+                digest = self._digests.pop(identity, None)
+            if digest is None and self.hash_content:
+                digest = content_hash(input_path)
+        except OSError:
+            return
+        with self._lock:
+            self._reload_if_changed()
+            self._entries[f"{identity}|{analysis_filter}"] = {
+                "measured": dict(measured), "hash": digest, "used": time.time(),
+            }
+            if digest:
+                self._by_hash[f"{digest}|{analysis_filter}"] = dict(measured)
+            self._save()
@@ -55,7 +55,14 @@ from PyQt6.uic import loadUi
 from PyQt6 import uic
 
 from config_manager import ConfigManager
-from core import FFmpegWorker, FreeFactoryCore, FFmpegWorkerZone
+from core import FreeFactoryCore
+from factorystore import FactoryStore
+from ffworkers import FFmpegWorker, FFmpegWorkerZone, DurationProbeWorker
+from ffslots import read_caps
+from streamsupervisor import POLICY_KEYS as STREAM_POLICY_KEYS, RestartPolicy, StreamHealth
+from ffprogress import format_progress, below_realtime, format_stream_stats
+from mediaprobe import describe as describe_media
+from ffcaptions import start_caption_stage
 from droptextedit import DropTextEdit
 from ffmpeghelp import FFmpegHelpDialog
 from version import get_version
@@ -99,6 +106,12 @@ def asset(*parts: str) -> Path:
 
 
 STATUS_COL = 5
+STREAM_UI_REFRESH_MS = 250     # stream log/status refresh rate
+STREAM_LOG_MAX_BLOCKS = 5000   # lines kept in the stream log widget
+# Factory keys without widgets; save_current_factory keeps them from the file on disk
+HAND_EDITED_KEYS = STREAM_POLICY_KEYS + (
+    "SMARTCOPY", "PARALLELSEGMENTS", "HWDECODE", "HWDEVICE", "CAPTIONSOURCE", "CAPTIONFORMATS",
+)
 
 ######################################
 # Add the Option to specify a .ui file
@@ -283,9 +296,16 @@ class FreeFactoryApp(QMainWindow):
         self.factory_dirty = False
         self.active_threads = []
         self.queue_paused = False
+        self.queue_jobs = {}              # job_id -> {"factory", "kind", "duration", "fraction"}
+        self.queue_workers = {}           # job_id -> running FFmpegWorker
+        self.queue_probe_workers = []
+        self._queue_job_seq = 0
         self.active_streams = {}
         self.active_streams_by_row = {}   # row_uid -> worker
         self._stream_row_seq = 0          # monotonic uid for stream rows
+        self.stream_hubs = {}             # hub_id -> shared fan-out encode (see _start_stream_hub)
+        self._stream_hub_seq = 0
+        self.stream_health = {}           # row_uid -> StreamHealth (stall detection / auto-restart)
         self._is_closing = False          # Prevents noisey exiting
         self._is_stopping_recording = False
 
@@ -422,6 +442,8 @@ class FreeFactoryApp(QMainWindow):
         self.conversionQueueTable.setColumnWidth(1, 300)  # Output file
         self.conversionQueueTable.setColumnWidth(2, 120)  # Status column
         self.conversionQueueTable.horizontalHeader().setStretchLastSection(True)
+        self.conversionQueueTable.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.conversionQueueTable.customContextMenuRequested.connect(self.show_queue_context_menu)
         
         # Streaming Buttons
         self.StartAllStreams.clicked.connect(self.start_all_streams)
@@ -438,7 +460,6 @@ class FreeFactoryApp(QMainWindow):
         
         # Populate Streaming Factory list
         factory_dir = self.config.get("FactoryLocation") or "/opt/FreeFactory/Factories"
-        factory_files = sorted(Path(factory_dir).glob("*"))
         
         self.streamTable.setColumnWidth(0, 250)  # Input file
         self.streamTable.setColumnWidth(1, 250)  # Output file
@@ -447,9 +468,16 @@ class FreeFactoryApp(QMainWindow):
         self.streamTable.setColumnWidth(4, 100)
         self.streamTable.horizontalHeader().setStretchLastSection(True)
 
+        # Stream workers buffer their logs; one timer moves them to the UI
+        self.streamLogOutput.setMaximumBlockCount(STREAM_LOG_MAX_BLOCKS)
+        self._stream_stats_seen = {}      # row_uid -> worker.stats_seq last shown
+        self._stream_ui_timer = QTimer(self)
+        self._stream_ui_timer.setInterval(STREAM_UI_REFRESH_MS)
+        self._stream_ui_timer.timeout.connect(self._refresh_stream_ui)
+        self._stream_ui_timer.start()
+
         # Streaming Factories List
-        factory_files = sorted(Path(factory_dir).glob("*"))
-        factory_names = [f.name for f in factory_files if f.is_file()]
+        factory_names = FactoryStore.shared(factory_dir).names()
         self.streamFactorySelect.clear()
         self.streamFactorySelect.addItems(factory_names)
         
@@ -872,6 +900,7 @@ class FreeFactoryApp(QMainWindow):
         # UI-managed activity only (does NOT touch FreeFactoryConversion.py processes)
         active_threads = list(getattr(self, "active_threads", []))
         has_threads = any(getattr(t, "isRunning", lambda: False)() for t, _ in active_threads)
+        has_threads = has_threads or bool(getattr(self, "queue_workers", {}))
         has_streams = bool(getattr(self, "active_streams_by_row", {}))
 
         if has_streams or has_threads:
@@ -904,6 +933,18 @@ class FreeFactoryApp(QMainWindow):
         except Exception:
             pass
 
+        # Cancel queued conversions (terminates their ffmpeg processes)
+        try:
+            workers = list(self.queue_workers.values())
+            for worker in workers:
+                worker.cancel()
+            for worker in self.queue_probe_workers:
+                worker.requestInterruption()
+            for worker in workers + list(self.queue_probe_workers):
+                worker.wait(3000)
+        except Exception:
+            pass
+
         # Wind down UI conversion threads only
         try:
             for (thread, _worker) in active_threads:
@@ -1544,17 +1585,9 @@ class FreeFactoryApp(QMainWindow):
             root / name / "factory",       # directory layout
         ]
         for p in candidates:
-            if p.exists() and p.is_file():
-                try:
-                    for line in p.read_text(errors="ignore").splitlines():
-                        line = line.strip()
-                        if not line or line.startswith("#") or "=" not in line:
-                            continue
-                        k, v = line.split("=", 1)
-                        if k.strip().upper() == "STREAMMGRMODE":
-                            return (v or "").strip().upper()
-                except Exception:
-                    pass
+            rec = FactoryStore.shared(p.parent).get(p.name)
+            if rec is not None:
+                return rec.stream_mode
         return ""
 
     def _rebuild_stream_factory_selector(self):
@@ -1567,11 +1600,13 @@ class FreeFactoryApp(QMainWindow):
         names = []
         if root.exists():
             for p in sorted(root.iterdir(), key=lambda x: x.name.lower()):
-                if p.is_file() or p.is_dir():
-                    fname = p.name if p.is_file() else p.name  # use visible file/dir name
-                    mode = self._read_stream_mode_from_factory(fname)
+                if p.is_dir():
+                    mode = self._read_stream_mode_from_factory(p.name)  # <name>/factory layout
                     if mode != "OFF":
-                        names.append(fname)
+                        names.append(p.name)
+            # plain factory files come parsed from the shared FactoryStore
+            names += [rec.name for rec in FactoryStore.shared(root).load_all() if rec.stream_mode != "OFF"]
+            names.sort(key=str.lower)
 
         w = self.streamFactorySelect
         try: w.blockSignals(True)
@@ -1672,10 +1707,25 @@ class FreeFactoryApp(QMainWindow):
         self.streamTable.setCurrentCell(row, 0)
 
     def start_all_streams(self):
-        """Start every idle row using the exact same path as manual Start."""
+        """
+        Start every idle row. Idle rows sharing factory and inputs are encoded
+        once and fanned out to their destinations (see _start_stream_hub);
+        the rest use the exact same path as manual Start.
+        """
         rows = self.streamTable.rowCount()
         started = 0
 
+        groups = {}
+        for row in range(rows):
+            item0 = self.streamTable.item(row, 0)
+            sd = item0.data(Qt.ItemDataRole.UserRole) if item0 else None
+            if not sd or self.active_streams_by_row.get(sd.get("row_uid")):
+                continue
+            groups.setdefault(self._stream_group_key(sd), []).append(row)
+        for group_rows in groups.values():
+            if len(group_rows) > 1 and self._start_stream_hub(group_rows):
+                started += len(group_rows)
+
         for row in range(rows):
             # fetch per-row metadata and worker (if any)
             item0 = self.streamTable.item(row, 0)
@@ -1729,6 +1779,16 @@ class FreeFactoryApp(QMainWindow):
             self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Error: No row uid"))
             return
 
+        # A destination of a fan-out rejoins its encoder (or waits for it to restart)
+        hub_id, hub = self._stream_hub_of(row_uid)
+        if hub is not None:
+            if hub["worker"] is None:
+                hub["resume"].add(row_uid)
+                self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Waiting for fan-out"))
+            else:
+                self._start_stream_relay(hub_id, row)
+            return
+
         # Mirror (optional)
         if hasattr(self, "streamFactorySelect"):
             self.streamFactorySelect.setCurrentText(stream_data.get("factory_name", ""))
@@ -1738,26 +1798,13 @@ class FreeFactoryApp(QMainWindow):
             self.streamKey.setText(stream_data.get("stream_key", ""))
         
         # Build & launch (use core.build_streaming_command)
-        factory_name = (stream_data.get("factory_name") or "").strip()
-        factory_root = self.config.get("FactoryLocation") or "/opt/FreeFactory/Factories"
-        factory_path = Path(factory_root) / factory_name
-        factory_data = self.core.load_factory(factory_path)
-
-        fmt_v = (self.ForceFormatInputVideo.currentText() or "").strip().lower()
-        fmt_a = (self.ForceFormatInputAudio.currentText() or "").strip().lower()
-
+        factory_data, inputs = self._stream_factory_and_inputs(stream_data)
         full_output_url = stream_data.get("output_url", "")
         
-        re_files = bool(self.checkReadFilesRealTime.isChecked())
-        
         cmd = self.core.build_streaming_command(
             factory_data,
-            video_input=stream_data.get("video_input", ""),
-            audio_input=stream_data.get("audio_input", ""),
-            video_input_format=fmt_v,
-            audio_input_format=fmt_a,
             output_url=full_output_url,
-            re_for_file_inputs=re_files,
+            **inputs,
         )
 
         print("DEBUG Streaming CMD:", cmd)  # optional
@@ -1767,11 +1814,7 @@ class FreeFactoryApp(QMainWindow):
             return
 
         full_output_url = cmd[-1]
-        worker = StreamWorker(cmd, full_output_url)
-
-        # Promote status changes
-        worker.output.connect(lambda line, r=row: self._maybe_mark_live(r, line))
-        worker.output.connect(self.streamLogOutput.appendPlainText)
+        worker = StreamWorker(cmd, full_output_url, batch_interval=None)  # drained by _refresh_stream_ui
         worker.finished.connect(lambda: self._on_stream_finished(row, full_output_url, False))
         worker.error.connect(lambda m: self._on_stream_error(row, full_output_url, m))
 
@@ -1784,6 +1827,7 @@ class FreeFactoryApp(QMainWindow):
             self.active_streams = {}
         self.active_streams[full_output_url] = worker  # keep legacy URL map for Stop All etc.
 
+        self._stream_health_start(row_uid, factory_data)
         worker.start()
         self.streamLogOutput.appendPlainText(f"🟢 Started stream (row {row_uid}): {full_output_url}")
         
@@ -1793,8 +1837,223 @@ class FreeFactoryApp(QMainWindow):
             except Exception:
                 pass
 
+    def _stream_factory_and_inputs(self, stream_data):
+        """Factory dict + build_streaming_command input keywords for a row."""
+        factory_name = (stream_data.get("factory_name") or "").strip()
+        factory_root = self.config.get("FactoryLocation") or "/opt/FreeFactory/Factories"
+        factory_data = self.core.load_factory(Path(factory_root) / factory_name)
+
+        inputs = {
+            "video_input": stream_data.get("video_input", ""),
+            "audio_input": stream_data.get("audio_input", ""),
+            "video_input_format": (self.ForceFormatInputVideo.currentText() or "").strip().lower(),
+            "audio_input_format": (self.ForceFormatInputAudio.currentText() or "").strip().lower(),
+            "re_for_file_inputs": bool(self.checkReadFilesRealTime.isChecked()),
+        }
+        return factory_data, inputs
+
+    @staticmethod
+    def _stream_group_key(stream_data):
+        """Rows with the same key can share one encode."""
+        return (
+            (stream_data.get("factory_name") or "").strip(),
+            (stream_data.get("video_input") or "").strip(),
+            (stream_data.get("audio_input") or "").strip(),
+        )
+
+    def _stream_row_for_uid(self, row_uid) -> int:
+        for row in range(self.streamTable.rowCount()):
+            item0 = self.streamTable.item(row, 0)
+            sd = item0.data(Qt.ItemDataRole.UserRole) if item0 else None
+            if sd and sd.get("row_uid") == row_uid:
+                return row
+        return -1
+
+    def _stream_hub_of(self, row_uid):
+        """(hub_id, hub) of the fan-out a row belongs to, or (None, None)."""
+        for hub_id, hub in self.stream_hubs.items():
+            if row_uid in hub["relay_urls"]:
+                return hub_id, hub
+        return None, None
+
+    def _start_stream_hub(self, rows) -> bool:
+        """One encode for several rows: -f tee to a loopback relay per destination."""
+        rows_data = [self.streamTable.item(r, 0).data(Qt.ItemDataRole.UserRole) for r in rows]
+        factory_data, inputs = self._stream_factory_and_inputs(rows_data[0])
+        if not factory_data:
+            return False
+
+        self._stream_hub_seq += 1
+        hub_id = self._stream_hub_seq
+        hub = {
+            "worker": None,             # shared encode; None while it is down
+            "factory": factory_data,
+            "inputs": inputs,
+            "relay_urls": {sd["row_uid"]: self.core.allocate_relay_url() for sd in rows_data},  # row_uid -> udp://
+            "relays": {},               # row_uid -> StreamWorker
+            "resume": set(),            # row_uids to reconnect once a restarted encode is up
+            "health": StreamHealth(RestartPolicy.from_factory(factory_data)),
+        }
+        if not self._launch_stream_hub(hub_id, hub):
+            return False
+        self.streamLogOutput.appendPlainText(
+            f"🟢 Started fan-out {hub_id}: 1 encode → {len(rows)} destination(s)"
+        )
+
+        for row in rows:
+            self._start_stream_relay(hub_id, row)
+        return True
+
+    def _launch_stream_hub(self, hub_id, hub) -> bool:
+        """(Re)start the shared encode of a fan-out on its existing relay URLs."""
+        try:
+            cmd = self.core.build_fanout_command(
+                hub["factory"], relay_urls=list(hub["relay_urls"].values()), **hub["inputs"]
+            )
+        except Exception as e:
+            self.streamLogOutput.appendPlainText(f"🔴 Fan-out setup failed: {e}")
+            return False
+        print("DEBUG Fan-out CMD:", cmd)  # optional
+
+        worker = StreamWorker(cmd, f"fan-out {hub_id}", batch_interval=None)
+        worker.finished.connect(lambda _url, h=hub_id, w=worker: self._on_stream_hub_finished(h, w))
+        worker.error.connect(lambda m, h=hub_id, w=worker: self._on_stream_hub_finished(h, w, m))
+        hub["worker"] = worker
+        self.stream_hubs[hub_id] = hub
+        hub["health"].on_start()
+        worker.start()
+        return True
+
+    def _start_stream_relay(self, hub_id, row: int):
+        """(Re)start one destination of a fan-out; the encoder keeps running."""
+        hub = self.stream_hubs[hub_id]
+        sd = self.streamTable.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        row_uid = sd["row_uid"]
+        full_output_url = sd.get("output_url", "")
+
+        try:
+            cmd = self.core.build_relay_command(hub["factory"], hub["relay_urls"][row_uid], full_output_url)
+        except Exception as e:
+            self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Error: Bad command"))
+            self.streamLogOutput.appendPlainText(f"🔴 {e}")
+            return
+
+        self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Starting..."))
+        worker = StreamWorker(cmd, full_output_url, batch_interval=None)
+        worker.finished.connect(lambda: self._on_stream_finished(row, full_output_url, False))
+        worker.error.connect(lambda m: self._on_stream_error(row, full_output_url, m))
+
+        hub["relays"][row_uid] = worker
+        self.active_streams_by_row[row_uid] = worker
+        self.active_streams[full_output_url] = worker
+        self._stream_health_start(row_uid, hub["factory"])
+        worker.start()
+        self.streamLogOutput.appendPlainText(f"🟢 Started stream (row {row_uid}, fan-out {hub_id}): {full_output_url}")
+
+    def _release_stream_from_hub(self, row_uid):
+        """
+        A destination stopped; stop the shared encode once none are left and
+        none is waiting for an auto-restart.
+        """
+        hub_id, hub = self._stream_hub_of(row_uid)
+        if hub is None:
+            return
+        hub["relays"].pop(row_uid, None)
+        hub["resume"].discard(row_uid)
+        if hub["relays"] or hub["resume"]:
+            return
+        for uid in hub["relay_urls"]:
+            health = self.stream_health.get(uid)
+            if health is not None and health.pending_restart:
+                return
+        self.stream_hubs.pop(hub_id, None)
+        if hub["worker"] is not None:
+            hub["worker"].stop()
+        self.streamLogOutput.appendPlainText(f"🔴 Fan-out {hub_id} stopped (no destinations left)")
+
+    def _on_stream_hub_finished(self, hub_id, worker, msg: str = ""):
+        """The shared encode exited on its own."""
+        hub = self.stream_hubs.get(hub_id)
+        if hub is None or hub["worker"] is not worker:
+            return  # stopped on purpose, or already handled as a stall
+        hub["worker"] = None
+        self._flush_stream_log(worker, f"[fan-out {hub_id}] ")
+        self.streamLogOutput.appendPlainText(f"🔴 Fan-out {hub_id} ended{': ' + msg if msg else ''}")
+        self._stream_hub_down(hub_id, hub)
+
+    def _on_stream_hub_stalled(self, hub_id, hub, reason: str):
+        """The shared encode froze: every destination is starved, restart it as a group."""
+        if not hub["health"].policy.enabled:
+            self.streamLogOutput.appendPlainText(f"⚠️ Fan-out {hub_id} stalled: {reason}")
+            return
+        self.streamLogOutput.appendPlainText(f"⚠️ Fan-out {hub_id} stalled: {reason} — restarting")
+        worker, hub["worker"] = hub["worker"], None  # its exit is handled here, not in _on_stream_hub_finished
+        self._flush_stream_log(worker, f"[fan-out {hub_id}] ")
+        worker.stop()
+        self._stream_hub_down(hub_id, hub)
+
+    def _stream_hub_down(self, hub_id, hub):
+        """
+        The shared encode is gone. With auto-restart, stop its relays and bring
+        the encode back as a fan-out after the hub's backoff; the relays rejoin
+        it then. Otherwise the relays stop and each row follows its own policy.
+        """
+        waiting = any(
+            self.stream_health[uid].pending_restart for uid in hub["relay_urls"] if uid in self.stream_health
+        )
+        delay = hub["health"].on_exit() if hub["relays"] or waiting else None
+        relays = list(hub["relays"].items())
+        if delay is None:
+            self.stream_hubs.pop(hub_id, None)
+        else:
+            hub["resume"].update(uid for uid, _w in relays)
+            token = hub["health"].pending_restart
+            self.streamLogOutput.appendPlainText(f"🟡 Restarting fan-out {hub_id} in {delay:.0f}s")
+            QTimer.singleShot(int(delay * 1000), lambda h=hub_id, t=token: self._restart_stream_hub(h, t))
+        for _uid, relay in relays:
+            try:
+                relay.stop()  # with a restart pending, _on_stream_finished parks the row
+            except Exception:
+                pass
+
+    def _restart_stream_hub(self, hub_id, token):
+        hub = self.stream_hubs.get(hub_id)
+        if hub is None or hub["health"].pending_restart != token or self._is_closing:
+            return  # stopped or removed meanwhile
+        rows = {}
+        for row_uid in hub["resume"]:
+            health = self.stream_health.get(row_uid)
+            row = self._stream_row_for_uid(row_uid)
+            if row >= 0 and health is not None and not health.user_stopped:
+                rows[row_uid] = row
+        hub["resume"] = set()
+        if not rows:
+            self.stream_hubs.pop(hub_id, None)
+            self.streamLogOutput.appendPlainText(f"🔴 Fan-out {hub_id} not restarted (no destinations left)")
+            return
+        if not self._launch_stream_hub(hub_id, hub):
+            self.stream_hubs.pop(hub_id, None)
+            for row in rows.values():
+                self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Error"))
+            return
+        self.streamLogOutput.appendPlainText(
+            f"🟢 Restarted fan-out {hub_id} (#{hub['health'].restarts}): 1 encode → {len(rows)} destination(s)"
+        )
+        for row_uid, row in rows.items():
+            if row_uid not in self.active_streams_by_row:
+                self._start_stream_relay(hub_id, row)
+
     def stop_all_streams(self):
+        for health in self.stream_health.values():
+            health.stop()
         stop_all_streams(self)
+        for hub_id in list(self.stream_hubs):
+            hub = self.stream_hubs.pop(hub_id)
+            try:
+                if hub["worker"] is not None:
+                    hub["worker"].stop()
+            except Exception:
+                pass
         
         if hasattr(self, "statusBar"):
             try:
@@ -1819,8 +2078,13 @@ class FreeFactoryApp(QMainWindow):
         if hasattr(self, "active_streams_by_row"):
             worker = self.active_streams_by_row.get(row_uid)
 
+        health = self.stream_health.get(row_uid)
+        if health is not None:
+            health.stop()  # also cancels a pending auto-restart
+
         if not worker:
-            # Already gone; just mark UI
+            # Already gone (or waiting for a restart); just mark UI
+            self._release_stream_from_hub(row_uid)
             self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Stopped"))
             return
 
@@ -1847,6 +2111,9 @@ class FreeFactoryApp(QMainWindow):
         stream_data = item.data(Qt.ItemDataRole.UserRole)
         if stream_data:
             row_uid = stream_data.get("row_uid")
+            health = self.stream_health.pop(row_uid, None)
+            if health is not None:
+                health.stop()
             worker = None
             if hasattr(self, "active_streams_by_row"):
                 worker = self.active_streams_by_row.pop(row_uid, None)
@@ -1857,6 +2124,9 @@ class FreeFactoryApp(QMainWindow):
                     worker.stop()
                 except Exception:
                     pass
+            self._release_stream_from_hub(row_uid)
+            for hub in self.stream_hubs.values():
+                hub["relay_urls"].pop(row_uid, None)
 
             url = stream_data.get("output_url")
             if hasattr(self, "active_streams") and url:
@@ -1873,28 +2143,146 @@ class FreeFactoryApp(QMainWindow):
                 pass
 
 
-    def _maybe_mark_live(self, row: int, line: str):
+    def _refresh_stream_ui(self):
+        """
+        Timer slot (STREAM_UI_REFRESH_MS): move buffered stream log lines to
+        the log widget in one append and show the latest ffmpeg stats in the
+        Status column, however fast the streams are writing.
+        """
+        if not self.active_streams_by_row and not self.stream_hubs:
+            return
+        rows = {}
+        for row in range(self.streamTable.rowCount()):
+            item0 = self.streamTable.item(row, 0)
+            sd = item0.data(Qt.ItemDataRole.UserRole) if item0 else None
+            if sd:
+                rows[sd.get("row_uid")] = row
+
+        chunks = []
+        for hub_id, hub in list(self.stream_hubs.items()):
+            worker = hub["worker"]
+            if worker is None:
+                continue
+            lines = worker.drain()
+            if lines:
+                chunks.append("\n".join(f"[fan-out {hub_id}] {ln}" for ln in lines))
+            reason = hub["health"].observe(worker.stats)
+            if reason:
+                self._on_stream_hub_stalled(hub_id, hub, reason)
+
+        for row_uid, worker in list(self.active_streams_by_row.items()):
+            row = rows.get(row_uid, -1)
+            lines = worker.drain()
+            if lines:
+                chunks.append("\n".join(lines))
+            seq = worker.stats_seq
+            health = self.stream_health.get(row_uid)
+            if row >= 0 and (lines or seq != self._stream_stats_seen.get(row_uid)):
+                self._stream_stats_seen[row_uid] = seq
+                self._maybe_mark_live(row, lines, worker.stats)
+                item = self.streamTable.item(row, STATUS_COL)
+                if item is not None and health is not None:
+                    item.setToolTip(health.describe())
+            if health is not None:
+                reason = health.observe(worker.stats)
+                if reason:
+                    self._on_stream_stalled(row, row_uid, worker, reason)
+
+        if chunks:
+            self.streamLogOutput.appendPlainText("\n".join(chunks))
+
+    # ============================
+    #   Stream health / restarts
+    # ============================
+    def _stream_health_start(self, row_uid, factory_data):
+        """Track a (re)started row; factory edits take effect on the next start."""
+        policy = RestartPolicy.from_factory(factory_data)
+        health = self.stream_health.get(row_uid)
+        if health is None:
+            health = self.stream_health[row_uid] = StreamHealth(policy)
+        health.policy = policy
+        health.on_start()
+        return health
+
+    def _on_stream_stalled(self, row: int, row_uid, worker, reason: str):
+        _hub_id, hub = self._stream_hub_of(row_uid)
+        if hub is not None and hub["worker"] is None:
+            return  # its fan-out encode is down; the relay is already being stopped
+        health = self.stream_health[row_uid]
+        if not health.policy.enabled:
+            self.streamLogOutput.appendPlainText(f"⚠️ Stream (row {row_uid}) stalled: {reason}")
+            return
+        self.streamLogOutput.appendPlainText(f"⚠️ Stream (row {row_uid}) stalled: {reason} — restarting")
+        if row >= 0:
+            self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Stalled"))
+        # A fan-out destination is a -c copy relay of the shared encode: only the
+        # relay restarts, and it rejoins the still-running encoder. A stalled
+        # encoder is detected (and restarted as a group) in _refresh_stream_ui.
+        worker.stop()  # _on_stream_finished schedules the restart
+
+    def _schedule_stream_restart(self, row: int, row_uid):
+        """After an unrequested exit: restart with backoff, or give up per policy."""
+        health = self.stream_health.get(row_uid)
+        if health is None or self._is_closing:
+            return
+        delay = health.on_exit()
+        if delay is None:
+            if health.policy.enabled and not health.user_stopped:
+                self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem(f"Failed ({health.restarts} restarts)"))
+                self.streamLogOutput.appendPlainText(
+                    f"🔴 Stream (row {row_uid}) gave up after {health.consecutive} restart(s)"
+                )
+            return
+        token = health.pending_restart
+        item = QTableWidgetItem(f"Restarting in {delay:.0f}s (#{health.restarts})")
+        item.setToolTip(health.describe())
+        self.streamTable.setItem(row, STATUS_COL, item)
+        self.streamLogOutput.appendPlainText(f"🟡 Restarting stream (row {row_uid}) in {delay:.0f}s")
+        QTimer.singleShot(int(delay * 1000), lambda uid=row_uid, t=token: self._restart_stream(uid, t))
+
+    def _restart_stream(self, row_uid, token):
+        health = self.stream_health.get(row_uid)
+        if health is None or health.pending_restart != token or self._is_closing:
+            return  # stopped, removed or restarted by hand meanwhile
+        if row_uid in self.active_streams_by_row:
+            return
+        row = self._stream_row_for_uid(row_uid)
+        if row >= 0:
+            self.start_stream_for_row(row)
+
+    def _flush_stream_log(self, worker, prefix: str = ""):
+        """Whatever a finished worker logged since the last refresh."""
+        lines = worker.drain() if worker is not None else []
+        if lines:
+            self.streamLogOutput.appendPlainText("\n".join(prefix + ln for ln in lines))
+
+    def _maybe_mark_live(self, row: int, lines, stats=None):
         """
-        Promote 'Starting...' → 'Live' as soon as ffmpeg emits meaningful output.
+        Promote 'Starting...' → 'Live' as soon as ffmpeg emits meaningful output
+        or stats, and keep the Live status showing the latest counters.
         Mark 'Error' on obvious error lines. No stopping/cleanup here.
         """
         try:
             tbl = self.streamTable
             if row < 0 or row >= tbl.rowCount():
                 return
-            txt = (line or "").strip()
             # Error heuristics (local, immediate)
-            low = txt.lower()
-            if any(k in low for k in ("error", "failed", "permission denied", "no such file")):
-                tbl.setItem(row, STATUS_COL, QTableWidgetItem("Error"))
-                return
+            for line in lines:
+                low = (line or "").strip().lower()
+                if any(k in low for k in ("error", "failed", "permission denied", "no such file")):
+                    tbl.setItem(row, STATUS_COL, QTableWidgetItem("Error"))
+                    return
 
-            # Flip to Live once real stderr arrives and we're still "Starting…"
             item = tbl.item(row, STATUS_COL)
             cur = (item.text() if item else "").strip().lower()
-            if cur.startswith("starting"):
-                if txt and not txt.startswith("ffmpeg version"):
-                    tbl.setItem(row, STATUS_COL, QTableWidgetItem("Live"))
+            meaningful = bool(stats) or any(
+                ln.strip() and not ln.strip().startswith("ffmpeg version") for ln in lines
+            )
+            # Flip to Live once real stderr arrives and we're still "Starting…"
+            if (cur.startswith("starting") and meaningful) or (cur.startswith("live") and stats):
+                text = f"Live  {format_stream_stats(stats)}".rstrip()
+                if item is None or item.text() != text:
+                    tbl.setItem(row, STATUS_COL, QTableWidgetItem(text))
         except Exception:
             pass
 
@@ -1911,14 +2299,25 @@ class FreeFactoryApp(QMainWindow):
 
         # Clean per-row map
         if row_uid is not None and hasattr(self, "active_streams_by_row"):
-            self.active_streams_by_row.pop(row_uid, None)
+            self._flush_stream_log(self.active_streams_by_row.pop(row_uid, None))
+            self._stream_stats_seen.pop(row_uid, None)
 
         # Clean legacy URL map
         if hasattr(self, "active_streams") and url:
             self.active_streams.pop(url, None)
 
+        # A relay stopped because its fan-out encode is restarting rejoins it from there
+        _hub_id, hub = self._stream_hub_of(row_uid)
+        if hub is not None and hub["worker"] is None and row_uid in hub["resume"]:
+            hub["relays"].pop(row_uid, None)
+            self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Waiting for fan-out"))
+            return
+
         # Update UI
         self.streamTable.setItem(row, STATUS_COL, QTableWidgetItem("Error" if had_error else "Stopped"))
+        if row_uid is not None:
+            self._schedule_stream_restart(row, row_uid)
+            self._release_stream_from_hub(row_uid)  # after scheduling: a pending restart keeps the encode
         
         if hasattr(self, "statusBar"):
             try:
@@ -2235,63 +2634,224 @@ class FreeFactoryApp(QMainWindow):
     # ============================
     #     File Queue Handlers
     # ============================
+    # Row state lives in the Status cell's UserRole; the text is for display.
+    Q_QUEUED, Q_RUNNING, Q_DONE, Q_FAILED, Q_CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+    def _queue_row_job(self, row):
+        item = self.conversionQueueTable.item(row, 0)
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def _queue_row_of(self, job_id):
+        for row in range(self.conversionQueueTable.rowCount()):
+            if self._queue_row_job(row) == job_id:
+                return row
+        return -1
+
+    def _queue_row_state(self, row):
+        item = self.conversionQueueTable.item(row, 2)
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def _set_queue_status(self, row, state, text, tooltip=""):
+        item = QTableWidgetItem(text)
+        item.setData(Qt.ItemDataRole.UserRole, state)
+        if tooltip:
+            item.setToolTip(tooltip)
+        self.conversionQueueTable.setItem(row, 2, item)
+
+    def _queue_caps(self):
+        """(total, cpu, gpu) from ~/.freefactoryrc; None = unlimited."""
+        caps = read_caps(self.config)
+        return caps["total"], caps["cpu"], caps["gpu"]
+
     def start_conversion_queue(self):
-        self.current_queue_index = 0
-        self.run_next_in_queue()
+        rows = range(self.conversionQueueTable.rowCount())
+        if not any(self._queue_row_state(r) == self.Q_QUEUED for r in rows):
+            # Nothing pending: Start re-runs the whole list, like before.
+            for r in rows:
+                if self._queue_job_running(r):
+                    continue
+                self._set_queue_status(r, self.Q_QUEUED, "Queued")
+                job_id = self._queue_row_job(r)
+                if job_id in self.queue_jobs:
+                    self.queue_jobs[job_id]["fraction"] = 0.0
+        if self.queue_paused:
+            self.pause_or_resume_queue()
+        else:
+            self._queue_dispatch()
+
+    def _queue_job_running(self, row):
+        return self._queue_row_job(row) in self.queue_workers
 
     def pause_or_resume_queue(self):
         self.queue_paused = not self.queue_paused
         if self.queue_paused:
             self.pauseQueueButton.setText("Resume Queue")
+            for job_id, worker in self.queue_workers.items():
+                worker.pause()
+                row = self._queue_row_of(job_id)
+                if row >= 0:
+                    self._set_queue_status(row, self.Q_RUNNING, "⏸ Paused")
         else:
             self.pauseQueueButton.setText("Pause Queue")
-            self.run_next_in_queue()
-
-    def run_next_in_queue(self):
+            for job_id, worker in self.queue_workers.items():
+                worker.resume()
+                row = self._queue_row_of(job_id)
+                if row >= 0:
+                    self._set_queue_status(row, self.Q_RUNNING, "Processing...")
+            self._queue_dispatch()
+
+    def _queue_dispatch(self):
+        """Start queued rows top to bottom while CPU/GPU/total caps allow."""
         if self.queue_paused:
             return
-        if self.current_queue_index >= self.conversionQueueTable.rowCount():
-            self.conversionProgressBar.setValue(100)
-            return
+        total_cap, cpu_cap, gpu_cap = self._queue_caps()
+        running = {"cpu": 0, "gpu": 0}
+        for job_id in self.queue_workers:
+            running[self.queue_jobs[job_id]["kind"]] += 1
+
+        blocked = set()
+        for row in range(self.conversionQueueTable.rowCount()):
+            if total_cap is not None and sum(running.values()) >= total_cap:
+                break
+            if self._queue_row_state(row) != self.Q_QUEUED:
+                continue
+            job = self.queue_jobs.get(self._queue_row_job(row))
+            if job is None:
+                continue
+            kind = job["kind"]
+            cap = gpu_cap if kind == "gpu" else cpu_cap
+            if kind in blocked or (cap is not None and running[kind] >= cap):
+                blocked.add(kind)  # keep table order within a slot type
+                continue
+            if self._start_queue_job(row):
+                running[kind] += 1
 
-        input_path = self.conversionQueueTable.item(self.current_queue_index, 0).text()
-        output_path = self.conversionQueueTable.item(self.current_queue_index, 1).text()
-        factory_name = self.FactoryFilename.text().strip()
-        factory_path = Path(self.config.get("FactoryLocation")) / factory_name
-        factory_data = self.core.load_factory(factory_path)
-        
-        runtime_factory = self._with_runtime_analysis_flags(factory_data)
-        cmd = self.core.build_ffmpeg_command(input_path, runtime_factory)
-        #cmd = self.core.build_ffmpeg_command(input_path, factory_data)
-        report_path = self.core.get_analysis_report_path(input_path, runtime_factory)
+        if not self.queue_workers and not any(
+            self._queue_row_state(r) == self.Q_QUEUED for r in range(self.conversionQueueTable.rowCount())
+        ):
+            self._update_queue_progress()
 
-        self.conversionQueueTable.setItem(self.current_queue_index, 2, QTableWidgetItem("Processing..."))
+    def _start_queue_job(self, row):
+        job_id = self._queue_row_job(row)
+        job = self.queue_jobs[job_id]
+        input_path = self.conversionQueueTable.item(row, 0).text()
 
         try:
+            factory_path = Path(self.config.get("FactoryLocation")) / job["factory"]
+            factory_data = self.core.load_factory(factory_path)
+            runtime_factory = self._with_runtime_analysis_flags(factory_data)
+            cmd = self.core.build_ffmpeg_command(input_path, runtime_factory)
+            report_path = self.core.get_analysis_report_path(input_path, runtime_factory)
+            analysis = self.core.analysis_session(input_path, runtime_factory)
             if not cmd or not isinstance(cmd, (list, tuple)):
                 raise ValueError("Invalid command passed to FFmpegWorker.")
-
-            self.worker = FFmpegWorker(cmd, report_path=report_path)
-            self.worker.result.connect(self.handle_worker_result)
-            self.worker.finished.connect(self.worker.deleteLater)
-            self.worker.start()
-
         except Exception as e:
             self.dropZone.appendPlainText(f"⚠️ Exception preparing command: {e}")
-            self.worker = None
+            self._set_queue_status(row, self.Q_FAILED, "❌ Failed", str(e))
+            return False
+
+        self._set_queue_status(row, self.Q_RUNNING, "Processing...")
+        job["fraction"] = 0.0
+        captions = start_caption_stage(self.core, input_path, runtime_factory)
+        worker = FFmpegWorker(cmd, report_path=report_path, input_path=input_path, analysis=analysis,
+                              captions=captions)
+        worker.result.connect(lambda rc, out, err, jid=job_id: self.handle_worker_result(jid, rc, out, err))
+        worker.progress.connect(lambda snap, jid=job_id: self._on_queue_progress(jid, snap))
+        worker.finished.connect(worker.deleteLater)
+        self.queue_workers[job_id] = worker
+        worker.start()
+        return True
 
-    def handle_worker_result(self, returncode, stdout, stderr):
-        status = "✅ Done" if returncode == 0 else f"❌ Failed"
-        if returncode != 0:
-            print(f"[FFmpeg stderr]: {stderr}")
+    def _on_queue_progress(self, job_id, snap):
+        """Live fps / speed / percent in the queue Status column."""
+        job = self.queue_jobs.get(job_id)
+        row = self._queue_row_of(job_id)
+        if job is None or row < 0 or snap.get("state") == "end":
+            return
+        if snap.get("percent") is not None:
+            job["fraction"] = snap["percent"] / 100.0
+        if job_id in self.queue_workers and not self.queue_workers[job_id].paused:
+            tooltip = "Encoding below realtime" if below_realtime(snap) else ""
+            self._set_queue_status(row, self.Q_RUNNING, f"Processing {format_progress(snap)}", tooltip)
+        self._update_queue_progress()
+
+    def handle_worker_result(self, job_id, returncode, stdout, stderr):
+        worker = self.queue_workers.pop(job_id, None)
+        for line in (stdout or "").splitlines():
+            if line.startswith("[CAPTIONS]"):
+                self.dropZone.appendPlainText(line)
+        job = self.queue_jobs.get(job_id)
+        row = self._queue_row_of(job_id)
+        if row < 0:
+            self.queue_jobs.pop(job_id, None)  # row was removed while running
+        elif job is not None:
+            if worker is not None and worker.cancelled:
+                job["fraction"] = 0.0
+                self._set_queue_status(row, self.Q_CANCELLED, "⏹ Cancelled")
+            elif returncode == 0:
+                job["fraction"] = 1.0
+                self._set_queue_status(row, self.Q_DONE, "✅ Done")
+            else:
+                print(f"[FFmpeg stderr]: {stderr}")
+                job["fraction"] = 0.0
+                self._set_queue_status(row, self.Q_FAILED, "❌ Failed")
+        self._update_queue_progress()
+        self._queue_dispatch()
+
+    def _update_queue_progress(self):
+        """Overall progress weighted by media duration (unknown = average of known)."""
+        rows = self.conversionQueueTable.rowCount()
+        if rows == 0:
+            self.conversionProgressBar.setValue(0)
+            return
+        jobs = [self.queue_jobs.get(self._queue_row_job(r)) for r in range(rows)]
+        jobs = [j for j in jobs if j is not None]
+        known = [j["duration"] for j in jobs if j["duration"]]
+        fallback = (sum(known) / len(known)) if known else 1.0
+
+        total = done = 0.0
+        for j in jobs:
+            weight = j["duration"] or fallback
+            total += weight
+            done += weight * j["fraction"]
+        self.conversionProgressBar.setValue(int(done / total * 100) if total else 0)
+
+    def _on_queue_duration(self, job_id, seconds):
+        job = self.queue_jobs.get(job_id)
+        if job is not None:
+            job["duration"] = seconds or None
+            self._update_queue_progress()
+
+    def _on_queue_media(self, job_id, info):
+        """Probed codecs/layout as the input cell's tooltip."""
+        row = self._queue_row_of(job_id)
+        item = self.conversionQueueTable.item(row, 0) if row >= 0 else None
+        if item is not None and info is not None:
+            item.setToolTip(f"{info.path}\n{describe_media(info)}")
+
+    def _probe_queue_durations(self, jobs):
+        worker = DurationProbeWorker(jobs)
+        worker.probed.connect(self._on_queue_duration)
+        worker.media.connect(self._on_queue_media)
+        worker.finished.connect(lambda w=worker: self.queue_probe_workers.remove(w))
+        worker.finished.connect(worker.deleteLater)
+        self.queue_probe_workers.append(worker)
+        worker.start()
 
-        self.conversionQueueTable.setItem(self.current_queue_index, 2, QTableWidgetItem(status))
-        progress = int((self.current_queue_index + 1) / self.conversionQueueTable.rowCount() * 100)
-        self.conversionProgressBar.setValue(progress)
-        self.current_queue_index += 1
-        QTimer.singleShot(200, self.run_next_in_queue)
+    def cancel_queue_jobs(self, job_ids):
+        for job_id in job_ids:
+            worker = self.queue_workers.get(job_id)
+            if worker is not None:
+                worker.cancel()  # handle_worker_result marks the row
+                continue
+            row = self._queue_row_of(job_id)
+            if row >= 0 and self._queue_row_state(row) == self.Q_QUEUED:
+                self._set_queue_status(row, self.Q_CANCELLED, "⏹ Cancelled")
+        self._update_queue_progress()
 
     def clear_conversion_queue(self):
+        self.cancel_queue_jobs(list(self.queue_workers))
+        self.queue_jobs = {job_id: job for job_id, job in self.queue_jobs.items() if job_id in self.queue_workers}
         self.conversionQueueTable.setRowCount(0)
         self.conversionProgressBar.setValue(0)
 
@@ -2300,7 +2860,72 @@ class FreeFactoryApp(QMainWindow):
         for item in self.conversionQueueTable.selectedItems():
             selected_rows.add(item.row())
         for row in sorted(selected_rows, reverse=True):
+            job_id = self._queue_row_job(row)
+            if job_id in self.queue_workers:
+                self.queue_workers[job_id].cancel()  # job entry dropped when it exits
+            else:
+                self.queue_jobs.pop(job_id, None)
             self.conversionQueueTable.removeRow(row)
+        self._update_queue_progress()
+
+    def _selected_queue_rows(self):
+        return sorted({idx.row() for idx in self.conversionQueueTable.selectionModel().selectedRows()}
+                      | {item.row() for item in self.conversionQueueTable.selectedItems()})
+
+    def move_queue_rows(self, rows, target):
+        """Move rows as a block so that the first one lands at `target`."""
+        table = self.conversionQueueTable
+        if not rows:
+            return
+        taken = []
+        for row in sorted(rows, reverse=True):
+            taken.insert(0, [table.takeItem(row, c) for c in range(table.columnCount())])
+            table.removeRow(row)
+        target = max(0, min(target, table.rowCount()))
+        for offset, items in enumerate(taken):
+            table.insertRow(target + offset)
+            for c, item in enumerate(items):
+                if item is not None:
+                    table.setItem(target + offset, c, item)
+        table.clearSelection()
+        for offset in range(len(taken)):
+            table.selectRow(target + offset)
+
+    def show_queue_context_menu(self, pos):
+        rows = self._selected_queue_rows()
+        if not rows:
+            return
+        first, count = rows[0], len(rows)
+        menu = QMenu(self)
+        move_top = menu.addAction("Move to Top")
+        move_up = menu.addAction("Move Up")
+        move_down = menu.addAction("Move Down")
+        move_bottom = menu.addAction("Move to Bottom")
+        menu.addSeparator()
+        cancel = menu.addAction("Cancel")
+        retry = menu.addAction("Retry")
+
+        chosen = menu.exec(self.conversionQueueTable.viewport().mapToGlobal(pos))
+        job_ids = [self._queue_row_job(r) for r in rows]
+        bottom = self.conversionQueueTable.rowCount() - count
+        if chosen == move_top:
+            self.move_queue_rows(rows, 0)
+        elif chosen == move_up:
+            self.move_queue_rows(rows, first - 1)
+        elif chosen == move_down:
+            self.move_queue_rows(rows, min(first + 1, bottom))
+        elif chosen == move_bottom:
+            self.move_queue_rows(rows, bottom)
+        elif chosen == cancel:
+            self.cancel_queue_jobs(job_ids)
+        elif chosen == retry:
+            for row in rows:
+                if self._queue_row_state(row) in (self.Q_FAILED, self.Q_CANCELLED, self.Q_DONE):
+                    self.queue_jobs[self._queue_row_job(row)]["fraction"] = 0.0
+                    self._set_queue_status(row, self.Q_QUEUED, "Queued")
+            self._update_queue_progress()
+            self._queue_dispatch()
+
     # ============================
     #     Drag and Drop Logic
     # ============================
@@ -2326,13 +2951,20 @@ class FreeFactoryApp(QMainWindow):
                 cmd = self.core.build_ffmpeg_command(file_path, runtime_factory)
                 #cmd = self.core.build_ffmpeg_command(file_path, factory_data)
                 report_path = self.core.get_analysis_report_path(file_path, runtime_factory)
+                analysis = self.core.analysis_session(file_path, runtime_factory)
                 
                 self.dropZone.appendPlainText(f"⚙️ Running command:{' '.join(cmd)}")
 
                 thread = QThread()
-                worker = FFmpegWorkerZone(cmd, report_path=report_path)
+                captions = start_caption_stage(self.core, file_path, runtime_factory)
+                worker = FFmpegWorkerZone(cmd, report_path=report_path, input_path=file_path, analysis=analysis,
+                                          captions=captions)
                 worker.moveToThread(thread)
 
+                worker.progress.connect(
+                    lambda snap, fp=file_path: self.statusBar().showMessage(f"{Path(fp).name}: {format_progress(snap)}", 3000)
+                )
+
                 worker.finished.connect(lambda msg, fp=file_path: self.dropZone.appendPlainText(f"{msg}✔️ File: {fp}"))
                 worker.error.connect(lambda msg, fp=file_path: self.dropZone.appendPlainText(f"{msg}❌ File: {fp}"))
 
@@ -2368,21 +3000,51 @@ class FreeFactoryApp(QMainWindow):
 
         factory_path = Path(self.config.get("FactoryLocation")) / factory_name
         factory_data = self.core.load_factory(factory_path)
+        if factory_data is None:
+            QMessageBox.warning(self, "Invalid Factory", f"Failed to load factory: {factory_name}")
+            return
 
+        probe_jobs = []
         for input_path in files:
             runtime_factory = self._with_runtime_analysis_flags(factory_data)
             cmd = self.core.build_ffmpeg_command(input_path, runtime_factory)
             #cmd = self.core.build_ffmpeg_command(input_path, factory_data)
             output_path = cmd[-1]
-            self.add_file_to_queue(input_path, output_path)
+            job_id = self.add_file_to_queue(input_path, output_path, factory_name, factory_data)
+            probe_jobs.append((job_id, str(input_path)))
+
+        self._probe_queue_durations(probe_jobs)
+
 
+    def add_file_to_queue(self, input_path, output_path, factory_name=None, factory_data=None):
+        """Append a row; the factory is pinned per row so later selection changes don't affect it.
+
+        Returns the job id, or None (nothing queued) when the factory cannot be loaded.
+        """
+        factory_name = factory_name or self.FactoryFilename.text().strip()
+        if factory_data is None:
+            factory_data = self.core.load_factory(Path(self.config.get("FactoryLocation")) / factory_name)
+        if factory_data is None:
+            QMessageBox.warning(self, "Invalid Factory", f"Failed to load factory: {factory_name}")
+            return None
+        self._queue_job_seq += 1
+        job_id = self._queue_job_seq
+        self.queue_jobs[job_id] = {
+            "factory": factory_name,
+            "kind": "gpu" if self.core.which_accel(factory_data) else "cpu",
+            "duration": None,
+            "fraction": 0.0,
+        }
 
-    def add_file_to_queue(self, input_path, output_path):
         row_position = self.conversionQueueTable.rowCount()
         self.conversionQueueTable.insertRow(row_position)
-        self.conversionQueueTable.setItem(row_position, 0, QTableWidgetItem(str(input_path)))
+        input_item = QTableWidgetItem(str(input_path))
+        input_item.setData(Qt.ItemDataRole.UserRole, job_id)
+        self.conversionQueueTable.setItem(row_position, 0, input_item)
         self.conversionQueueTable.setItem(row_position, 1, QTableWidgetItem(str(output_path)))
-        self.conversionQueueTable.setItem(row_position, 2, QTableWidgetItem("Queued"))
+        self._set_queue_status(row_position, self.Q_QUEUED, "Queued")
+        self._update_queue_progress()
+        return job_id
 
 # --- 9) Factories: CRUD & list ------------------------------------------------
 
@@ -2451,10 +3113,17 @@ class FreeFactoryApp(QMainWindow):
             val = (self.StreamingFactoryName.text() or "").strip()
             lines.append(f"STREAMINGFACTORYNAME={val}")
 
-        # 4) Write file + refresh UI
+        # 4) Keys edited by hand in the file (stream restart policy, SMARTCOPY,
+        #    PARALLELSEGMENTS, HWDECODE, CAPTION*) survive a re-save
         factory_path = self.core.factory_dir / filename
+        on_disk = self.core.store.get(filename)
+        if on_disk is not None:
+            lines += [f"{k}={on_disk.data[k]}" for k in HAND_EDITED_KEYS if k in on_disk.data]
+
+        # 5) Write file + refresh UI
         try:
             factory_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            self.core.store.invalidate(filename)
             self.factory_dirty = False
 
             self.listFactoryFiles.clear()
@@ -55,7 +55,8 @@ from PyQt6.uic import loadUi
 from PyQt6 import uic
 
 from config_manager import ConfigManager
-from core import FFmpegWorker, FreeFactoryCore, FFmpegWorkerZone
+from core import FreeFactoryCore
+from ffworkers import FFmpegWorker, FFmpegWorkerZone
 from droptextedit import DropTextEdit
 from ffmpeghelp import FFmpegHelpDialog
 from version import get_version
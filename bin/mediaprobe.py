@@ -0,0 +1,284 @@
+# mediaprobe.py
+#
+# ffprobe once per file, shared by every pipeline.
+#
+# MediaProbe runs "ffprobe -show_format -show_streams -of json" and turns the
+# answer into a MediaInfo (format + StreamInfo per stream). Results are kept
+# in a small SQLite database keyed by file identity (st_dev, st_ino, size,
+# mtime_ns), so the GUI queue, the conversion service and FreeFactoryCore --
+# in this process or another -- never probe the same file version twice.
+# The least recently used entries are evicted past MediaProbeCacheSize.
+#
+# Stored in ~/.freefactory/cache/mediaprobe.sqlite3.
+#
+#   info = MediaProbe.shared().probe("/video/in/master.mov")
+#   if info and info.video: print(info.duration, info.video[0].codec_name)
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from ffstate import cache_dir, file_identity
+
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 5000
+PROBE_TIMEOUT_SEC = 60
+
+
+def _f(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _i(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value) -> Optional[float]:
+    """'30000/1001' -> 29.97 (None for '0/0')."""
+    num, _, den = str(value or "").partition("/")
+    n, d = _f(num), _f(den or 1)
+    return n / d if n and d else None
+
+
+class StreamInfo(NamedTuple):
+    index: int
+    codec_type: str                 # "video", "audio", "subtitle", "data"
+    codec_name: str
+    profile: str = ""
+    level: Optional[int] = None     # as ffprobe reports it (h264: 41, hevc: 123)
+    width: Optional[int] = None
+    height: Optional[int] = None
+    pix_fmt: str = ""
+    frame_rate: Optional[float] = None
+    field_order: str = ""
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: str = ""
+    bit_rate: Optional[int] = None
+    duration: Optional[float] = None
+    attached_pic: bool = False      # cover art, reported as a video stream
+    closed_captions: bool = False   # CEA-608/708 carried in the video stream
+
+    @classmethod
+    def from_ffprobe(cls, s: dict) -> "StreamInfo":
+        return cls(
+            index=_i(s.get("index")) or 0,
+            codec_type=s.get("codec_type") or "",
+            codec_name=s.get("codec_name") or "",
+            profile=s.get("profile") or "",
+            level=_i(s.get("level")) if _i(s.get("level")) not in (None, -99) else None,
+            width=_i(s.get("width")),
+            height=_i(s.get("height")),
+            pix_fmt=s.get("pix_fmt") or "",
+            frame_rate=_rate(s.get("avg_frame_rate")) or _rate(s.get("r_frame_rate")),
+            field_order=s.get("field_order") or "",
+            sample_rate=_i(s.get("sample_rate")),
+            channels=_i(s.get("channels")),
+            channel_layout=s.get("channel_layout") or "",
+            bit_rate=_i(s.get("bit_rate")),
+            duration=_f(s.get("duration")),
+            attached_pic=bool((s.get("disposition") or {}).get("attached_pic")),
+            closed_captions=bool(_i(s.get("closed_captions"))),
+        )
+
+
+class MediaInfo(NamedTuple):
+    path: str
+    format_name: str
+    duration: Optional[float]
+    start_time: float
+    bit_rate: Optional[int]
+    size: Optional[int]
+    streams: Tuple[StreamInfo, ...]
+
+    @classmethod
+    def from_ffprobe(cls, path, data: dict) -> "MediaInfo":
+        fmt = data.get("format") or {}
+        duration = _f(fmt.get("duration"))
+        return cls(
+            path=str(path),
+            format_name=fmt.get("format_name") or "",
+            duration=duration if duration and duration > 0 else None,
+            start_time=_f(fmt.get("start_time")) or 0.0,
+            bit_rate=_i(fmt.get("bit_rate")),
+            size=_i(fmt.get("size")),
+            streams=tuple(StreamInfo.from_ffprobe(s) for s in data.get("streams") or []),
+        )
+
+    def of_type(self, codec_type: str) -> Tuple[StreamInfo, ...]:
+        return tuple(s for s in self.streams if s.codec_type == codec_type)
+
+    @property
+    def video(self) -> Tuple[StreamInfo, ...]:
+        return tuple(s for s in self.of_type("video") if not s.attached_pic)
+
+    @property
+    def audio(self) -> Tuple[StreamInfo, ...]:
+        return self.of_type("audio")
+
+    @property
+    def subtitles(self) -> Tuple[StreamInfo, ...]:
+        return self.of_type("subtitle")
+
+
+def describe(info: Optional[MediaInfo]) -> str:
+    """One line per stream, e.g. 'video: h264 1920x1080 29.97 fps yuv420p'."""
+    if info is None:
+        return ""
+    lines = []
+    for s in info.streams:
+        if s.codec_type == "video" and not s.attached_pic:
+            rate = f" {s.frame_rate:.2f} fps" if s.frame_rate else ""
+            lines.append(f"video: {s.codec_name} {s.width}x{s.height}{rate} {s.pix_fmt}".rstrip())
+        elif s.codec_type == "audio":
+            lines.append(f"audio: {s.codec_name} {s.channels or '?'}ch {s.sample_rate or '?'} Hz")
+        elif s.codec_type:
+            lines.append(f"{'cover art' if s.attached_pic else s.codec_type}: {s.codec_name}")
+    if info.duration:
+        secs = int(info.duration)
+        lines.append(f"duration: {secs // 3600:02d}:{secs % 3600 // 60:02d}:{secs % 60:02d}")
+    return "\n".join(lines)
+
+
+def run_ffprobe(path) -> Optional[dict]:
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", str(path)],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=PROBE_TIMEOUT_SEC,
+        ).stdout
+        data = json.loads(out or "{}")
+    except Exception:
+        return None
+    return data if data.get("format") or data.get("streams") else None
+
+
+class MediaProbe:
+    """ffprobe results by file identity, cached in SQLite with LRU eviction."""
+
+    _shared: Dict[str, "MediaProbe"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path) if db_path else cache_dir() / "mediaprobe.sqlite3"
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._memo: Dict[str, MediaInfo] = {}  # identity -> info, this process
+
+    @classmethod
+    def shared(cls, config=None) -> "MediaProbe":
+        """Process-wide probe; MediaProbeCacheSize (~/.freefactoryrc) caps the database."""
+        size = DEFAULT_MAX_ENTRIES
+        if config is not None:
+            size = _i(config.get("MediaProbeCacheSize", DEFAULT_MAX_ENTRIES)) or DEFAULT_MAX_ENTRIES
+        with cls._shared_lock:
+            probe = cls._shared.get("default")
+            if probe is None:
+                probe = cls._shared["default"] = cls(max_entries=size)
+            elif config is not None:
+                probe.max_entries = max(1, size)
+            return probe
+
+    # ---------- storage ----------
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is None:
+            try:
+                db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS probes ("
+                    " identity TEXT PRIMARY KEY, version INTEGER, path TEXT, result TEXT, used REAL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS probes_used ON probes(used)")
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                return None  # no cache (read-only home, locked db...): probe every time
+        return self._db
+
+    def _load(self, identity: str) -> Optional[dict]:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    "SELECT result FROM probes WHERE identity=? AND version=?", (identity, CACHE_VERSION)
+                ).fetchone()
+                if row is None:
+                    return None
+                db.execute("UPDATE probes SET used=? WHERE identity=?", (time.time(), identity))
+                db.commit()
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError):
+                return None
+
+    def _store(self, identity: str, path, data: dict) -> None:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO probes(identity, version, path, result, used) VALUES (?, ?, ?, ?, ?)",
+                    (identity, CACHE_VERSION, str(path), json.dumps(data), time.time()),
+                )
+                db.execute(
+                    "DELETE FROM probes WHERE identity IN ("
+                    " SELECT identity FROM probes ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    # ---------- queries ----------
+    def probe(self, path) -> Optional[MediaInfo]:
+        """MediaInfo for path (cached per file version), or None if ffprobe can't read it."""
+        try:
+            identity = file_identity(path)
+        except OSError:
+            return None
+        with self._lock:
+            info = self._memo.get(identity)
+        if info is not None:
+            return info
+        data = self._load(identity)
+        if data is None:
+            data = run_ffprobe(path)
+            if data is None:
+                return None
+            self._store(identity, path, data)
+        info = MediaInfo.from_ffprobe(path, data)
+        with self._lock:
+            self._memo[identity] = info
+            if len(self._memo) > 256:
+                self._memo.pop(next(iter(self._memo)))
+        return info
+
+    def duration(self, path) -> Optional[float]:
+        info = self.probe(path)
+        return info.duration if info else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM probes")
+                    db.commit()
+                except sqlite3.Error:
+                    pass
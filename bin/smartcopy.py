@@ -0,0 +1,195 @@
+# smartcopy.py
+#
+# Smart stream copy (SMARTCOPY=True in a factory).
+#
+# When the probed input already has what the factory asks for -- same codec,
+# size, pixel format, frame rate, profile/level and no more bitrate than the
+# target for video; same codec, sample rate, channels and bitrate for audio --
+# re-encoding only costs time and a generation of quality. FreeFactoryCore
+# then builds the command from a copy of the factory with VIDEOCODECS and/or
+# AUDIOCODECS set to "copy" and the encoder-only fields cleared (the same
+# fields the GUI locks when a codec is set to copy), so the job remuxes at
+# disk speed. Anything that can't be verified from the probe keeps the encode.
+
+from __future__ import annotations
+
+import shlex
+from typing import List, Optional, Tuple
+
+BITRATE_TOLERANCE = 0.05
+
+# Factory fields that mean nothing with -c:v/-c:a copy (main.VIDEO/AUDIO_COPY_WIDGETS)
+VIDEO_ENCODE_KEYS = (
+    "VIDEOSIZE", "VIDEOPIXFORMAT", "VIDEOPROFILE", "VIDEOPROFILELEVEL", "VIDEOBITRATE",
+    "VIDEOFRAMERATE", "ASPECT", "VIDEOPRESET", "VIDEOFILTERS", "BFRAMES", "GROUPPICSIZE",
+    "FRAMESTRATEGY", "VIDEOFORMAT", "REMOVEA53CC", "VIDEOCRF", "COLORSPACE", "COLORRANGE",
+    "COLORTRC", "COLORSAMPLELOCATION", "COLORPRIMARIES", "ALTERNATESCAN", "NONLINEARQUANT",
+    "SIGNALSTANDARD", "SEQDISPEXT", "FIELDORDER", "INTRAVLC", "DC", "QMIN", "QMAX",
+    "RCINITOCCUPANCY", "BUFSIZE", "TIMECODEGOP", "MATCHMINMAXBITRATE", "FRAMERATECFR",
+    "FLAGS", "FLAGS2", "MPVFLAGS",
+)
+AUDIO_ENCODE_KEYS = ("AUDIOBITRATE", "AUDIOSAMPLERATE", "AUDIOCHANNELS", "AUDIOFILTERS")
+
+# Encoder tuning that doesn't change what a compliant stream looks like
+_VIDEO_TUNING = {"VIDEOPRESET", "VIDEOCRF", "BFRAMES", "GROUPPICSIZE", "FRAMESTRATEGY", "MATCHMINMAXBITRATE",
+                 "BUFSIZE", "FLAGS", "FLAGS2"}
+# Checked against the probe below
+_VIDEO_CHECKED = {"VIDEOSIZE", "VIDEOPIXFORMAT", "VIDEOPROFILE", "VIDEOPROFILELEVEL", "VIDEOBITRATE",
+                  "VIDEOFRAMERATE", "FIELDORDER"}
+
+_ENCODER_CODEC = {
+    "libx264": "h264", "libx264rgb": "h264", "libopenh264": "h264",
+    "libx265": "hevc", "libkvazaar": "hevc",
+    "libvpx": "vp8", "libvpx-vp9": "vp9",
+    "libaom-av1": "av1", "libsvtav1": "av1", "librav1e": "av1",
+    "prores_ks": "prores", "prores_aw": "prores",
+    "libxvid": "mpeg4", "mpeg2_qsv": "mpeg2video",
+    "libfdk_aac": "aac", "aac_at": "aac", "libmp3lame": "mp3", "libshine": "mp3",
+    "libopus": "opus", "libvorbis": "vorbis", "libtwolame": "mp2",
+}
+_LOSSLESS_AUDIO = ("pcm_", "flac", "alac", "truehd", "mlp")
+
+
+def codec_for_encoder(encoder: str) -> str:
+    """ffmpeg encoder name -> codec name ffprobe reports ('h264_nvenc' -> 'h264')."""
+    enc = (encoder or "").strip().lower()
+    if enc in _ENCODER_CODEC:
+        return _ENCODER_CODEC[enc]
+    for hw in ("_nvenc", "_qsv", "_vaapi", "_amf", "_videotoolbox", "_v4l2m2m", "_mf"):
+        if enc.endswith(hw):
+            return enc[: -len(hw)]
+    return enc
+
+
+def _rate(text: str) -> Optional[float]:
+    num, _, den = text.strip().partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _bits(text: str) -> Optional[float]:
+    """'8M' / '192k' / '2500000' -> bits per second."""
+    t = (text or "").strip().lower()
+    mult = {"k": 1e3, "m": 1e6, "g": 1e9}.get(t[-1:], 1)
+    try:
+        return float(t[:-1] if mult != 1 else t) * mult
+    except ValueError:
+        return None
+
+
+def _level_ok(codec: str, wanted: str, probed: Optional[int]) -> bool:
+    try:
+        want = float(wanted)
+    except ValueError:
+        return False
+    if probed is None:
+        return False
+    scale = {"h264": 10, "hevc": 30}.get(codec)
+    return scale is not None and probed <= round(want * scale)
+
+
+def video_mismatch(factory, stream) -> str:
+    """'' if the input video stream can be copied for this factory, else why not."""
+    want = codec_for_encoder(factory.get("VIDEOCODECS", ""))
+    if stream.codec_name != want:
+        return f"codec {stream.codec_name} != {want}"
+    for key in VIDEO_ENCODE_KEYS:
+        value = (factory.get(key) or "").strip()
+        if not value or key in _VIDEO_TUNING or key in _VIDEO_CHECKED:
+            continue
+        if key in ("REMOVEA53CC", "TIMECODEGOP", "ALTERNATESCAN", "NONLINEARQUANT", "INTRAVLC", "FRAMERATECFR") \
+                and value.lower() not in ("1", "true", "yes"):
+            continue
+        return f"{key} is set"
+
+    size = (factory.get("VIDEOSIZE") or "").strip().lower()
+    if size and size != f"{stream.width}x{stream.height}":
+        return f"size {stream.width}x{stream.height} != {size}"
+    pix = (factory.get("VIDEOPIXFORMAT") or "").strip()
+    if pix and pix != stream.pix_fmt:
+        return f"pix_fmt {stream.pix_fmt} != {pix}"
+    rate = _rate(factory.get("VIDEOFRAMERATE") or "")
+    if (factory.get("VIDEOFRAMERATE") or "").strip() and (
+        rate is None or stream.frame_rate is None or abs(rate - stream.frame_rate) > 0.01
+    ):
+        return f"frame rate {stream.frame_rate} != {factory.get('VIDEOFRAMERATE')}"
+    profile = (factory.get("VIDEOPROFILE") or "").strip().lower()
+    if profile and profile != stream.profile.lower():
+        return f"profile {stream.profile} != {profile}"
+    level = (factory.get("VIDEOPROFILELEVEL") or "").strip()
+    if level and not _level_ok(want, level, stream.level):
+        return f"level {stream.level} above {level}"
+    field_order = (factory.get("FIELDORDER") or "").strip().lower()
+    if field_order and field_order != stream.field_order.lower():
+        return f"field order {stream.field_order} != {field_order}"
+    bitrate = _bits(factory.get("VIDEOBITRATE") or "")
+    if bitrate:
+        if stream.bit_rate is None:
+            return "input video bitrate unknown"
+        if stream.bit_rate > bitrate * (1 + BITRATE_TOLERANCE):
+            return f"bitrate {stream.bit_rate} above {factory.get('VIDEOBITRATE')}"
+    return ""
+
+
+def audio_mismatch(factory, stream) -> str:
+    want = codec_for_encoder(factory.get("AUDIOCODECS", ""))
+    if stream.codec_name != want:
+        return f"codec {stream.codec_name} != {want}"
+    if (factory.get("AUDIOFILTERS") or "").strip():
+        return "AUDIOFILTERS is set"
+    rate = (factory.get("AUDIOSAMPLERATE") or "").strip()
+    if rate and str(stream.sample_rate) != rate:
+        return f"sample rate {stream.sample_rate} != {rate}"
+    channels = (factory.get("AUDIOCHANNELS") or "").strip()
+    if channels and str(stream.channels) != channels:
+        return f"channels {stream.channels} != {channels}"
+    bitrate = _bits(factory.get("AUDIOBITRATE") or "")
+    if bitrate and not stream.codec_name.startswith(_LOSSLESS_AUDIO):
+        if stream.bit_rate is None:
+            return "input audio bitrate unknown"
+        if abs(stream.bit_rate - bitrate) > bitrate * BITRATE_TOLERANCE:
+            return f"bitrate {stream.bit_rate} != {factory.get('AUDIOBITRATE')}"
+    return ""
+
+
+def plan(factory, info) -> Tuple[bool, bool, List[str]]:
+    """(copy video, copy audio, notes) for this factory and probed input."""
+    notes: List[str] = []
+    if info is None:
+        return False, False, ["input not probed"]
+    manual = shlex.split(factory.get("MANUALOPTIONSOUTPUT") or "")
+    if any(tok in ("-vf", "-af", "-filter_complex") or tok.startswith(("-filter:", "-c:", "-codec"))
+           for tok in manual):
+        return False, False, ["MANUALOPTIONSOUTPUT filters or picks codecs"]
+
+    copy_video = False
+    vcodec = (factory.get("VIDEOCODECS") or "").strip().lower()
+    if vcodec and vcodec != "copy" and info.video:
+        why = next((w for w in (video_mismatch(factory, s) for s in info.video) if w), "")
+        copy_video = not why
+        notes.append("video: copy" if copy_video else f"video: encode ({why})")
+
+    copy_audio = False
+    acodec = (factory.get("AUDIOCODECS") or "").strip().lower()
+    if acodec and acodec != "copy" and info.audio:
+        why = next((w for w in (audio_mismatch(factory, s) for s in info.audio) if w), "")
+        copy_audio = not why
+        notes.append("audio: copy" if copy_audio else f"audio: encode ({why})")
+    return copy_video, copy_audio, notes
+
+
+def apply(factory, info):
+    """Factory dict to build from: copies where the input already complies."""
+    copy_video, copy_audio, notes = plan(factory, info)
+    if not (copy_video or copy_audio):
+        return factory, notes
+    out = dict(factory)
+    if copy_video:
+        out.update({k: "" for k in VIDEO_ENCODE_KEYS})
+        out["VIDEOCODECS"] = "copy"
+    if copy_audio:
+        out.update({k: "" for k in AUDIO_ENCODE_KEYS})
+        out["AUDIOCODECS"] = "copy"
+    return out, notes
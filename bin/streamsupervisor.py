@@ -0,0 +1,188 @@
+# streamsupervisor.py
+#
+# Health tracking and restart policy for live stream rows.
+#
+# A StreamHealth lives as long as its stream row and outlives the ffmpeg
+# processes behind it. The GUI feeds it the parsed -stats counters from
+# StreamWorker on every refresh; it reports a stall when the frame (or, for
+# audio-only streams, time) counter stops moving or speed stays below the
+# floor, and decides how long to wait before the next restart. Uptime, restart
+# count and a short bitrate history are kept for the Status column tooltip.
+#
+# The policy comes from the streaming factory, next to LOWLATENCYINPUT/TQSSIZE:
+#
+#   STREAMAUTORESTART=True      restart when ffmpeg exits or stalls (default False)
+#   STREAMRESTARTMAX=0          give up after N consecutive restarts (0 = never)
+#   STREAMRESTARTDELAY=2        first backoff delay, seconds; doubles per restart
+#   STREAMRESTARTMAXDELAY=60    backoff ceiling, seconds
+#   STREAMSTALLTIMEOUT=20       seconds without progress (or below min speed) = stall
+#   STREAMMINSPEED=0.9          speed floor; 0 disables the speed check
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+# No widgets for these yet: the GUI carries them over when it re-saves a factory
+POLICY_KEYS = (
+    "STREAMAUTORESTART", "STREAMRESTARTMAX", "STREAMRESTARTDELAY",
+    "STREAMRESTARTMAXDELAY", "STREAMSTALLTIMEOUT", "STREAMMINSPEED",
+)
+
+BITRATE_HISTORY = 240    # samples kept per row (one per stats change, ~2 min at -stats cadence)
+HEALTHY_RESET_SEC = 120  # a run this long resets the backoff
+
+
+def _float(factory, key, default):
+    try:
+        return float((factory.get(key, "") or "").strip() or default)
+    except ValueError:
+        return float(default)
+
+
+class RestartPolicy(NamedTuple):
+    enabled: bool = False
+    max_restarts: int = 0
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    stall_timeout: float = 20.0
+    min_speed: float = 0.9
+
+    @classmethod
+    def from_factory(cls, factory) -> "RestartPolicy":
+        factory = factory or {}
+        return cls(
+            enabled=(factory.get("STREAMAUTORESTART", "False") or "False").strip().lower() == "true",
+            max_restarts=max(0, int(_float(factory, "STREAMRESTARTMAX", 0))),
+            base_delay=max(0.5, _float(factory, "STREAMRESTARTDELAY", 2)),
+            max_delay=max(1.0, _float(factory, "STREAMRESTARTMAXDELAY", 60)),
+            stall_timeout=max(5.0, _float(factory, "STREAMSTALLTIMEOUT", 20)),
+            min_speed=max(0.0, _float(factory, "STREAMMINSPEED", 0.9)),
+        )
+
+
+class StreamHealth:
+    """Per-row stall detection, backoff and uptime/restart/bitrate bookkeeping."""
+
+    def __init__(self, policy: RestartPolicy):
+        self.policy = policy
+        self.restarts = 0           # total restarts of this row
+        self.consecutive = 0        # restarts since the last healthy run
+        self.total_uptime = 0.0     # seconds, finished runs only
+        self.started_at: Optional[float] = None
+        self.user_stopped = False
+        self.pending_restart = 0    # token of the scheduled restart (0 = none)
+        self._restart_seq = 0
+        self.last_stall = ""
+        self.bitrates = deque(maxlen=BITRATE_HISTORY)  # (monotonic time, kb/s)
+        self._progress_mark = None
+        self._progress_at = 0.0
+        self._slow_since: Optional[float] = None
+
+    # ---------- run lifecycle ----------
+    def on_start(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.started_at = now
+        self.user_stopped = False
+        self.pending_restart = 0
+        self._progress_mark = None
+        self._progress_at = now
+        self._slow_since = None
+
+    def on_exit(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        The process ended on its own (or was stopped for a stall). Returns the
+        delay before restarting, or None when the row should stay down.
+        """
+        now = time.monotonic() if now is None else now
+        run = self.uptime(now)
+        if self.started_at is not None:
+            self.total_uptime += run
+        self.started_at = None
+        if self.user_stopped or not self.policy.enabled:
+            return None
+        if run >= HEALTHY_RESET_SEC:
+            self.consecutive = 0
+        if self.policy.max_restarts and self.consecutive >= self.policy.max_restarts:
+            return None
+        delay = min(self.policy.max_delay, self.policy.base_delay * (2 ** self.consecutive))
+        self.consecutive += 1
+        self.restarts += 1
+        self._restart_seq += 1
+        self.pending_restart = self._restart_seq
+        return delay
+
+    def stop(self) -> None:
+        """Operator stop: no restart, and any scheduled restart is void."""
+        self.user_stopped = True
+        self.pending_restart = 0
+
+    # ---------- health ----------
+    def observe(self, stats: dict, now: Optional[float] = None) -> Optional[str]:
+        """Feed the latest counters; returns a stall reason, or None while healthy."""
+        now = time.monotonic() if now is None else now
+        if self.started_at is None:
+            return None
+        timeout = self.policy.stall_timeout
+
+        if stats:
+            mark = (stats.get("frame") or 0, stats.get("out_time_sec"))
+            if mark != self._progress_mark:
+                self._progress_mark = mark
+                self._progress_at = now
+                if stats.get("bitrate_kbps") is not None:
+                    self.bitrates.append((now, stats["bitrate_kbps"]))
+
+            speed = stats.get("speed")
+            if self.policy.min_speed and speed is not None and speed < self.policy.min_speed:
+                if self._slow_since is None:
+                    self._slow_since = now
+                elif now - self._slow_since >= timeout:
+                    self._slow_since = None  # report once per timeout window
+                    self.last_stall = f"speed {speed:.2f}x below {self.policy.min_speed:.2f}x for {timeout:.0f}s"
+                    return self.last_stall
+            else:
+                self._slow_since = None
+
+        if now - self._progress_at >= timeout:
+            self._progress_at = now
+            if self._progress_mark is None:
+                self.last_stall = f"no progress within {timeout:.0f}s of start"
+            else:
+                self.last_stall = f"frame counter frozen at {self._progress_mark[0]} for {timeout:.0f}s"
+            return self.last_stall
+        return None
+
+    # ---------- reporting ----------
+    def uptime(self, now: Optional[float] = None) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (time.monotonic() if now is None else now) - self.started_at
+
+    def bitrate_summary(self):
+        """(min, mean, max) kb/s over the kept history, or None."""
+        if not self.bitrates:
+            return None
+        values = [kbps for _t, kbps in self.bitrates]
+        return min(values), sum(values) / len(values), max(values)
+
+    def describe(self, now: Optional[float] = None) -> str:
+        now = time.monotonic() if now is None else now
+        lines = [
+            f"Uptime: {_hms(self.uptime(now))} (total {_hms(self.total_uptime + self.uptime(now))})",
+            f"Restarts: {self.restarts}" + (f" (max {self.policy.max_restarts})" if self.policy.max_restarts else ""),
+        ]
+        summary = self.bitrate_summary()
+        if summary:
+            lines.append("Bitrate: min {:.0f} / avg {:.0f} / max {:.0f} kb/s".format(*summary))
+        if self.last_stall:
+            lines.append(f"Last stall: {self.last_stall}")
+        if not self.policy.enabled:
+            lines.append("Auto-restart off (STREAMAUTORESTART)")
+        return "\n".join(lines)
+
+
+def _hms(seconds: float) -> str:
+    s = int(seconds)
+    return f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"
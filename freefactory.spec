@@ -41,6 +41,8 @@ echo "Building FreeFactoryQT..."
 rm -rf %{buildroot}
 install -d %{buildroot}/opt/FreeFactory
 cp -r * %{buildroot}/opt/FreeFactory/
+# developer benchmarks are not shipped
+rm -rf %{buildroot}/opt/FreeFactory/bench
 
 install -d %{buildroot}%{_bindir}
 echo '#!/bin/bash' > %{buildroot}%{_bindir}/freefactoryqt
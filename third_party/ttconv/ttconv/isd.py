@@ -32,8 +32,11 @@ import typing
 import numbers
 import re
 import sys
+import bisect
 import os
 import multiprocessing
+import concurrent.futures
+import logging
 from dataclasses import dataclass
 from fractions import Fraction
 
@@ -41,6 +44,8 @@ import ttconv.model as model
 import ttconv.style_properties as styles
 from ttconv.config import ModuleConfiguration
 
+LOGGER = logging.getLogger(__name__)
+
 
 class SignificantTimes:
   """Information on the temporal offsets at which a ContentDocument changes.
@@ -83,6 +88,14 @@ class _SingleRegionDocumentCache:
 
 ISD_NO_MULTIPROC_ENV = "ISD_NO_MULTIPROC"
 
+ISD_EXECUTION_ENV = "ISD_EXECUTION"
+ISD_EXECUTION_SERIAL = "serial"
+ISD_EXECUTION_THREAD = "thread"
+ISD_EXECUTION_PROCESS = "process"
+
+# below this number of significant times, worker start-up costs more than it saves
+ISD_PARALLEL_MIN_SIG_TIMES = 100
+
 
 @dataclass
 class ISDConfiguration(ModuleConfiguration):
@@ -108,6 +121,8 @@ class ISD(model.Document):
     children element.
     '''
 
+    __slots__ = ()
+
     def push_child(self, child):
       if not isinstance(child, model.Body):
         raise TypeError("Children of ISD regions must be body instances")
@@ -307,78 +322,142 @@ class ISD(model.Document):
     cache = (_SingleRegionDocumentCache({}, doc, None),) if sig_times is None else sig_times.cache()
 
     for cached_doc in cache:
-      if cached_doc.content_interval is not None:
-        if (
-          cached_doc.content_interval[0] > offset or 
-          (cached_doc.content_interval[1] is not None and cached_doc.content_interval[1] <= offset)
-        ):
-          continue
+      ISD._put_regions(isd, doc, cached_doc, offset)
+
+    return isd
+
+  @staticmethod
+  def _put_regions(
+    isd: ISD,
+    doc: model.ContentDocument,
+    cached_doc: _SingleRegionDocumentCache,
+    offset: Fraction,
+    tracker: typing.Optional[_ActivityTracker] = None):
+    '''Adds to `isd` the regions of the single-region document `cached_doc` at `offset`.
+    '''
+
+    if cached_doc.content_interval is not None:
+      if (
+        cached_doc.content_interval[0] > offset or
+        (cached_doc.content_interval[1] is not None and cached_doc.content_interval[1] <= offset)
+      ):
+        return
 
-      regions = tuple(cached_doc.doc.iter_regions())
+    regions = tuple(cached_doc.doc.iter_regions())
 
-      activity_cache = {}
+    activity_cache = {}
 
-      if regions:
-        for region in regions:
-          isd_region = ISD._process_element(cached_doc.interval_cache, activity_cache, isd, offset, region, None, None, None, None, region)
-          if isd_region is not None:
-            isd.put_region(isd_region)
-      else:
-        default_region = model.Region(ISD.DEFAULT_REGION_ID, doc)
-        isd_region = ISD._process_element(cached_doc.interval_cache, activity_cache, isd, offset, None, None, None, None, None, default_region)
+    if regions:
+      for region in regions:
+        isd_region = ISD._process_element(cached_doc.interval_cache, activity_cache, isd, offset, region, None, None, None, None, region, tracker)
         if isd_region is not None:
           isd.put_region(isd_region)
+    else:
+      default_region = model.Region(ISD.DEFAULT_REGION_ID, doc)
+      isd_region = ISD._process_element(cached_doc.interval_cache, activity_cache, isd, offset, None, None, None, None, None, default_region, tracker)
+      if isd_region is not None:
+        isd.put_region(isd_region)
 
-    return isd
+  @staticmethod
+  def iter_isd_sequence(
+    doc: model.ContentDocument,
+    progress_callback=lambda _: None,
+    sig_times: typing.Optional[SignificantTimes] = None
+    ) -> typing.Iterator[typing.Tuple[Fraction, ISD]]:
+    """ Yields, in order of increasing significant time, duples consisting of a significant time in the
+    ContentDocument `doc` and the corresponding `ISD` instance.
+
+    ISDs are computed incrementally, one at a time: the active elements of the document are updated
+    from one significant time to the next instead of being found by walking the whole document, and a
+    paragraph that did not change since the previous ISD is copied instead of having its styles
+    computed again. A consumer that does not keep the ISDs uses memory independent of the length of
+    the document.
+    """
+
+    if sig_times is None:
+      sig_times = ISD.significant_times(doc)
+      progress_callback(0.1)
+
+    for i, isd in enumerate(_iter_isds(doc, sig_times, 0, len(sig_times))):
+      yield (sig_times[i], isd)
+      progress_callback(0.1 + 0.9 * (i + 1) / len(sig_times))
 
   @staticmethod
   def generate_isd_sequence(
     doc: model.ContentDocument,
     progress_callback=lambda _: None,
-    is_multithreaded:
-    bool = True) -> typing.List[typing.Tuple[Fraction, ISD]]:
+    is_multithreaded: bool = True,
+    execution: typing.Optional[str] = None,
+    workers: typing.Optional[int] = None
+    ) -> typing.List[typing.Tuple[Fraction, ISD]]:
     """ Returns a list of duples, each consisting of a significant time in the ContentDocument `doc`
     and the corresponding `ISD` instance. The duples are sorted in order of increasing significant time.
-    This helper function by default uses multithreading to improve performance on large ContentDocument
-    instances. Setting the environment variable "ISD_NO_MULTIPROC" disables multithreading.
+
+    `execution` selects how the ISDs are computed: `ISD_EXECUTION_SERIAL`, `ISD_EXECUTION_THREAD`
+    (worker threads) or `ISD_EXECUTION_PROCESS` (worker processes). It defaults to the value of the
+    "ISD_EXECUTION" environment variable, or `ISD_EXECUTION_SERIAL`: computed incrementally, ISDs are
+    cheap enough that pickling them back from worker processes costs more than it saves. Setting
+    `is_multithreaded` to `False` or the environment variable "ISD_NO_MULTIPROC" forces serial
+    execution. Documents with few significant times are always processed serially.
+
+    ISDs are computed incrementally (see `iter_isd_sequence`). The parallel modes split the significant
+    times into contiguous blocks, each computed incrementally by one worker. Worker processes are forked
+    by a pool private to the call, whose initializer hands each of them `doc` and its significant times
+    without pickling: only block boundaries are sent to the workers, and only the ISDs come back. Where
+    fork is not available, ISDs are computed serially.
     """
 
     sig_times = ISD.significant_times(doc)
 
     progress_callback(0.1)
 
-    # disable multi-threading until picking of recursive structures is solved
+    if not is_multithreaded or os.getenv(ISD_NO_MULTIPROC_ENV):
+      execution = ISD_EXECUTION_SERIAL
+    elif execution is None:
+      execution = os.getenv(ISD_EXECUTION_ENV, ISD_EXECUTION_SERIAL).strip().lower()
+
+    if execution not in (ISD_EXECUTION_SERIAL, ISD_EXECUTION_THREAD, ISD_EXECUTION_PROCESS):
+      raise ValueError(f"Unknown ISD execution mode: {execution}")
+
+    workers = workers or os.cpu_count() or 1
 
-    is_multithreaded = False
+    if len(sig_times) <= ISD_PARALLEL_MIN_SIG_TIMES or workers < 2:
+      execution = ISD_EXECUTION_SERIAL
+
+    if execution == ISD_EXECUTION_PROCESS and "fork" not in multiprocessing.get_all_start_methods():
+      LOGGER.debug("fork is not available, computing ISDs serially")
+      execution = ISD_EXECUTION_SERIAL
 
     # Compute ISDs
 
+    if execution == ISD_EXECUTION_SERIAL:
+      return list(ISD.iter_isd_sequence(doc, progress_callback, sig_times))
+
+    block_size = -(-len(sig_times) // (workers * 4))
+    blocks = [(start, min(start + block_size, len(sig_times))) for start in range(0, len(sig_times), block_size)]
+
     isds = []
 
-    if (
-      len(sig_times) > 100 and
-      is_multithreaded and
-      multiprocessing.cpu_count() > 1 and
-      not os.getenv(ISD_NO_MULTIPROC_ENV)
-    ):
+    if execution == ISD_EXECUTION_PROCESS:
 
-      sys.setrecursionlimit(10000)
+      # ISDs are returned by pickling, and their element trees are linked lists
 
-      with multiprocessing.Pool() as pool:
+      if sys.getrecursionlimit() < 10000:
+        sys.setrecursionlimit(10000)
 
-        for i, isd in enumerate(
-          pool.imap(_generate_isd,
-          [(doc, offset, sig_times) for offset in sig_times],
-          int(len(sig_times)/multiprocessing.cpu_count()))
-        ):
-          isds.append(isd)
-          progress_callback(0.1 + 0.9 * (i + 1) / len(sig_times))
+      with multiprocessing.get_context("fork").Pool(
+        workers, initializer=_init_forked_worker, initargs=(doc, sig_times)
+        ) as pool:
+        for block_isds in pool.imap(_generate_forked_isds, blocks):
+          isds.extend(block_isds)
+          progress_callback(0.1 + 0.9 * len(isds) / len(sig_times))
 
     else:
 
-      for i, isd in enumerate(map(_generate_isd, [(doc, offset, sig_times) for offset in sig_times])):
-        isds.append(isd)
-        progress_callback(0.1 + 0.9 * (i + 1) / len(sig_times))
+      with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        for block_isds in pool.map(lambda block: list(_iter_isds(doc, sig_times, *block)), blocks):
+          isds.extend(block_isds)
+          progress_callback(0.1 + 0.9 * len(isds) / len(sig_times))
 
     return list(zip(sig_times, isds))
 
@@ -411,94 +490,22 @@ class ISD(model.Document):
         StyleProcessors.BY_STYLE_PROP[style_prop].compute(isd_parent, isd_element)
 
   @staticmethod
-  def _process_element(
-      interval_cache,
-      activity_cache,
-      isd: ISD,
+  def _style_element(
+      doc: model.ContentDocument,
       absolute_offset: Fraction,
-      selected_region: model.Region,
-      inherited_region: typing.Optional[model.Region],
       parent: typing.Optional[model.ContentElement],
-      parent_computed_begin: typing.Optional[Fraction],
-      parent_computed_end: typing.Optional[Fraction],
-      element: model.ContentElement
-  ) -> typing.Optional[model.ContentElement]:
-    # pylint: disable=too-many-arguments,too-many-locals,too-many-branches
-
-    # first check the activity cache and return immediate if the element is not active
-
-    is_active = activity_cache.get(element)
-
-    if is_active is False:
-
-      return None
-
-    # compute the temporal extent of the element, hopefully from the cache
-
-    element_interval = interval_cache.get(element)
-
-    if element_interval is None:
-      element_interval = ISD._make_absolute(
-        element.get_begin(),
-        element.get_end(),
-        parent_computed_begin,
-        parent_computed_end
-      )
-      interval_cache[element] = element_interval
-
-    begin_time, end_time = element_interval
-
-    # update the activity cache if the element was not present
-      
-    if is_active is None:
-
-      if (
-        (begin_time is not None and begin_time > absolute_offset) or
-        (end_time is not None and end_time <= absolute_offset)
-      ) :
-        activity_cache[element] = False
-        return None
-
-      activity_cache[element] = True
-
-    # associated region is that associated with the element, or inherited otherwise
-
-    associated_region = element.get_region() if element.get_region() is not None else inherited_region
-
-    # prune the element if either:
-    # * the element has children and the associated region is neither the default nor the root region
-    # * the element has no children and the associated region is not the root region
-
-    if (
-        not isinstance(element, model.Region) and
-        associated_region is not selected_region and
-        (not element.has_children() or associated_region is not None)
-      ):
-      return None
-
-    # create an ISD element
-
-    doc = element.get_doc()
-
-    if isinstance(element, model.Region):
-      isd_element = ISD.Region(element.get_id(), isd)
-    else:
-      isd_element = element.__class__(isd)
-      isd_element.set_id(element.get_id())
-
-    if not isinstance(element, (model.Br, model.Text)): 
-      isd_element.set_lang(element.get_lang())
-      isd_element.set_space(element.get_space())
+      begin_time: Fraction,
+      end_time: typing.Optional[Fraction],
+      element: model.ContentElement,
+      isd_element: model.ContentElement
+  ):
+    '''Sets the computed style properties of `isd_element`, the ISD element of `element` at `absolute_offset`'''
+    # pylint: disable=too-many-arguments
 
     # keep track of specified style properties
 
     styles_to_be_computed: typing.Set[typing.Type[model.StyleProperty]] = set()
 
-    # copy text nodes
-
-    if isinstance(element, model.Text):
-      isd_element.set_text(element.get_text())
-
     # apply animation
 
     for anim_step in element.iter_animation_steps():
@@ -581,6 +588,127 @@ class ISD(model.Document):
 
     ISD._compute_styles(styles_to_be_computed, parent, isd_element)
 
+  @staticmethod
+  def _process_element(
+      interval_cache,
+      activity_cache,
+      isd: ISD,
+      absolute_offset: Fraction,
+      selected_region: model.Region,
+      inherited_region: typing.Optional[model.Region],
+      parent: typing.Optional[model.ContentElement],
+      parent_computed_begin: typing.Optional[Fraction],
+      parent_computed_end: typing.Optional[Fraction],
+      element: model.ContentElement,
+      tracker: typing.Optional[_ActivityTracker] = None
+  ) -> typing.Optional[model.ContentElement]:
+    # pylint: disable=too-many-arguments,too-many-locals,too-many-branches
+
+    # first check the activity cache and return immediate if the element is not active
+
+    is_active = activity_cache.get(element)
+
+    if is_active is False:
+
+      return None
+
+    # compute the temporal extent of the element, hopefully from the cache
+
+    element_interval = interval_cache.get(element)
+
+    if element_interval is None:
+      element_interval = ISD._make_absolute(
+        element.get_begin(),
+        element.get_end(),
+        parent_computed_begin,
+        parent_computed_end
+      )
+      interval_cache[element] = element_interval
+
+    begin_time, end_time = element_interval
+
+    # update the activity cache if the element was not present
+      
+    if is_active is None:
+
+      if (
+        (begin_time is not None and begin_time > absolute_offset) or
+        (end_time is not None and end_time <= absolute_offset)
+      ) :
+        activity_cache[element] = False
+        return None
+
+      activity_cache[element] = True
+
+    # reuse the paragraph computed for an earlier ISD if neither it nor its context has changed since
+
+    if tracker is not None and isinstance(element, model.P) and tracker.is_reusable(element):
+      return tracker.paragraph(
+        element,
+        absolute_offset,
+        isd,
+        lambda: ISD._process_element(
+          interval_cache,
+          activity_cache,
+          isd,
+          absolute_offset,
+          selected_region,
+          inherited_region,
+          parent,
+          parent_computed_begin,
+          parent_computed_end,
+          element
+        )
+      )
+
+    # associated region is that associated with the element, or inherited otherwise
+
+    associated_region = element.get_region() if element.get_region() is not None else inherited_region
+
+    # prune the element if either:
+    # * the element has children and the associated region is neither the default nor the root region
+    # * the element has no children and the associated region is not the root region
+
+    if (
+        not isinstance(element, model.Region) and
+        associated_region is not selected_region and
+        (not element.has_children() or associated_region is not None)
+      ):
+      return None
+
+    # create an ISD element
+
+    doc = element.get_doc()
+
+    if isinstance(element, model.Region):
+      isd_element = ISD.Region(element.get_id(), isd)
+    else:
+      isd_element = element.__class__(isd)
+      isd_element.set_id(element.get_id())
+
+    if not isinstance(element, (model.Br, model.Text)): 
+      isd_element.set_lang(element.get_lang())
+      isd_element.set_space(element.get_space())
+
+    # copy text nodes
+
+    if isinstance(element, model.Text):
+      isd_element.set_text(element.get_text())
+
+    # compute style properties, unless they are known not to have changed since the previous ISD
+
+    computed_styles = tracker.computed_styles(element) if tracker is not None else None
+
+    if computed_styles is None:
+      ISD._style_element(doc, absolute_offset, parent, begin_time, end_time, element, isd_element)
+
+      if tracker is not None:
+        tracker.keep_styles(element, isd_element)
+
+    else:
+      for style_prop, value in computed_styles:
+        isd_element.set_style(style_prop, value)
+
     # prune element is display is "none"
 
     if isd_element.get_style(styles.StyleProperties.Display) is styles.DisplayType.none:
@@ -603,7 +731,8 @@ class ISD(model.Document):
           isd_element,
           None,
           None,
-          doc.get_body()
+          doc.get_body(),
+          tracker
         )
 
         if isd_body_element is not None:
@@ -611,7 +740,9 @@ class ISD(model.Document):
 
     else:
 
-      for child_element in element:
+      # only the active children are visited when the activity of the document is tracked
+
+      for child_element in (element if tracker is None else tracker.children(element)):
         isd_element_child = ISD._process_element(
               interval_cache,
               activity_cache,
@@ -622,7 +753,8 @@ class ISD(model.Document):
               isd_element,
               begin_time,
               end_time,
-              child_element
+              child_element,
+              tracker
         )
 
         if isd_element_child is not None:
@@ -1379,9 +1511,243 @@ class StyleProcessors:
 
 # pylint: enable=missing-class-docstring
 
-def _generate_isd(args):
-  doc, offset, sig_times = args
-  return ISD.from_model(doc, offset, sig_times)
+# (doc, sig_times) of the pool a worker process belongs to; only ever set in a forked worker
+
+_WORKER_STATE: typing.Optional[typing.Tuple[model.ContentDocument, SignificantTimes]] = None
+
+def _init_forked_worker(doc: model.ContentDocument, sig_times: SignificantTimes):
+  global _WORKER_STATE # pylint: disable=global-statement
+  _WORKER_STATE = (doc, sig_times)
+
+def _generate_forked_isds(block: typing.Tuple[int, int]):
+  doc, sig_times = _WORKER_STATE
+  return list(_iter_isds(doc, sig_times, *block))
+
+def _iter_isds(doc: model.ContentDocument, sig_times: SignificantTimes, start: int, stop: int):
+  '''Yields the ISDs of `doc` at `sig_times[start:stop]`, each derived from the previous one'''
+
+  trackers = tuple(_ActivityTracker(cached_doc) for cached_doc in sig_times.cache())
+
+  for i in range(start):
+    for tracker in trackers:
+      tracker.advance(sig_times[i], sig_times[i + 1])
+
+  for i in range(start, stop):
+    offset = sig_times[i]
+
+    next_offset = sig_times[i + 1] if i + 1 < stop else None
+
+    isd = ISD(doc)
+
+    for cached_doc, tracker in zip(sig_times.cache(), trackers):
+      tracker.advance(offset, next_offset)
+      ISD._put_regions(isd, doc, cached_doc, offset, tracker)
+
+    yield isd
+
+def _has_animation(element: model.ContentElement) -> bool:
+  return next(iter(element.iter_animation_steps()), None) is not None
+
+def _copy_isd_element(element: model.ContentElement, isd: ISD) -> model.ContentElement:
+  '''Returns a copy of the ISD element `element` and its descendants that belongs to `isd`'''
+
+  isd_element = element.__class__(isd)
+
+  if isinstance(element, model.Text):
+    isd_element.set_text(element.get_text())
+  else:
+    isd_element.set_id(element.get_id())
+
+    if not isinstance(element, model.Br):
+      isd_element.set_lang(element.get_lang())
+      isd_element.set_space(element.get_space())
+
+    for style_prop in element.iter_styles():
+      isd_element.set_style(style_prop, element.get_style(style_prop))
+
+  children = [_copy_isd_element(child, isd) for child in element]
+
+  if children:
+    isd_element.push_children(children)
+
+  return isd_element
+
+class _ActivityTracker:
+  '''Active elements of a single-region document, updated from one significant time to the next.
+
+  `advance()` must be called with every significant time of the document, in increasing order. The
+  active children of each element are then available from `children()`, in document order, without
+  visiting the inactive ones.
+
+  Paragraphs without animated ancestors depend only on their own subtree: the ISD paragraph computed
+  for one of them is kept while it is active, and copied into the following ISDs for as long as none
+  of its descendants begins, ends or is animated. Paragraphs that change before the next ISD are not
+  kept.
+  '''
+
+  def __init__(self, cached_doc: _SingleRegionDocumentCache):
+    self._interval_cache = cached_doc.interval_cache
+
+    # offset -> elements that become active or inactive at that offset
+
+    self._begins: typing.Dict[Fraction, typing.List[model.ContentElement]] = {}
+    self._ends: typing.Dict[Fraction, typing.List[model.ContentElement]] = {}
+
+    # element -> (parent, index among its siblings)
+
+    self._positions: typing.Dict[model.ContentElement, typing.Tuple[model.ContentElement, int]] = {}
+
+    # element -> {active child: index among its siblings}, and active children in document order
+
+    self._active: typing.Dict[model.ContentElement, typing.Dict[model.ContentElement, int]] = {}
+    self._ordered: typing.Dict[model.ContentElement, typing.Tuple[model.ContentElement, ...]] = {}
+
+    # reusable paragraph -> offsets at which its subtree changes
+
+    self._change_times: typing.Dict[model.P, typing.Tuple[Fraction, ...]] = {}
+
+    # active reusable paragraph -> (index in its change times, ISD paragraph or None)
+
+    self._paragraphs: typing.Dict[model.P, typing.Tuple[int, typing.Optional[model.P]]] = {}
+
+    self._paragraph_doc = ISD(None)
+
+    # regions, body and divs without animation (their own or inherited) and their computed styles
+
+    self._static: typing.Set[model.ContentElement] = set()
+    self._styles: typing.Dict[model.ContentElement, typing.Tuple[typing.Tuple[typing.Type[model.StyleProperty], typing.Any], ...]] = {}
+
+    self._next_offset: typing.Optional[Fraction] = None
+
+    regions = tuple(cached_doc.doc.iter_regions())
+
+    is_animated = any(_has_animation(region) for region in regions)
+
+    if not is_animated:
+      self._static.update(regions)
+
+    body = cached_doc.doc.get_body()
+
+    if body is not None:
+      self._index(body, is_animated)
+
+  def _index(self, element: model.ContentElement, is_animated: bool):
+    is_animated = is_animated or _has_animation(element)
+
+    if not is_animated and isinstance(element, (model.Body, model.Div)):
+      self._static.add(element)
+
+    for i, child in enumerate(element):
+      begin_time, end_time = self._interval_cache[child]
+
+      if end_time is None or begin_time < end_time:
+        self._positions[child] = (element, i)
+        self._begins.setdefault(begin_time, []).append(child)
+
+        if end_time is not None:
+          self._ends.setdefault(end_time, []).append(child)
+
+      if isinstance(child, model.P) and not is_animated:
+        self._change_times[child] = tuple(sorted(self._subtree_times(child, set())))
+
+      self._index(child, is_animated)
+
+  def _subtree_times(self, element: model.ContentElement, times: typing.Set[Fraction]) -> typing.Set[Fraction]:
+    begin_time, end_time = self._interval_cache[element]
+
+    times.add(begin_time)
+
+    if end_time is not None:
+      times.add(end_time)
+
+    for anim_step in element.iter_animation_steps():
+      anim_begin_time, anim_end_time = ISD._make_absolute(anim_step.begin, anim_step.end, begin_time, end_time)
+
+      times.add(anim_begin_time)
+
+      if anim_end_time is not None:
+        times.add(anim_end_time)
+
+    for child in element:
+      self._subtree_times(child, times)
+
+    return times
+
+  def advance(self, offset: Fraction, next_offset: typing.Optional[Fraction]):
+    '''Updates the active elements to `offset`; `next_offset` is the offset of the next ISD, if any'''
+
+    self._next_offset = next_offset
+
+    for element in self._begins.pop(offset, ()):
+      parent, index = self._positions[element]
+      self._active.setdefault(parent, {})[element] = index
+      self._ordered.pop(parent, None)
+
+    for element in self._ends.pop(offset, ()):
+      parent, _ = self._positions[element]
+      self._active[parent].pop(element, None)
+      self._ordered.pop(parent, None)
+      self._paragraphs.pop(element, None)
+
+  def children(self, element: model.ContentElement) -> typing.Tuple[model.ContentElement, ...]:
+    '''Returns the active children of `element`, in document order'''
+
+    ordered = self._ordered.get(element)
+
+    if ordered is None:
+      active = self._active.get(element)
+      ordered = tuple(sorted(active, key=active.get)) if active else ()
+      self._ordered[element] = ordered
+
+    return ordered
+
+  def computed_styles(self, element: model.ContentElement) -> typing.Optional[typing.Tuple[typing.Tuple[typing.Type[model.StyleProperty], typing.Any], ...]]:
+    '''Returns the computed style properties of the ISD element of `element`, if they are known'''
+    return self._styles.get(element)
+
+  def keep_styles(self, element: model.ContentElement, isd_element: model.ContentElement):
+    '''Keeps the computed style properties of `isd_element` if they are the same in every ISD'''
+
+    if element in self._static:
+      self._styles[element] = tuple((style_prop, isd_element.get_style(style_prop)) for style_prop in isd_element.iter_styles())
+
+  def is_reusable(self, element: model.P) -> bool:
+    '''Returns whether ISD paragraphs computed for `element` can be reused'''
+    return element in self._change_times
+
+  def paragraph(
+    self,
+    element: model.P,
+    offset: Fraction,
+    isd: ISD,
+    compute: typing.Callable[[], typing.Optional[model.P]]
+    ) -> typing.Optional[model.P]:
+    '''Returns the ISD paragraph of `element` at `offset`, copied from an earlier ISD where possible
+    and computed by `compute` otherwise'''
+
+    change_times = self._change_times[element]
+
+    state = bisect.bisect_right(change_times, offset)
+
+    previous = self._paragraphs.get(element)
+
+    if previous is not None and previous[0] == state:
+      return _copy_isd_element(previous[1], isd) if previous[1] is not None else None
+
+    isd_element = compute()
+
+    if self._next_offset is None or (state < len(change_times) and change_times[state] <= self._next_offset):
+      self._paragraphs.pop(element, None)
+      return isd_element
+
+    # ISDs can be modified by their consumers (e.g. ISD filters): keep a copy
+
+    self._paragraphs[element] = (
+      state,
+      _copy_isd_element(isd_element, self._paragraph_doc) if isd_element is not None else None
+    )
+
+    return isd_element
 
 
 def _clone_doc_with_one_region(doc: model.ContentDocument, region_id: str):
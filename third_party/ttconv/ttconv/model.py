@@ -26,6 +26,7 @@
 '''Data model'''
 
 from __future__ import annotations
+import collections.abc
 import typing
 from enum import Enum
 from fractions import Fraction
@@ -66,8 +67,55 @@ class DiscreteAnimationStep:
 
     
 
+class _EmptyStyles(collections.abc.Mapping):
+  '''Immutable empty mapping shared by all elements without style properties'''
+
+  __slots__ = ()
+
+  def __getitem__(self, key):
+    raise KeyError(key)
+
+  def __iter__(self):
+    return iter(())
+
+  def __len__(self):
+    return 0
+
+  def __contains__(self, key):
+    return False
+
+  def get(self, key, default=None):
+    return default
+
+  def __reduce__(self):
+    # a single instance, also across pickling
+    return "_NO_STYLES"
+
+_NO_STYLES = _EmptyStyles()
+
 class ContentElement:
-  '''Abstract base class for all content elements in the model.'''
+  '''Abstract base class for all content elements in the model.
+
+  Elements have no per-instance `__dict__`: subclasses must declare `__slots__`. Elements without
+  style properties or animation steps share the same immutable empty containers.
+  '''
+
+  __slots__ = (
+    "_space",
+    "_lang",
+    "_doc",
+    "_first_child",
+    "_last_child",
+    "_parent",
+    "_previous_sibling",
+    "_next_sibling",
+    "_styles",
+    "_sets",
+    "_region",
+    "_begin",
+    "_end",
+    "_id",
+  )
 
   def __init__(self, doc=None):
 
@@ -93,11 +141,11 @@ class ContentElement:
 
     # styles
 
-    self._styles = {}
+    self._styles = _NO_STYLES
 
     # animation
 
-    self._sets = []
+    self._sets = ()
 
     # layout
 
@@ -343,13 +391,17 @@ class ContentElement:
 
     if value is None:
 
-      self._styles.pop(style_prop, None)
+      if style_prop in self._styles:
+        del self._styles[style_prop]
 
     else:
 
       if not style_prop.validate(value):
         raise ValueError(f"Invalid value {value} for style property {style_prop}")
 
+      if self._styles is _NO_STYLES:
+        self._styles = {}
+
       self._styles[style_prop] = value
 
   _applicableStyles: typing.Set[StyleProperty] = frozenset()
@@ -412,12 +464,17 @@ class ContentElement:
     if not step.style_property.is_animatable:
       raise TypeError("The style property is not animatable")
 
-    self._sets.append(step)
+    self._sets += (step,)
 
   def remove_animation_step(self, step: DiscreteAnimationStep):
     '''Remove `step` from the discrete animation steps associated with the element
     '''
-    self._sets.remove(step)
+    if step not in self._sets:
+      raise ValueError("Animation step is not associated with the element")
+
+    i = self._sets.index(step)
+
+    self._sets = self._sets[:i] + self._sets[i + 1:]
 
   def iter_animation_steps(self) -> typing.Iterator[DiscreteAnimationStep]:
     '''Returns an iterator over the discrete animation steps associated with the element
@@ -453,6 +510,8 @@ class ContentElement:
 class Body(ContentElement):
   '''Body element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Display,
@@ -470,6 +529,8 @@ class Body(ContentElement):
 class Div(ContentElement):
   '''Div element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Display,
@@ -487,6 +548,8 @@ class Div(ContentElement):
 class P(ContentElement):
   '''P element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Direction,
@@ -517,6 +580,8 @@ class P(ContentElement):
 class Span(ContentElement):
   '''Span element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Color,
@@ -547,6 +612,8 @@ class Span(ContentElement):
 class Br(ContentElement):
   '''Br element, as specified in TTML2'''
 
+  __slots__ = ()
+
   def push_child(self, child):
     raise TypeError("Br elements cannot have children")
 
@@ -574,6 +641,8 @@ class Br(ContentElement):
 class Ruby(ContentElement):
   '''Ruby element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Direction,
@@ -610,6 +679,8 @@ class Ruby(ContentElement):
 class Rb(ContentElement):
   '''Rb element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Color,
@@ -638,6 +709,8 @@ class Rb(ContentElement):
 class Rbc(ContentElement):
   '''Rbc element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Direction,
@@ -654,6 +727,8 @@ class Rbc(ContentElement):
 class Rp(ContentElement):
   '''Rp element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Color,
@@ -683,6 +758,8 @@ class Rp(ContentElement):
 class Rt(ContentElement):
   '''Rt element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Color,
@@ -713,6 +790,8 @@ class Rt(ContentElement):
 class Rtc(ContentElement):
   '''Rtc element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Direction,
@@ -760,6 +839,8 @@ class Rtc(ContentElement):
 class Text(ContentElement):
   '''Text node, as specified in TTML2'''
 
+  __slots__ = ("_text",)
+
   def __init__(self, doc=None, text=""):
     self._text = text
     super().__init__(doc=doc)
@@ -817,6 +898,8 @@ class Text(ContentElement):
 class Region(ContentElement):
   '''Out-of-line region element, as specified in TTML2'''
 
+  __slots__ = ()
+
   _applicableStyles = frozenset([
     StyleProperties.BackgroundColor,
     StyleProperties.Disparity,
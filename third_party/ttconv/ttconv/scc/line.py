@@ -56,6 +56,8 @@ DF_PATTERN = '(:|;|.|,)'.join(['(?P<df_h>[0-9]{2})',
                               '(?P<df_f>[0-9]{2})'])
 SCC_LINE_PATTERN = '((' + NDF_PATTERN + ')|(' + DF_PATTERN + '))\t.*'
 
+SCC_LINE_REGEX = re.compile(SCC_LINE_PATTERN)
+
 
 class SccLine:
   """SCC line definition"""
@@ -70,8 +72,7 @@ class SccLine:
     if not line:
       return None
 
-    regex = re.compile(SCC_LINE_PATTERN)
-    match = regex.match(line)
+    match = SCC_LINE_REGEX.match(line)
 
     if match is None:
       return None
@@ -115,7 +116,11 @@ class SccLine:
   def process(self, context: SccContext) -> SmpteTimeCode:
     """Converts the SCC line to the data model"""
 
-    debug = str(self.time_code) + "\t"
+    # the debug trace is only built when it is logged
+
+    is_debug = LOGGER.isEnabledFor(logging.DEBUG)
+
+    debug = str(self.time_code) + "\t" if is_debug else ""
 
     first = True
     for scc_word in self.scc_words:
@@ -144,28 +149,33 @@ class SccLine:
         context.current_channel = caption_channel
 
         if isinstance(scc_code, SccPreambleAddressCode):
-          debug += scc_code.debug(scc_word.value)
+          if is_debug:
+            debug += scc_code.debug(scc_word.value)
           context.process_preamble_address_code(scc_code, self.time_code)
           context.previous_word_type = type(scc_code)
 
         elif isinstance(scc_code, SccAttributeCode):
-          debug += scc_code.debug(scc_word.value)
+          if is_debug:
+            debug += scc_code.debug(scc_word.value)
           context.process_attribute_code(scc_code)
           context.previous_word_type = type(scc_code)
 
         elif isinstance(scc_code, SccMidRowCode):
-          debug += scc_code.debug(scc_word.value)
+          if is_debug:
+            debug += scc_code.debug(scc_word.value)
           context.process_mid_row_code(scc_code, self.time_code)
           context.previous_word_type = type(scc_code)
 
         elif isinstance(scc_code, SccControlCode):
-          debug += scc_code.debug(scc_word.value)
+          if is_debug:
+            debug += scc_code.debug(scc_word.value)
           context.process_control_code(scc_code, self.time_code)
           context.previous_word_type = type(scc_code)
 
         elif isinstance(scc_code, SccSpecialCharacter):
           word = scc_code.get_unicode_value()
-          debug += word
+          if is_debug:
+            debug += word
           context.process_text(word, self.time_code)
           context.previous_word_type = type(scc_code)
 
@@ -173,12 +183,14 @@ class SccLine:
           context.backspace()
 
           word = scc_code.get_unicode_value()
-          debug += word
+          if is_debug:
+            debug += word
           context.process_text(word, self.time_code)
           context.previous_word_type = type(scc_code)
 
         else:
-          debug += "[??/" + hex(scc_word.value) + "]"
+          if is_debug:
+            debug += "[??/" + hex(scc_word.value) + "]"
           LOGGER.warning("Unsupported SCC word: %s", hex(scc_word.value))
           context.previous_word_type = None
 
@@ -188,12 +200,14 @@ class SccLine:
           continue
 
         text = scc_word.to_text()
-        debug += text
+        if is_debug:
+          debug += text
         context.process_text(text, self.time_code)
         context.previous_word_type = str
 
       context.previous_word = scc_word
 
-    LOGGER.debug(debug)
+    if is_debug:
+      LOGGER.debug(debug)
 
     return self.time_code
@@ -28,7 +28,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import Iterable, Optional, Union
 
 from ttconv.model import ContentDocument, Body, Div, CellResolutionType, ActiveAreaType
 from ttconv.scc.caption_paragraph import SCC_SAFE_AREA_CELL_RESOLUTION_ROWS, \
@@ -45,8 +45,17 @@ LOGGER = logging.getLogger(__name__)
 # SCC reader
 #
 
-def to_model(scc_content: str, config: Optional[SccReaderConfiguration] = None, progress_callback=lambda _: None):
-  """Converts a SCC document to the data model"""
+def _iter_lines(scc_content: Union[str, Iterable[str]]) -> Iterable[str]:
+  """Lines of a SCC document given as a string, a text file object or an iterable of lines"""
+  if isinstance(scc_content, str):
+    return scc_content.splitlines()
+
+  return (line.rstrip("\r\n") for line in scc_content)
+
+
+def to_model(scc_content: Union[str, Iterable[str]], config: Optional[SccReaderConfiguration] = None, progress_callback=lambda _: None):
+  """Converts a SCC document to the data model. The document can be a string, or a text file object or any
+  other iterable of lines, which is read incrementally."""
 
   document = ContentDocument()
 
@@ -85,14 +94,21 @@ def to_model(scc_content: str, config: Optional[SccReaderConfiguration] = None,
   context.div.set_doc(document)
   body.push_child(context.div)
 
-  lines = scc_content.splitlines()
-  nb_lines = len(lines)
+  lines = _iter_lines(scc_content)
+
+  # progress is reported per line when the number of lines is known, at the end otherwise
+  nb_lines = len(lines) if hasattr(lines, "__len__") else None
+
+  is_debug = LOGGER.isEnabledFor(logging.DEBUG)
 
   for (index, line) in enumerate(lines):
-    LOGGER.debug(line)
+    if is_debug:
+      LOGGER.debug(line)
+
     scc_line = SccLine.from_str(line)
 
-    progress_callback((index + 1) / nb_lines)
+    if nb_lines:
+      progress_callback((index + 1) / nb_lines)
 
     if scc_line is None:
       continue
@@ -101,13 +117,16 @@ def to_model(scc_content: str, config: Optional[SccReaderConfiguration] = None,
 
   context.flush()
 
+  if not nb_lines:
+    progress_callback(1.0)
+
   return document
 
 
-def to_disassembly(scc_content: str, show_channels = False) -> str:
+def to_disassembly(scc_content: Union[str, Iterable[str]], show_channels = False) -> str:
   """Dumps an SCC document into the disassembly format"""
   disassembly = ""
-  for line in scc_content.splitlines():
+  for line in _iter_lines(scc_content):
     LOGGER.debug(line)
     scc_line = SccLine.from_str(line)
 
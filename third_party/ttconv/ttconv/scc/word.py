@@ -27,7 +27,7 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 from ttconv.scc.codes import SccCode, SccChannel
 from ttconv.scc.codes.attribute_codes import SccAttributeCode
@@ -41,14 +41,50 @@ from ttconv.scc.codes.standard_characters import SCC_STANDARD_CHARACTERS_MAPPING
 PARITY_BIT_MASK = 0b01111111
 
 
+def _make_code_table() -> List[Optional[SccCode | SccPreambleAddressCode]]:
+  """Control, attribute, mid-row, preamble address, special and extended character codes of all the
+  65536 2-bytes words, indexed by word value (with or without parity bits)"""
+  table: List[Optional[SccCode | SccPreambleAddressCode]] = [None] * 0x10000
+
+  for byte_1 in range(0x10, 0x20):
+    for byte_2 in range(0x80):
+      value = byte_1 * 0x100 + byte_2
+      code = SccControlCode.find(value) or \
+        SccAttributeCode.find(value) or \
+        SccMidRowCode.find(value) or \
+        SccPreambleAddressCode.find(byte_1, byte_2) or \
+        SccSpecialCharacter.find(value) or \
+        SccExtendedCharacter.find(value)
+
+      if code is not None:
+        for parity_bits in (0x0000, 0x0080, 0x8000, 0x8080):
+          table[value | parity_bits] = code
+
+  return table
+
+# built on first use: decoding a word is then a single lookup
+
+_CODE_TABLE: Optional[List[Optional[SccCode | SccPreambleAddressCode]]] = None
+
+# SCC words are immutable: one instance per 2-bytes value, and per hexadecimal string, is shared by
+# all the lines that contain it
+
+_WORD_TABLE: List[Optional[SccWord]] = [None] * 0x10000
+
+_WORDS_BY_STR: Dict[str, SccWord] = {}
+
+
 class SccWord:
   """SCC hexadecimal word definition"""
 
+  __slots__ = ("byte_1", "byte_2", "value", "code", "_text")
+
   def __init__(self, byte_1: int, byte_2: int):
     self.byte_1 = byte_1
     self.byte_2 = byte_2
     self.value = byte_1 * 0x100 + byte_2
     self.code: Optional[SccCode | SccPreambleAddressCode] = self._find_code()
+    self._text: Optional[str] = None
 
   @staticmethod
   def _is_hex_word(word: str) -> bool:
@@ -71,8 +107,14 @@ class SccWord:
     """Creates a SCC word from the specified integer value"""
     if value > 0xFFFF:
       raise ValueError("Expected a 2-bytes int value, instead got ", hex(value))
-    data = value.to_bytes(2, byteorder='big')
-    return SccWord.from_bytes(data[0], data[1])
+
+    word = _WORD_TABLE[value]
+
+    if word is None:
+      word = SccWord.from_bytes(value >> 8, value & 0xFF)
+      _WORD_TABLE[value] = word
+
+    return word
 
   @staticmethod
   def from_bytes(byte_1: int, byte_2: int) -> SccWord:
@@ -87,26 +129,33 @@ class SccWord:
   @staticmethod
   def from_str(hex_word: str) -> SccWord:
     """Extracts hexadecimal word bytes to create a SCC word"""
-    if not SccWord._is_hex_word(hex_word):
-      raise ValueError("Expected a 2-bytes hexadecimal word, instead got ", hex_word)
+    word = _WORDS_BY_STR.get(hex_word)
+
+    if word is None:
+      if not SccWord._is_hex_word(hex_word):
+        raise ValueError("Expected a 2-bytes hexadecimal word, instead got ", hex_word)
 
-    data = bytes.fromhex(hex_word)
-    return SccWord.from_bytes(data[0], data[1])
+      data = bytes.fromhex(hex_word)
+      word = SccWord.from_value(data[0] * 0x100 + data[1])
+      _WORDS_BY_STR[hex_word] = word
+
+    return word
 
   def _find_code(self) -> Optional[SccCode | SccPreambleAddressCode]:
     """Find corresponding code"""
+    global _CODE_TABLE
+
     if self.is_code():
-      return SccControlCode.find(self.value) or \
-        SccAttributeCode.find(self.value) or \
-        SccMidRowCode.find(self.value) or \
-        SccPreambleAddressCode.find(self.byte_1, self.byte_2) or \
-        SccSpecialCharacter.find(self.value) or \
-        SccExtendedCharacter.find(self.value)
+      if _CODE_TABLE is None:
+        _CODE_TABLE = _make_code_table()
+      return _CODE_TABLE[self.value]
     return None
 
   def to_text(self) -> str:
     """Converts SCC word to text"""
-    return ''.join(SCC_STANDARD_CHARACTERS_MAPPING.get(byte, chr(byte)) for byte in [self.byte_1, self.byte_2] if byte != 0x00)
+    if self._text is None:
+      self._text = ''.join(SCC_STANDARD_CHARACTERS_MAPPING.get(byte, chr(byte)) for byte in [self.byte_1, self.byte_2] if byte != 0x00)
+    return self._text
 
   def get_code(self) -> Optional[SccCode]:
     """Returns the SCC code if any"""
@@ -239,21 +239,19 @@ MAX_LINEWIDTH = 32
 def from_model(doc: model.ContentDocument, config: Optional[SccWriterConfiguration] = None, progress_callback=lambda _: None) -> str:
   """Converts the data model to an SCC document"""
 
-  # split progress between ISD construction and SCC writing
+  # 75% for computing ISDs and creating captions, one ISD at a time
   def _isd_progress(progress: float):
-    progress_callback(progress / 2)
+    progress_callback(progress * 3 / 4)
 
   config : SccWriterConfiguration = config if config is not None else SccWriterConfiguration()
-  isds = ISD.generate_isd_sequence(doc, _isd_progress)
+  isds = ISD.iter_isd_sequence(doc, _isd_progress)
   is_rollup = None
   is_last_empty = True
 
   # generate list of captions
   captions: List[_Caption] = []
-  for i, (begin, isd) in enumerate(isds):
+  for begin, isd in isds:
 
-    # 25% for creating captions
-    progress_callback(0.5 + (i + 1) / len(isds) / 4)
     LOGGER.debug("Processing ISD at %ss to SCC content", float(begin))
 
     if len(captions) > 0 and captions[-1].get_end() is None:
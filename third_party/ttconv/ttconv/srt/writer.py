@@ -191,29 +191,22 @@ def from_model(doc: model.ContentDocument, config: Optional[SRTWriterConfigurati
 
   srt = SrtContext(config if config is not None else SRTWriterConfiguration())
 
-  # split progress between ISD construction and SRT writing
+  # ISDs are computed one at a time, and each is written before the next one is computed
 
-  def _isd_progress(progress: float):
-    progress_callback(progress / 2)
+  isds = ISD.iter_isd_sequence(doc, progress_callback)
 
-  # Compute ISDs
+  begin, isd = next(isds, (None, None))
 
-  isds = list(
-    ISD.generate_isd_sequence(doc, _isd_progress)
-  )
-
-  # process ISDs
-
-  for i, (begin, isd) in enumerate(isds):
+  while isd is not None:
 
-    end = isds[i + 1][0] if i + 1 < len(isds) else None
+    end, next_isd = next(isds, (None, None))
 
     for srt_filter in srt.filters:
       srt_filter.process(isd)
 
     srt.add_isd(isd, begin, end)
 
-    progress_callback(0.5 + (i + 1) / len(isds) / 2)
+    begin, isd = end, next_isd
 
   srt.finish()
 
@@ -209,6 +209,24 @@ class SmpteTimeCode(_HHMMSSTimeExpression):
 
   def add_frames(self, nb_frames=1):
     """Add frames to the current time code"""
+
+    # fast path: a valid time code that stays within the same second, where
+    # from_frames() would give back the same drop frame mode
+
+    fps = ceil(self._frame_rate)
+
+    frames = self._frames + nb_frames
+
+    if nb_frames > 0 and frames < fps and self._minutes < 60 and self._seconds < 60 and \
+      self._is_drop_frame == (self._frame_rate.denominator == 1001) and (
+        not self._is_drop_frame or self._frame_rate in (FPS_29_97, FPS_59_94) and (
+          self._seconds != 0 or self._minutes % 10 == 0 or
+          self._frames >= round(60 * (fps - self._frame_rate))
+        )
+      ):
+      self._frames = frames
+      return
+
     frames = self.to_frames() + nb_frames
 
     new_time_code = SmpteTimeCode.from_frames(frames, self._frame_rate)
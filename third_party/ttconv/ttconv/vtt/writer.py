@@ -272,24 +272,21 @@ class VttContext:
 def from_model(doc: model.ContentDocument, config = None, progress_callback=lambda _: None) -> str:
   """Converts the data model to a VTT document"""
 
-  # split progress between ISD construction and VTT writing
-  def _isd_progress(progress: float):
-    progress_callback(progress / 2)
-
   # create context
   vtt = VttContext(config if config is not None else VTTWriterConfiguration())
 
-  # Compute ISDs
-  isds = ISD.generate_isd_sequence(doc, _isd_progress)
+  # ISDs are computed one at a time, and each is written before the next one is computed
+  isds = ISD.iter_isd_sequence(doc, progress_callback)
+
+  begin, isd = next(isds, (None, None))
 
-  # process ISDs
-  for i, (begin, isd) in enumerate(isds):
+  while isd is not None:
 
-    end = isds[i + 1][0] if i + 1 < len(isds) else None
+    end, next_isd = next(isds, (None, None))
 
     vtt.add_isd(isd, begin, end)
 
-    progress_callback(0.5 + (i + 1) / len(isds) / 2)
+    begin, isd = end, next_isd
 
   vtt.finish()
 